@@ -0,0 +1,126 @@
+"""Report how a small-model cascade would behave on a local question set.
+
+Answers every question with the small (first-tier) model and with MODEL_NAME,
+timing both, then replays the cascade for a range of thresholds: questions whose
+small-model score is below the threshold escalate to MODEL_NAME. For each
+threshold it reports the escalation rate, agreement with MODEL_NAME-only answers
+and the resulting mean latency, so QA_CASCADE_THRESHOLD can be chosen from data.
+
+Usage (from the repository root):
+    python benchmarks/cascade_report.py
+    python benchmarks/cascade_report.py --small distilbert-base-cased-distilled-squad --output cascade_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MODEL_LOAD_MODE', 'off')
+
+import new
+from compare_backends import build_question_set
+
+DEFAULT_THRESHOLDS = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def answer_all(engine, pairs):
+    """Answer each question alone, as a request would be, recording latency"""
+    engine.encode_knowledge_base(new.KNOWLEDGE_BASE)
+    section = new.KNOWLEDGE_BASE.section(pairs[0][1])
+    engine.answer_batch([pairs[0][0]], [section])  # Warm up
+    results = []
+    for question, topic in pairs:
+        section = new.KNOWLEDGE_BASE.section(topic)
+        started = time.monotonic()
+        result = engine.answer_batch([question], [section])[0]
+        results.append({'answer': result['answer'], 'score': float(result['score']),
+                        'ms': (time.monotonic() - started) * 1000})
+    return results
+
+
+def served_answer(result, section):
+    """The answer extract_answer would serve for a model result (same > 0.1 gate)"""
+    if result['score'] > 0.1 and result['answer']:
+        return result['answer']
+    return section.fallback_answer
+
+
+def replay(pairs, small, large, threshold):
+    """Cascade outcome at one threshold, from the recorded answers and latencies"""
+    escalated = agree = 0
+    total_ms = 0.0
+    for (question, topic), small_result, large_result in zip(pairs, small, large):
+        section = new.KNOWLEDGE_BASE.section(topic)
+        total_ms += small_result['ms']
+        if small_result['score'] >= threshold and small_result['answer']:
+            answer = small_result['answer']
+        else:
+            escalated += 1
+            total_ms += large_result['ms']
+            answer = served_answer(large_result, section)
+        if answer.strip().lower() == served_answer(large_result, section).strip().lower():
+            agree += 1
+    count = len(pairs) or 1
+    return {
+        'threshold': threshold,
+        'escalation_rate': round(escalated / count, 3),
+        'agreement_with_large': round(agree / count, 3),
+        'mean_latency_ms': round(total_ms / count, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--small', default=new.QA_CASCADE_MODEL or 'distilbert-base-cased-distilled-squad')
+    parser.add_argument('--large', default=new.MODEL_NAME)
+    parser.add_argument('--backend', default=new.QA_BACKEND)
+    parser.add_argument('--questions', help="file with one question per line (default: 'What is X?' per heading)")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('--output', help="write the full report as JSON")
+    args = parser.parse_args()
+
+    pairs = build_question_set(args.questions)
+    if not pairs:
+        print("❌ No routable questions")
+        return 1
+    print(f"🧪 Cascade {args.small} → {args.large} on {len(pairs)} questions")
+
+    small = answer_all(new.create_qa_engine(args.backend, args.small), pairs)
+    large = answer_all(new.create_qa_engine(args.backend, args.large), pairs)
+    large_ms = sum(result['ms'] for result in large) / len(large)
+    small_ms = sum(result['ms'] for result in small) / len(small)
+
+    sweep = [replay(pairs, small, large, threshold) for threshold in args.thresholds]
+    current = replay(pairs, small, large, new.QA_CASCADE_THRESHOLD)
+
+    print(f"\nMean latency: {args.small} {small_ms:.2f} ms, {args.large} {large_ms:.2f} ms")
+    print(f"{'threshold':>9} {'escalated':>10} {'agreement':>10} {'mean ms':>8} {'vs large':>9}")
+    for row in sweep + [current]:
+        marker = '  ← QA_CASCADE_THRESHOLD' if row is current else ''
+        print(f"{row['threshold']:>9} {row['escalation_rate']:>10} {row['agreement_with_large']:>10} "
+              f"{row['mean_latency_ms']:>8} {row['mean_latency_ms'] / large_ms:>8.2f}x{marker}")
+
+    if args.output:
+        report = {
+            'small_model': args.small,
+            'large_model': args.large,
+            'backend': args.backend,
+            'questions': len(pairs),
+            'mean_latency_ms': {'small': round(small_ms, 2), 'large': round(large_ms, 2)},
+            'configured_threshold': current,
+            'sweep': sweep,
+            'results': [
+                {'question': question, 'topic': topic, 'small': small_result, 'large': large_result}
+                for (question, topic), small_result, large_result in zip(pairs, small, large)
+            ]
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Compare QA inference backends for parity, latency and memory.
+
+Runs every backend over the same local question set, each in its own
+process so peak RSS is measured per backend, and checks answers and
+scores against the fp32 transformers question-answering pipeline.
+
+Usage (from the repository root):
+    python benchmarks/compare_backends.py
+    python benchmarks/compare_backends.py --backends pytorch quantized onnx --output backend_report.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MODEL_LOAD_MODE', 'off')
+
+import new
+
+
+def build_question_set(path=None):
+    """Return (question, topic) pairs: from a file (one question per line) or one per KB heading"""
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = [f"What is {new.KnowledgeBase.short_heading(heading).lower()}?"
+                     for heading in new.KNOWLEDGE_BASE.sections]
+
+    pairs = []
+    for question in questions:
+        topic, _ = new.find_relevant_topic(question, new.KNOWLEDGE_BASE)
+        if topic and new.KNOWLEDGE_BASE.section(topic):
+            pairs.append((question, topic))
+    return pairs
+
+
+def run_backend(backend, pairs):
+    """Answer every question with one backend; runs in a fresh process.
+
+    'pipeline' is the fp32 transformers pipeline, every other backend runs through
+    the app's QAEngine with pre-tokenized sections.
+    """
+    started = time.monotonic()
+    if backend == 'pipeline':
+        qa_pipeline = new.create_qa_pipeline('pytorch')
+
+        def answer(question, section):
+            return qa_pipeline(question=question, context=section.text,
+                               max_answer_len=new.QA_MAX_ANSWER_LEN, handle_impossible_answer=True)
+    else:
+        engine = new.create_qa_engine(backend)
+        engine.encode_knowledge_base(new.KNOWLEDGE_BASE)
+
+        def answer(question, section):
+            return engine.answer_batch([question], [section])[0]
+    load_seconds = time.monotonic() - started
+
+    results, latencies_ms = [], []
+    for question, topic in pairs:
+        section = new.KNOWLEDGE_BASE.section(topic)
+        started = time.monotonic()
+        result = answer(question, section)
+        latencies_ms.append((time.monotonic() - started) * 1000)
+        results.append({'answer': result['answer'], 'score': float(result['score'])})
+
+    latencies_ms.sort()
+    return {
+        'backend': backend,
+        'load_seconds': round(load_seconds, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0,
+            'p50': round(latencies_ms[len(latencies_ms) // 2], 2) if latencies_ms else 0,
+            'p95': round(latencies_ms[int(len(latencies_ms) * 0.95)], 2) if latencies_ms else 0
+        },
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'results': results
+    }
+
+
+def compare(reference, candidate, pairs, score_tolerance):
+    """Parity of a candidate backend against the reference pipeline"""
+    answer_matches, gate_matches, score_diffs, mismatches = 0, 0, [], []
+    for (question, topic), ref, cand in zip(pairs, reference['results'], candidate['results']):
+        score_diff = abs(ref['score'] - cand['score'])
+        score_diffs.append(score_diff)
+        if ref['answer'].strip() == cand['answer'].strip():
+            answer_matches += 1
+        else:
+            mismatches.append({'question': question, 'topic': topic, 'reference': ref, 'candidate': cand})
+        # extract_answer only uses the model answer when score > 0.1
+        if (ref['score'] > 0.1) == (cand['score'] > 0.1):
+            gate_matches += 1
+
+    total = len(pairs) or 1
+    return {
+        'answer_agreement': round(answer_matches / total, 3),
+        'confidence_gate_agreement': round(gate_matches / total, 3),
+        'mean_score_diff': round(sum(score_diffs) / total, 4),
+        'max_score_diff': round(max(score_diffs, default=0), 4),
+        'passed': answer_matches == len(pairs) and max(score_diffs, default=0) <= score_tolerance,
+        'mismatches': mismatches[:10]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['pytorch', 'quantized', 'onnx'])
+    parser.add_argument('--questions', help="file with one question per line (default: 'What is X?' per heading)")
+    parser.add_argument('--score-tolerance', type=float, default=0.05)
+    parser.add_argument('--output', help="write the full report as JSON")
+    args = parser.parse_args()
+
+    pairs = build_question_set(args.questions)
+    backends = ['pipeline'] + [b for b in args.backends if b != 'pipeline']
+    print(f"🧪 Comparing {', '.join(backends)} on {len(pairs)} questions")
+
+    # A fresh process per backend keeps peak RSS numbers independent
+    context = multiprocessing.get_context('spawn')
+    runs = {}
+    for backend in backends:
+        with context.Pool(1) as pool:
+            try:
+                runs[backend] = pool.apply(run_backend, (backend, pairs))
+            except Exception as e:
+                print(f"❌ {backend}: {e}")
+
+    if 'pipeline' not in runs:
+        print("❌ Reference pipeline failed; nothing to compare against")
+        return 1
+
+    report = {'model': new.MODEL_NAME, 'questions': len(pairs), 'backends': {}}
+    print(f"\n{'backend':<10} {'load s':>7} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'RSS MB':>7} {'agree':>6} {'max Δscore':>10}")
+    for backend, run in runs.items():
+        parity = compare(runs['pipeline'], run, pairs, args.score_tolerance)
+        report['backends'][backend] = {**{k: v for k, v in run.items() if k != 'results'}, 'parity': parity}
+        latency = run['latency_ms']
+        print(f"{backend:<10} {run['load_seconds']:>7} {latency['mean']:>8} {latency['p50']:>7} {latency['p95']:>7} "
+              f"{run['peak_rss_mb']:>7} {parity['answer_agreement']:>6} {parity['max_score_diff']:>10}"
+              f"{'' if parity['passed'] else '  ⚠️ parity'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Load test /ask without downloading the QA model.
+
+A deterministic stub engine stands in for the model behind the app's batching
+executor, so routing, batching, caching and rendering run exactly as in
+production while inference costs a fixed, configurable latency. Questions come
+from a JSONL trace (one object per line with a 'question', 'title' or 'body'
+field, like requests.jsonl) or from a seeded synthetic mix of greetings,
+quizzes, help, learning path and topic questions.
+
+Drivers:
+    client  Flask test client, in process (no sockets)
+    http    real HTTP requests; starts an in-process threaded server unless --url is given
+
+Reports p50/p95/p99 latency, requests/second and per-stage time spent in
+find_relevant_topics, extract_answer and HTML rendering (in-process only).
+
+Usage (from the repository root):
+    python benchmarks/load_test.py --requests 2000 --concurrency 16
+    python benchmarks/load_test.py --driver http --stub-latency-ms 40 --output load_report.json
+    python benchmarks/load_test.py --trace requests.jsonl --baseline load_report.json
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MODEL_LOAD_MODE', 'off')
+
+import new
+
+DEFAULT_MIX = 'greeting=0.1,quiz=0.1,help=0.05,learning_path=0.05,topic=0.7'
+
+
+# --------- Stub backend ---------
+class StubQAEngine:
+    """Deterministic stand-in for QAEngine: fixed latency per batch, answers from the section text"""
+
+    def __init__(self, latency_ms=25.0, per_item_ms=2.0):
+        self.latency = latency_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self.name = 'stub'
+
+    def answer_batch(self, questions, sections):
+        time.sleep(self.latency + self.per_item * len(questions))
+        results = []
+        for question, section in zip(questions, sections):
+            # Same question and section always give the same answer and score
+            digest = hashlib.sha1(f"{question}\n{section.heading}".encode('utf-8')).digest()
+            score = 0.05 + digest[0] / 255 * 0.9
+            answer = section.fallback_answer or section.text[:200]
+            results.append({'answer': answer, 'score': score, 'start': 0, 'end': len(answer)})
+        return results
+
+
+def install_stub(latency_ms, per_item_ms):
+    """Put the stub behind the app's batching executor and mark the model ready"""
+    engine = StubQAEngine(latency_ms, per_item_ms)
+    new.qa_executor = new.BatchedQAExecutor(engine, max_batch_size=new.QA_MAX_BATCH_SIZE,
+                                            max_wait_ms=new.QA_MAX_WAIT_MS)
+    new.model_status['phase'] = 'ready'
+    new.model_ready.set()
+
+
+# --------- Stage timing ---------
+class StageTimer:
+    """Wrap app functions to time find_relevant_topics, extract_answer and rendering per request"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.samples = {'find_relevant_topics': [], 'extract_answer': [], 'render': []}
+
+    def _timed(self, stage, function):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                spent = getattr(self._local, 'spent', None)
+                if spent is not None:
+                    spent[stage] += time.perf_counter() - started
+        return wrapper
+
+    def _request(self, function):
+        def wrapper(*args, **kwargs):
+            self._local.spent = {'find_relevant_topics': 0.0, 'extract_answer': 0.0}
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                total = time.perf_counter() - started
+                spent, self._local.spent = self._local.spent, None
+                with self._lock:
+                    for stage, seconds in spent.items():
+                        self.samples[stage].append(seconds * 1000)
+                    self.samples['render'].append((total - sum(spent.values())) * 1000)
+        return wrapper
+
+    def install(self):
+        # Module globals are looked up at call time, so the routes pick these up
+        new.find_relevant_topics = self._timed('find_relevant_topics', new.find_relevant_topics)
+        new.extract_answer = self._timed('extract_answer', new.extract_answer)
+        new.generate_impressive_response = self._request(new.generate_impressive_response)
+
+    def report(self):
+        with self._lock:
+            return {stage: summarize(values) for stage, values in self.samples.items()}
+
+
+# --------- Workload ---------
+def load_trace(path):
+    """Questions from a JSONL trace, one object per line"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get('question') or record.get('title') or record.get('body')
+            if text:
+                questions.append(('trace', text.strip()))
+    return questions
+
+
+def synthetic_workload(count, mix, seed):
+    """A seeded mix of question kinds; topic questions cycle over the knowledge base headings"""
+    rng = random.Random(seed)
+    weights = {}
+    for item in mix.split(','):
+        kind, _, weight = item.partition('=')
+        weights[kind.strip()] = float(weight)
+    headings = [new.KnowledgeBase.short_heading(heading).lower() for heading in new.KNOWLEDGE_BASE.sections]
+    templates = {
+        'greeting': ["hello", "hey there", "greetings!"],
+        'quiz': ["give me a quiz", "quiz me", "I want a challenge"],
+        'help': ["help", "what can you do?"],
+        'learning_path': ["learning path", "show my progress", "what should i learn next"],
+        'topic': ["What is {}?", "Explain {} to me", "Tell me about {}", "How does {} work?"]
+    }
+
+    kinds = list(weights)
+    questions = []
+    for _ in range(count):
+        kind = rng.choices(kinds, weights=[weights[k] for k in kinds])[0]
+        template = rng.choice(templates[kind])
+        questions.append((kind, template.format(rng.choice(headings)) if kind == 'topic' else template))
+    return questions
+
+
+# --------- Drivers ---------
+class ClientDriver:
+    """Flask test client; one client (and so one learner session) per thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def ask(self, question):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = new.app.test_client()
+        response = client.post('/ask', json={'question': question})
+        return response.status_code == 200 and response.get_json().get('success', False)
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    """Keep-alive HTTP connections, one per thread, carrying the session cookie"""
+
+    def __init__(self, url=None):
+        self.server = None
+        if url is None:
+            from werkzeug.serving import make_server
+            self.server = make_server('127.0.0.1', 0, new.app, threaded=True)
+            self.server.log_request = lambda *args, **kwargs: None
+            threading.Thread(target=self.server.serve_forever, name='load-test-server', daemon=True).start()
+            url = f"http://127.0.0.1:{self.server.server_port}"
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def ask(self, question):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self._local.cookie = None
+        headers = {'Content-Type': 'application/json'}
+        if self._local.cookie:
+            headers['Cookie'] = self._local.cookie
+        try:
+            connection.request('POST', '/ask', body=json.dumps({'question': question}), headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            return False
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self._local.cookie = cookie.split(';', 1)[0]
+        if response.getheader('Connection', '').lower() == 'close':
+            connection.close()
+            self._local.connection = None
+        return response.status == 200 and json.loads(body).get('success', False)
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+# --------- Reporting ---------
+def summarize(values):
+    """Latency summary in milliseconds"""
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def percentile(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 3),
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': round(values[-1], 3)
+    }
+
+
+def run_load(driver, questions, concurrency):
+    """Send every question through the driver with a fixed number of concurrent users"""
+    latencies, by_kind, errors = [], {}, 0
+    lock = threading.Lock()
+
+    def send(item):
+        nonlocal errors
+        kind, question = item
+        started = time.perf_counter()
+        ok = driver.ask(question)
+        latency_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(latency_ms)
+            by_kind.setdefault(kind, []).append(latency_ms)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, questions))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(questions),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(questions) / elapsed, 1) if elapsed else 0,
+        'latency_ms': summarize(latencies),
+        'latency_ms_by_kind': {kind: summarize(values) for kind, values in sorted(by_kind.items())}
+    }
+
+
+def compare_to_baseline(report, path):
+    """Print the change against a previous report"""
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n📊 Against {path}")
+    rows = [('requests/s', ['requests_per_second'])] + [
+        (f"{p} ms", ['latency_ms', p]) for p in ('p50', 'p95', 'p99')]
+    for label, keys in rows:
+        old, current = baseline, report
+        for key in keys:
+            old, current = old.get(key, {}), current.get(key, {})
+        if isinstance(old, (int, float)) and isinstance(current, (int, float)) and old:
+            print(f"   {label:<12} {old:>10} → {current:<10} ({(current - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--driver', choices=['client', 'http'], default='client')
+    parser.add_argument('--url', help="target an already running server (http driver, real model)")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--trace', help="JSONL question trace to replay instead of the synthetic mix")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"synthetic mix weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--stub-latency-ms', type=float, default=25.0, help="stub inference time per batch")
+    parser.add_argument('--stub-per-item-ms', type=float, default=2.0, help="extra stub time per batched question")
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--baseline', help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+        questions = [trace[i % len(trace)] for i in range(args.requests)] if trace else []
+    else:
+        questions = synthetic_workload(args.requests, args.mix, args.seed)
+    if not questions:
+        print("❌ No questions to send")
+        return 1
+
+    in_process = args.url is None
+    timer = StageTimer()
+    if in_process:
+        install_stub(args.stub_latency_ms, args.stub_per_item_ms)
+        timer.install()
+    driver = ClientDriver() if args.driver == 'client' else HTTPDriver(args.url)
+
+    print(f"🧪 {len(questions)} requests, {args.concurrency} concurrent users, {args.driver} driver"
+          f"{f', stub inference {args.stub_latency_ms} ms/batch' if in_process else f' against {args.url}'}")
+    try:
+        result = run_load(driver, questions, args.concurrency)
+    finally:
+        driver.close()
+
+    report = {
+        'config': {
+            'driver': args.driver,
+            'url': args.url,
+            'concurrency': args.concurrency,
+            'workload': args.trace or args.mix,
+            'seed': args.seed,
+            'stub_latency_ms': args.stub_latency_ms if in_process else None,
+            'stub_per_item_ms': args.stub_per_item_ms if in_process else None,
+            'max_batch_size': new.QA_MAX_BATCH_SIZE,
+            'max_wait_ms': new.QA_MAX_WAIT_MS
+        },
+        **result,
+        'stages_ms': timer.report() if in_process else None,
+        'inference': new.qa_executor.stats() if in_process else None,
+        'answer_cache': new.answer_cache.stats() if in_process else None
+    }
+
+    latency = report['latency_ms']
+    print(f"\n{'requests/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    print(f"{report['requests_per_second']:>11} {latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8} {report['errors']:>7}")
+    for kind, summary in report['latency_ms_by_kind'].items():
+        print(f"   {kind:<14} n={summary['count']:<6} p50 {summary['p50']} ms, p95 {summary['p95']} ms")
+    if report['stages_ms']:
+        print("Per-request stage time:")
+        for stage, summary in report['stages_ms'].items():
+            if summary['count']:
+                print(f"   {stage:<20} mean {summary['mean']} ms, p95 {summary['p95']} ms")
+
+    if args.baseline:
+        compare_to_baseline(report, args.baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Microbenchmark: topic response rendering with and without the fragment cache.
+
+The baseline renders a topic response the way generate_impressive_response did
+before fragments: rebuild the analogy, example and key point dicts and format
+the whole f-string on every call. The current path joins the pre-rendered
+fragments with the answer card, a motivational fact and the progress tracker.
+Time per render is measured with timeit, allocations with tracemalloc.
+
+Usage (from the repository root):
+    python benchmarks/render_fragments.py
+    python benchmarks/render_fragments.py --iterations 50000 --output render_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MODEL_LOAD_MODE', 'off')
+
+import new
+
+
+def legacy_render(topic, answer, companion):
+    """The pre-fragment topic response, including the per-call dict construction"""
+    analogies = dict(new.TOPIC_ANALOGIES)
+    examples = dict(new.TOPIC_EXAMPLES)
+    points = {name: list(values) for name, values in new.TOPIC_KEY_POINTS.items()}
+    facts = list(new.MOTIVATIONAL_FACTS)
+    return f'''
+    <div class="answer-box">
+        <div class="topic-badge">{topic}</div>
+
+        <div class="info-card">
+            <h3>📚 Here's What You Asked About:</h3>
+            <p>{answer}</p>
+        </div>
+
+        <div class="info-card">
+            <h3>💡 Making It Simple:</h3>
+            <p>{analogies.get(topic, new.DEFAULT_ANALOGY)}</p>
+        </div>
+
+        <div class="key-points-card">
+            <h3>🎯 Key Insights:</h3>
+            {"".join([f'• {point}<br>' for point in points.get(topic, new.DEFAULT_KEY_POINTS)])}
+        </div>
+
+        <div class="example-card">
+            <h3>🌍 Real-World Impact:</h3>
+            <p>{examples.get(topic, new.DEFAULT_EXAMPLES)}</p>
+        </div>
+
+        <div class="fun-fact-card">
+            <h3>🌟 Motivational Moment:</h3>
+            <p>{new.random.choice(facts)}</p>
+        </div>
+
+        {new.create_progress_tracker(companion)}
+
+        <div class="interactive-buttons">
+            <button class="interactive-btn" onclick="askQuestion('quiz')">Test My Knowledge 🎯</button>
+            <button class="interactive-btn" onclick="askQuestion('What is next?')">Continue Learning 📚</button>
+            <button class="interactive-btn" onclick="askQuestion('More about {topic}')">Dive Deeper 🔍</button>
+        </div>
+    </div>
+    '''
+
+
+def fragment_render(topic, answer, companion):
+    return new.render_topic_response(topic, new.KNOWLEDGE_BASE, new.render_answer_card(topic, answer),
+                                     new.create_progress_tracker(companion))
+
+
+def measure(render, topics, answer, companion, iterations):
+    """Mean microseconds and peak traced bytes per render over the topics"""
+    calls = [(topic, answer, companion) for topic in topics]
+
+    def run():
+        for args in calls:
+            render(*args)
+
+    repeats = max(1, iterations // len(calls))
+    seconds = min(timeit.repeat(run, number=repeats, repeat=3))
+
+    tracemalloc.start()
+    peaks = []
+    for args in calls:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        render(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+
+    return {
+        'us_per_render': round(seconds / (repeats * len(calls)) * 1e6, 2),
+        'peak_bytes_per_render': round(sum(peaks) / len(peaks))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args()
+
+    # Routed topic names, which is what the fragments are keyed by
+    topics = [new.KnowledgeBase.short_heading(heading) for heading in new.KNOWLEDGE_BASE.sections]
+    companion = new.LearningCompanion()
+    answer = "Machine Learning is a subset of artificial intelligence that enables computers to learn from data."
+
+    report = {
+        'topics': len(topics),
+        'legacy': measure(legacy_render, topics, answer, companion, args.iterations),
+        'fragments': measure(fragment_render, topics, answer, companion, args.iterations)
+    }
+    legacy, fragments = report['legacy'], report['fragments']
+    report['speedup'] = round(legacy['us_per_render'] / fragments['us_per_render'], 2)
+
+    print(f"🧪 Rendering topic responses over {len(topics)} topics")
+    print(f"{'path':<10} {'µs/render':>10} {'peak bytes':>11}")
+    for name in ('legacy', 'fragments'):
+        print(f"{name:<10} {report[name]['us_per_render']:>10} {report[name]['peak_bytes_per_render']:>11}")
+    print(f"Speedup: {report['speedup']}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,34 +1,1009 @@
-from transformers import AutoModelForQuestionAnswering, AutoTokenizer, pipeline
-from flask import Flask, request, render_template_string, jsonify
+from flask import Flask, Response, request, jsonify, session, stream_with_context
+import asyncio
+import bisect
+import gc
+import gzip
+import hashlib
+import json
+import mmap
 import os
+import pickle
 import re
 import random
+import secrets
+import signal
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
-from datetime import datetime
+import traceback
+import weakref
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import numpy as np
+
+STARTUP_STARTED_AT = time.monotonic()
 
 # --------- Configuration ---------
 MODEL_NAME = "deepset/roberta-base-squad2"
 KNOWLEDGE_BASE_PATH = "knowledge_base.txt"
+TOPIC_ALIASES_PATH = "topic_aliases.txt"  # Optional extra keywords, one 'TOPIC: alias, alias' per line
+# Memory-map the knowledge base instead of reading it into one string: 'on', 'off' or 'auto'
+# (files of at least KNOWLEDGE_BASE_MMAP_MIN_BYTES). Mapped sections are decoded on first use
+# and at most KNOWLEDGE_BASE_MMAP_CACHED_SECTIONS of them stay decoded
+KNOWLEDGE_BASE_MMAP = os.environ.get('KNOWLEDGE_BASE_MMAP', 'auto')
+KNOWLEDGE_BASE_MMAP_MIN_BYTES = int(os.environ.get('KNOWLEDGE_BASE_MMAP_MIN_BYTES', str(64 * 1024 * 1024)))
+KNOWLEDGE_BASE_MMAP_CACHED_SECTIONS = int(os.environ.get('KNOWLEDGE_BASE_MMAP_CACHED_SECTIONS', '4096'))
+
+# BM25 retrieval, used when no topic keyword matches the question
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_MIN_SCORE = float(os.environ.get('BM25_MIN_SCORE', '3.0'))
+# A hit must also match this many distinct question terms (all of them for shorter questions),
+# so one common word like 'good' or 'game' can't route an off-topic question to a section
+BM25_MIN_MATCHED_TERMS = int(os.environ.get('BM25_MIN_MATCHED_TERMS', '2'))
+# Chat lines rather than explanations, never a retrieval answer
+RETRIEVAL_EXCLUDED_CATEGORIES = {'GREETINGS AND BASIC INTERACTIONS'}
+
+# 'background' binds the app immediately and loads the model in a thread,
+# 'eager' loads it before the app starts serving, 'off' leaves loading to the caller (tools)
+MODEL_LOAD_MODE = os.environ.get('MODEL_LOAD_MODE', 'background')
+
+# Inference backend: 'pytorch' (fp32), 'quantized' (dynamic int8 PyTorch) or 'onnx' (ONNX Runtime)
+QA_BACKEND = os.environ.get('QA_BACKEND', 'pytorch')
+# Optional cascade: a small extractive model answers first and questions escalate to
+# MODEL_NAME only when its score is below the threshold, e.g.
+# QA_CASCADE_MODEL=distilbert-base-cased-distilled-squad
+QA_CASCADE_MODEL = os.environ.get('QA_CASCADE_MODEL', '')
+QA_CASCADE_THRESHOLD = float(os.environ.get('QA_CASCADE_THRESHOLD', '0.5'))
+ONNX_EXPORT_DIR = os.environ.get('ONNX_EXPORT_DIR', 'onnx_models')
+
+# QA windowing, matching the transformers question-answering pipeline defaults. Sections are
+# split into windows of QA_MAX_SEQ_LEN minus the question budget, overlapping by QA_DOC_STRIDE.
+QA_MAX_SEQ_LEN = 384
+QA_DOC_STRIDE = 128
+QA_MAX_QUESTION_TOKENS = 64
+QA_MAX_ANSWER_LEN = 200
+# Long sections: windows scored per question (best-matching first), rows per forward
+# pass, and the span score at which a question's remaining windows are skipped (0 disables)
+QA_MAX_WINDOWS_PER_QUESTION = int(os.environ.get('QA_MAX_WINDOWS_PER_QUESTION', '16'))
+QA_MAX_ROWS_PER_PASS = int(os.environ.get('QA_MAX_ROWS_PER_PASS', '32'))
+QA_EARLY_EXIT_SCORE = float(os.environ.get('QA_EARLY_EXIT_SCORE', '0.9'))
+
+# Batching window for concurrent QA requests: a batch is flushed as soon as it
+# holds QA_MAX_BATCH_SIZE questions or its oldest question has waited QA_MAX_WAIT_MS.
+QA_MAX_BATCH_SIZE = int(os.environ.get('QA_MAX_BATCH_SIZE', '8'))
+QA_MAX_WAIT_MS = float(os.environ.get('QA_MAX_WAIT_MS', '10'))
+# Candidate sections per topic question: the best QA_TOP_K_TOPICS routed topics that score at
+# least QA_TOP_K_MIN_RATIO of the winner are searched together and the best span wins
+QA_TOP_K_TOPICS = int(os.environ.get('QA_TOP_K_TOPICS', '3'))
+QA_TOP_K_MIN_RATIO = float(os.environ.get('QA_TOP_K_MIN_RATIO', '0.5'))
+
+# Answer cache limits
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('ANSWER_CACHE_MAX_ENTRIES', '2048'))
+ANSWER_CACHE_MAX_BYTES = int(os.environ.get('ANSWER_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get('ANSWER_CACHE_TTL_SECONDS', '3600'))
+
+# Per-learner progress store: least recently seen learners are evicted past the
+# session cap, and learners idle longer than the timeout are dropped
+COMPANION_MAX_SESSIONS = int(os.environ.get('COMPANION_MAX_SESSIONS', '50000'))
+COMPANION_IDLE_TIMEOUT_SECONDS = float(os.environ.get('COMPANION_IDLE_TIMEOUT_SECONDS', str(2 * 3600)))
+# Pre-fork workers keep progress in one SQLite file they all share (a temporary file if unset)
+COMPANION_STORE_PATH = os.environ.get('COMPANION_STORE_PATH')
+
+# Knowledge base hot reload: poll knowledge_base.txt every N seconds (0 disables);
+# POST /admin/reload needs ADMIN_TOKEN in the X-Admin-Token header, and is disabled while
+# ADMIN_TOKEN is unset (behind a local reverse proxy every client looks local)
+KB_WATCH_INTERVAL_SECONDS = float(os.environ.get('KB_WATCH_INTERVAL_SECONDS', '2'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Answers precompiled offline (python new.py --precompile), served with no inference
+PRECOMPILED_ANSWERS_PATH = os.environ.get('PRECOMPILED_ANSWERS_PATH', 'precompiled_answers.json')
+PRECOMPILED_FORMAT_VERSION = 3
+
+# ASGI serving: threads that wait on QA inference; everything else runs on the event loop
+ASGI_INFERENCE_THREADS = int(os.environ.get('ASGI_INFERENCE_THREADS', '16'))
+ASGI_MAX_BODY_BYTES = 64 * 1024
+
+# /ask/batch: questions per request and request body size
+ASK_BATCH_MAX_QUESTIONS = int(os.environ.get('ASK_BATCH_MAX_QUESTIONS', '256'))
+ASK_BATCH_MAX_BODY_BYTES = 1024 * 1024
+
+# Page assets: the chat page is built once; hashed CSS/JS are cached by browsers for a year
+STATIC_ASSET_MAX_AGE = 365 * 24 * 3600
+ASSET_MIN_COMPRESS_BYTES = 512
+
+# Pre-fork server (--workers N): workers share the master's model pages copy-on-write
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', '1'))
+WORKER_HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get('WORKER_HEARTBEAT_TIMEOUT_SECONDS', '30'))
+WORKER_MIN_UPTIME_SECONDS = 5.0  # workers dying sooner than this are restarted with a backoff
+
+# --------- QA Engine ---------
+class ContextEncoding:
+    """A section tokenized once: token ids, word-aligned character spans and overflow windows"""
+    __slots__ = ('input_ids', 'char_starts', 'char_ends', 'windows')
+
+    def __init__(self, input_ids, char_starts, char_ends, windows):
+        self.input_ids = input_ids
+        self.char_starts = char_starts
+        self.char_ends = char_ends
+        self.windows = windows
+
+class QAEngine:
+    """Extractive QA over pre-tokenized knowledge base sections.
+
+    Scores spans the way the transformers question-answering pipeline does (per-window
+    softmax, CLS as the null answer, spans aligned to whole words, duplicate answers
+    merged), so answers and scores match it, but only the question is tokenized per request.
+
+    Sections longer than one window are split into overlapping windows at index time.
+    A question's windows are ranked by overlap with the question, capped at max_windows,
+    and scored in forward passes of at most max_rows_per_pass rows, best windows first;
+    once a span reaches early_exit_score the question's remaining windows are skipped.
+    Single-window sections behave exactly like the pipeline.
+    """
+
+    # Candidates kept per window before word alignment merges duplicates, as in the pipeline
+    CANDIDATES_PER_WINDOW = 12
+
+    def __init__(self, tokenizer, model, name, max_seq_len=QA_MAX_SEQ_LEN, doc_stride=QA_DOC_STRIDE,
+                 max_question_tokens=QA_MAX_QUESTION_TOKENS, max_answer_len=QA_MAX_ANSWER_LEN,
+                 handle_impossible_answer=True, max_windows=QA_MAX_WINDOWS_PER_QUESTION,
+                 max_rows_per_pass=QA_MAX_ROWS_PER_PASS, early_exit_score=QA_EARLY_EXIT_SCORE):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.name = name
+        self.max_question_tokens = max_question_tokens
+        self.max_answer_len = max_answer_len
+        self.handle_impossible_answer = handle_impossible_answer
+        self.max_windows = max(1, max_windows)
+        self.max_rows_per_pass = max(1, max_rows_per_pass)
+        self.early_exit_score = early_exit_score
+        self.window_stats = {'questions': 0, 'forward_passes': 0, 'windows_scored': 0,
+                             'windows_skipped_early_exit': 0, 'windows_over_cap': 0, 'early_exits': 0}
+        max_seq_len = min(max_seq_len, tokenizer.model_max_length)
+        self.window_tokens = max_seq_len - max_question_tokens - tokenizer.num_special_tokens_to_add(pair=True)
+        self.window_step = max(1, self.window_tokens - min(doc_stride, max_seq_len // 2))
+        self._uses_token_types = 'token_type_ids' in tokenizer.model_input_names
+        # Special tokens ahead of the context in a pair, e.g. 3 for '<s> q </s></s> c </s>'
+        self._context_prefix = tokenizer.build_inputs_with_special_tokens([-1], [-2]).index(-2) - 1
+
+    def encode_context(self, text):
+        """Tokenize a section once and split it into overlapping windows"""
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        word_ids = encoding.word_ids()
+        word_spans = {}
+        char_starts, char_ends = [], []
+        for token_index, (char_start, char_end) in enumerate(encoding['offset_mapping']):
+            word = word_ids[token_index]
+            if word is not None:
+                if word not in word_spans:
+                    word_spans[word] = tuple(encoding.word_to_chars(word))
+                char_start, char_end = word_spans[word]
+            char_starts.append(char_start)
+            char_ends.append(char_end)
+        
+        input_ids = encoding['input_ids']
+        windows = []
+        window_start = 0
+        while True:
+            window_end = min(window_start + self.window_tokens, len(input_ids))
+            windows.append((window_start, window_end))
+            if window_end >= len(input_ids):
+                break
+            window_start += self.window_step
+        return ContextEncoding(input_ids, char_starts, char_ends, windows)
+
+    def section_encoding(self, section):
+        """The section's cached encoding for this engine's tokenizer"""
+        encoding = section.encodings.get(self.name)
+        if encoding is None:
+            encoding = section.encodings[self.name] = self.encode_context(section.text)
+        return encoding
+
+    def encode_knowledge_base(self, knowledge_base):
+        """Tokenize every section not encoded yet; returns window counts for reporting"""
+        if knowledge_base.lazy:
+            # Memory-mapped corpora are tokenized section by section on first use
+            return {'sections': len(knowledge_base), 'lazy': True}
+        window_counts = [len(self.section_encoding(section).windows) for section in knowledge_base.sections.values()]
+        return {
+            'sections': len(window_counts),
+            'windows': sum(window_counts),
+            'multi_window_sections': sum(1 for count in window_counts if count > 1),
+            'max_windows_per_section': max(window_counts, default=0)
+        }
+
+    def _forward(self, rows):
+        """Run one padded forward pass over (input_ids, token_type_ids) rows"""
+        import torch
+        width = max(len(input_ids) for input_ids, _ in rows)
+        input_ids = torch.full((len(rows), width), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        token_type_ids = torch.zeros((len(rows), width), dtype=torch.long)
+        for row, (ids, token_types) in enumerate(rows):
+            input_ids[row, :len(ids)] = torch.tensor(ids)
+            attention_mask[row, :len(ids)] = 1
+            if token_types is not None:
+                token_type_ids[row, :len(ids)] = torch.tensor(token_types)
+        
+        inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if self._uses_token_types:
+            inputs['token_type_ids'] = token_type_ids
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+        return (np.asarray(outputs.start_logits.detach().float().cpu()),
+                np.asarray(outputs.end_logits.detach().float().cpu()))
+
+    def _rank_windows(self, q_ids, encoding):
+        """Windows to score for a question, most question tokens first, capped at max_windows"""
+        windows = encoding.windows
+        if len(windows) == 1:
+            return list(windows)
+        question_tokens = set(q_ids)
+        overlap = [sum(1 for token in encoding.input_ids[start:end] if token in question_tokens)
+                   for start, end in windows]
+        ranked = sorted(range(len(windows)), key=lambda index: -overlap[index])
+        self.window_stats['windows_over_cap'] += max(0, len(windows) - self.max_windows)
+        return [windows[index] for index in ranked[:self.max_windows]]
+
+    def answer_batch(self, questions, sections):
+        """Answer each question against its section, batching windows of all questions together"""
+        question_ids = self.tokenizer(list(questions), add_special_tokens=False)['input_ids']
+        
+        plans = []
+        for q_ids, section in zip(question_ids, sections):
+            q_ids = q_ids[:self.max_question_tokens]
+            encoding = self.section_encoding(section)
+            plans.append((q_ids, section.text, encoding, deque(self._rank_windows(q_ids, encoding))))
+        candidates = [[] for _ in questions]
+        null_scores = [1000000.0] * len(questions)
+        self.window_stats['questions'] += len(questions)
+        
+        first_pass = True
+        while True:
+            # Round-robin over questions, best windows first. With early exit on, the first
+            # pass holds only each question's best window so a confident answer ends it there
+            rows, row_info = [], []
+            added = True
+            while added and len(rows) < self.max_rows_per_pass:
+                if first_pass and self.early_exit_score > 0 and row_info:
+                    break
+                added = False
+                for item, (q_ids, text, encoding, pending) in enumerate(plans):
+                    if pending and len(rows) < self.max_rows_per_pass:
+                        window_start, window_end = pending.popleft()
+                        context_ids = encoding.input_ids[window_start:window_end]
+                        input_ids = self.tokenizer.build_inputs_with_special_tokens(q_ids, context_ids)
+                        token_types = (self.tokenizer.create_token_type_ids_from_sequences(q_ids, context_ids)
+                                       if self._uses_token_types else None)
+                        rows.append((input_ids, token_types))
+                        row_info.append((item, text, encoding, window_start, window_end,
+                                         len(q_ids) + self._context_prefix))
+                        added = True
+            if not rows:
+                break
+            first_pass = False
+            
+            self._score_rows(rows, row_info, self._forward(rows), candidates, null_scores)
+            self.window_stats['forward_passes'] += 1
+            self.window_stats['windows_scored'] += len(rows)
+            if self.early_exit_score > 0:
+                for item, (_, _, _, pending) in enumerate(plans):
+                    if pending and any(answer['score'] >= self.early_exit_score for answer in candidates[item]):
+                        self.window_stats['windows_skipped_early_exit'] += len(pending)
+                        self.window_stats['early_exits'] += 1
+                        pending.clear()
+        
+        results = []
+        for item, answers in enumerate(candidates):
+            if self.handle_impossible_answer:
+                answers.append({'score': null_scores[item], 'start': 0, 'end': 0, 'answer': ''})
+            results.append(max(answers, key=lambda answer: answer['score']))
+        return results
+
+    def _score_rows(self, rows, row_info, logits, candidates, null_scores):
+        """Collect word-aligned candidate spans and null scores from one forward pass"""
+        start_logits, end_logits = logits
+        for row, (item, text, encoding, window_start, window_end, context_start) in enumerate(row_info):
+            length = len(rows[row][0])
+            context_end = context_start + window_end - window_start
+            allowed = np.zeros(length, dtype=bool)
+            allowed[context_start:context_end] = True
+            if self.tokenizer.cls_token_id is not None:
+                allowed |= np.asarray(rows[row][0]) == self.tokenizer.cls_token_id
+            
+            start = np.where(allowed, start_logits[row, :length], -10000.0)
+            end = np.where(allowed, end_logits[row, :length], -10000.0)
+            start = np.exp(start - start.max())
+            start /= start.sum()
+            end = np.exp(end - end.max())
+            end /= end.sum()
+            if self.handle_impossible_answer:
+                null_scores[item] = min(null_scores[item], float(start[0] * end[0]))
+            start[0] = end[0] = 0.0
+            
+            spans = np.tril(np.triu(np.outer(start, end)), self.max_answer_len - 1)
+            flat = spans.ravel()
+            if len(flat) <= self.CANDIDATES_PER_WINDOW:
+                order = np.argsort(-flat)
+            else:
+                top = np.argpartition(-flat, self.CANDIDATES_PER_WINDOW)[:self.CANDIDATES_PER_WINDOW]
+                order = top[np.argsort(-flat[top])]
+            
+            for s, e in zip(*np.unravel_index(order, spans.shape)):
+                if not (allowed[s] and allowed[e]):
+                    continue
+                # Tokens outside the context (CLS) map to an empty span
+                in_context = context_start <= s < context_end and context_start <= e < context_end
+                char_start = encoding.char_starts[window_start + s - context_start] if in_context else 0
+                char_end = encoding.char_ends[window_start + e - context_start] if in_context else 0
+                answer = text[char_start:char_end]
+                for existing in candidates[item]:
+                    if existing['answer'].lower() == answer.lower():
+                        existing['score'] += float(spans[s, e])
+                        break
+                else:
+                    candidates[item].append({'score': float(spans[s, e]), 'start': char_start,
+                                             'end': char_end, 'answer': answer})
+
+# --------- Fork Safety ---------
+# Objects whose threads, locks or connections must not cross a fork (pre-fork workers)
+# register here; the child resets them right after fork, before any of its threads run.
+_fork_sensitive = weakref.WeakSet()
+
+def _reset_after_fork():
+    for resource in list(_fork_sensitive):
+        resource._after_fork()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+# --------- Batched Inference ---------
+class PendingQuestion:
+    """A question waiting in the batching queue"""
+    __slots__ = ('question', 'section', 'future', 'enqueued_at')
+
+    def __init__(self, question, section):
+        self.question = question
+        self.section = section
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+class BatchedQAExecutor:
+    """Own the QA engine and run concurrent questions as batched forward passes"""
+
+    def __init__(self, engine, max_batch_size=8, max_wait_ms=10):
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        _fork_sensitive.add(self)
+        # Tuning statistics
+        self._batch_sizes = {}
+        self._wait_times_ms = deque(maxlen=1000)
+        self._batches_run = 0
+        self._questions_answered = 0
+        self._inference_ms_total = 0.0
+
+    def submit(self, question, section):
+        """Queue a question and return a Future resolving to {'answer', 'score', 'start', 'end'}"""
+        return self.submit_many(question, [section])[0]
+
+    def submit_many(self, question, sections):
+        """Queue one question against several sections at once, so they land in the same batch"""
+        items = [PendingQuestion(question, section) for section in sections]
+        with self._condition:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='qa-batcher', daemon=True)
+                self._worker.start()
+            self._pending.extend(items)
+            self._condition.notify()
+        return [item.future for item in items]
+
+    def _after_fork(self):
+        # The batching thread stayed in the parent, possibly holding the lock mid-batch
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def answer(self, question, section, timeout=None):
+        """Answer one question, blocking until its batch has been processed"""
+        return self.submit(question, section).result(timeout)
+
+    def answer_many(self, question, sections, timeout=None):
+        """Answer one question against each section; results come back in section order"""
+        return [future.result(timeout) for future in self.submit_many(question, sections)]
+
+    def _next_batch(self):
+        """Wait for the batching window to close and take the batch out of the queue"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            size = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.monotonic()
+            try:
+                results = self.engine.answer_batch(
+                    [item.question for item in batch],
+                    [item.section for item in batch]
+                )
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            finished = time.monotonic()
+
+            with self._condition:
+                self._batches_run += 1
+                self._questions_answered += len(batch)
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._inference_ms_total += (finished - started) * 1000
+                for item in batch:
+                    self._wait_times_ms.append((started - item.enqueued_at) * 1000)
+
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
+
+    def stats(self):
+        """Queue depth, batch size histogram and wait times for tuning the window"""
+        with self._condition:
+            waits = sorted(self._wait_times_ms)
+            batches = self._batches_run
+            return {
+                'queue_depth': len(self._pending),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches_run': batches,
+                'questions_answered': self._questions_answered,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'avg_batch_size': round(self._questions_answered / batches, 2) if batches else 0,
+                'avg_inference_ms': round(self._inference_ms_total / batches, 2) if batches else 0,
+                'windows': dict(getattr(self.engine, 'window_stats', {})),
+                'wait_ms': {
+                    'p50': round(waits[len(waits) // 2], 2) if waits else 0,
+                    'p95': round(waits[int(len(waits) * 0.95)], 2) if waits else 0,
+                    'max': round(waits[-1], 2) if waits else 0
+                }
+            }
 
 # --------- Model Loading ---------
-print("Loading AI model...")
-try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForQuestionAnswering.from_pretrained(MODEL_NAME)
-    qa_pipeline = pipeline("question-answering", model=model, tokenizer=tokenizer)
-    print("✅ AI model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    exit(1)
+# The app serves knowledge base fallback answers until the model is warm
+qa_executor = None
+cascade_executor = None  # Small first-tier model when QA_CASCADE_MODEL is set
+model_ready = threading.Event()
+model_status = {'phase': 'not_started', 'error': None, 'timings_ms': {}, 'contexts': None}
+
+def _record_phase(phase, started):
+    model_status['timings_ms'][phase] = round((time.monotonic() - started) * 1000, 1)
+
+def warm_up_model(executor, knowledge_base):
+    """Run inferences over short, median and long sections so first requests don't pay for it"""
+    headings = sorted(knowledge_base.sections, key=knowledge_base.section_length)
+    if not headings:
+        return
+    samples = {knowledge_base.sections[heading] for heading in (headings[0], headings[len(headings) // 2], headings[-1])}
+    for section in samples:
+        executor.answer(f"What is {section.heading.lower()}?", section)
+
+def load_qa_model(backend=QA_BACKEND, model_name=MODEL_NAME):
+    """Load the extractive QA model for an inference backend"""
+    if backend == 'onnx':
+        try:
+            from optimum.onnxruntime import ORTModelForQuestionAnswering
+        except ImportError:
+            raise RuntimeError("QA_BACKEND=onnx requires 'optimum[onnxruntime]' to be installed")
+        # Export once, then reuse the saved graph on later starts
+        export_path = os.path.join(ONNX_EXPORT_DIR, model_name.replace('/', '--'))
+        if os.path.isdir(export_path):
+            return ORTModelForQuestionAnswering.from_pretrained(export_path)
+        model = ORTModelForQuestionAnswering.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_path)
+        print(f"📦 Exported ONNX model to {export_path}")
+        return model
+    
+    from transformers import AutoModelForQuestionAnswering
+    model = AutoModelForQuestionAnswering.from_pretrained(model_name)
+    if backend == 'quantized':
+        import torch
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != 'pytorch':
+        raise ValueError(f"Unknown QA_BACKEND '{backend}' (expected pytorch, quantized or onnx)")
+    model.eval()
+    return model
+
+def create_qa_pipeline(backend=QA_BACKEND, model_name=MODEL_NAME):
+    """Build a transformers question-answering pipeline (reference for parity checks)"""
+    from transformers import AutoTokenizer, pipeline
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = load_qa_model(backend, model_name)
+    return pipeline("question-answering", model=model, tokenizer=tokenizer)
+
+def create_qa_engine(backend=QA_BACKEND, model_name=MODEL_NAME):
+    """Build a QAEngine; every backend returns the same {'answer', 'score'} results"""
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = load_qa_model(backend, model_name)
+    return QAEngine(tokenizer, model, name=model_name)
+
+def load_model(knowledge_base=None):
+    """Load tokenizer and model, then warm up; runs in a background thread by default"""
+    global qa_executor, cascade_executor
+    print("Loading AI model...")
+    try:
+        started = time.monotonic()
+        model_status['phase'] = 'importing'
+        import transformers  # Import cost is reported separately from model loading
+        _record_phase('importing', started)
+        
+        started = time.monotonic()
+        model_status['phase'] = 'loading_model'
+        engine = create_qa_engine(QA_BACKEND)
+        _record_phase('loading_model', started)
+        
+        executor = BatchedQAExecutor(engine, max_batch_size=QA_MAX_BATCH_SIZE, max_wait_ms=QA_MAX_WAIT_MS)
+        cascade = None
+        if QA_CASCADE_MODEL:
+            started = time.monotonic()
+            model_status['phase'] = 'loading_cascade_model'
+            try:
+                cascade = BatchedQAExecutor(create_qa_engine(QA_BACKEND, QA_CASCADE_MODEL),
+                                            max_batch_size=QA_MAX_BATCH_SIZE, max_wait_ms=QA_MAX_WAIT_MS)
+            except Exception as e:
+                print(f"⚠️ Cascade model {QA_CASCADE_MODEL} failed to load, answering with {MODEL_NAME} only: {e}")
+            _record_phase('loading_cascade_model', started)
+        
+        if knowledge_base is not None:
+            started = time.monotonic()
+            model_status['phase'] = 'encoding_contexts'
+            model_status['contexts'] = engine.encode_knowledge_base(knowledge_base)
+            if cascade is not None:
+                cascade.engine.encode_knowledge_base(knowledge_base)
+            _record_phase('encoding_contexts', started)
+            
+            started = time.monotonic()
+            model_status['phase'] = 'warming_up'
+            warm_up_model(executor, knowledge_base)
+            if cascade is not None:
+                warm_up_model(cascade, knowledge_base)
+            _record_phase('warming_up', started)
+        
+        cascade_executor = cascade
+        qa_executor = executor
+        model_status['phase'] = 'ready'
+        model_status['timings_ms']['total_since_start'] = round((time.monotonic() - STARTUP_STARTED_AT) * 1000, 1)
+        model_ready.set()
+        print(f"✅ AI model loaded successfully! Startup timings (ms): {model_status['timings_ms']}")
+    except Exception as e:
+        model_status['phase'] = 'failed'
+        model_status['error'] = str(e)
+        print(f"❌ Error loading model: {e}")
+        print("⚠️ Serving knowledge base answers without the QA model")
+
+def wait_for_model(knowledge_base):
+    """Block until model loading has finished, loading it here if it was not started; True when ready"""
+    while model_status['phase'] not in ('ready', 'failed'):
+        if model_status['phase'] == 'not_started':
+            load_model(knowledge_base)
+        else:
+            model_ready.wait(0.5)
+    return model_ready.is_set()
+
+def start_model_loading(knowledge_base):
+    """Load the model according to MODEL_LOAD_MODE"""
+    if MODEL_LOAD_MODE == 'off':
+        return
+    if MODEL_LOAD_MODE == 'eager':
+        load_model(knowledge_base)
+    else:
+        threading.Thread(target=load_model, args=(knowledge_base,), name='model-loader', daemon=True).start()
+
+# --------- Answer Cache ---------
+def normalize_question(question):
+    """Fold case, punctuation and whitespace so equivalent questions share a cache key"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', question.lower()).split())
+
+class AnswerCache:
+    """Bounded, TTL-aware LRU cache of extracted answers"""
+
+    def __init__(self, max_entries=2048, max_bytes=8 * 1024 * 1024, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _estimate_size(key, value):
+        """Approximate memory held by one entry"""
+        return (sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+                + sys.getsizeof(value) + sum(sys.getsizeof(part) for part in value))
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries past the limits"""
+        size = self._estimate_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+            }
+
+answer_cache = AnswerCache(
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    max_bytes=ANSWER_CACHE_MAX_BYTES,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS
+)
+
+class SingleFlight:
+    """Run one computation per key at a time; callers arriving while it runs share its result"""
+
+    def __init__(self):
+        self._calls = {}  # key -> Future of the running computation
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """Return (result, shared): shared is True when another caller's computation was reused"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.computations += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), True
+        
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        future.set_result(result)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            calls = self.computations + self.coalesced
+            return {
+                'in_flight': len(self._calls),
+                'computations': self.computations,
+                'coalesced': self.coalesced,
+                'coalescing_ratio': round(self.coalesced / calls, 3) if calls else 0
+            }
+
+# Identical questions in flight at once (a class clicking the same button) share one inference
+answer_flights = SingleFlight()
+
+# --------- Precompiled Answers ---------
+# Questions known in advance (UI buttons, "What is X?" per heading, learning path
+# suggestions) are answered offline in batches and written to a versioned artifact
+# tied to the knowledge base version, model and backend. Each entry also records
+# the topics the question routed to and the hashes of their sections, so after a
+# knowledge base edit only entries whose routing or sections changed go stale.
+def section_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+ASK_BUTTON_PATTERN = re.compile(r"askQuestion\('([^'{}]+)'\)")
+
+def button_questions(html):
+    """Questions the askQuestion() buttons in a piece of HTML send"""
+    return ASK_BUTTON_PATTERN.findall(html)
+
+def canonical_questions(knowledge_base):
+    """Every fixed question the UI can send: the page's and response cards' buttons, learning
+    path suggestions, and per topic "What is X?" plus its card's buttons. Only the ones that
+    classify as topic questions get precompiled; commands like 'Take a quiz' are skipped."""
+    questions = []
+    for html in (HTML_TEMPLATE, GREETING_BUTTONS_HTML, UNRELATED_HTML, ASK_ERROR_HTML):
+        questions += button_questions(html)
+    for suggestions in LEARNING_PATH_SUGGESTIONS.values():
+        questions += suggestions
+    for heading in knowledge_base.sections:
+        topic = KnowledgeBase.short_heading(heading)
+        questions.append(f"What is {topic.lower()}?")
+        questions += button_questions(TOPIC_BUTTONS_HTML.format(topic=topic))
+    return list(dict.fromkeys(questions))
+
+def precompile_answers(knowledge_base, engine, path=PRECOMPILED_ANSWERS_PATH, batch_size=32):
+    """Answer every canonical topic question with the QA model and write the artifact"""
+    pending = []
+    for question in canonical_questions(knowledge_base):
+        kind, topic, _, candidates = classify_question(question, knowledge_base)
+        sections = candidate_sections(candidates, knowledge_base) if kind == 'topic' else []
+        if sections:
+            pending.append((question, topic, candidates, sections))
+    
+    # One row per (question, candidate section), answered in fixed-size batches
+    rows = [(question, section) for question, _, _, sections in pending for _, section in sections]
+    results = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        results += engine.answer_batch([question for question, _ in batch], [section for _, section in batch])
+    
+    entries = []
+    offset = 0
+    for question, topic, candidates, sections in pending:
+        best = best_section_answer(sections, results[offset:offset + len(sections)])
+        offset += len(sections)
+        # Same confidence gate as live answers
+        if best and best[1] > 0.1:
+            answer, score, source_topic = best
+            source = 'model'
+        else:
+            source_topic, section = sections[0]
+            answer, score, source = section.fallback_answer, section.fallback_score, 'fallback'
+        if answer:
+            entries.append({'question': question, 'topic': topic, 'source_topic': source_topic,
+                            'candidates': list(candidates),
+                            'section_hashes': {name: section.content_hash for name, section in sections},
+                            'answer': answer, 'score': score, 'source': source})
+    
+    artifact = {
+        'format_version': PRECOMPILED_FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'model': MODEL_NAME,
+        'backend': QA_BACKEND,
+        'knowledge_base_version': knowledge_base.version,
+        'entries': entries
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return artifact
+
+PRECOMPILED_ENTRY_FIELDS = {'question': str, 'topic': str, 'source_topic': str, 'candidates': list,
+                            'section_hashes': dict, 'answer': str, 'score': (int, float), 'source': str}
+
+def precompiled_entry_error(entry):
+    """Why an artifact entry can't be served, or None when it is well-formed"""
+    if not isinstance(entry, dict):
+        return "not an object"
+    for field, types in PRECOMPILED_ENTRY_FIELDS.items():
+        if not isinstance(entry.get(field), types):
+            return f"missing or invalid '{field}'"
+    if not all(isinstance(name, str) for name in entry['candidates']):
+        return "invalid 'candidates'"
+    if not all(isinstance(value, str) for value in entry['section_hashes'].values()):
+        return "invalid 'section_hashes'"
+    return None
+
+def load_precompiled_answers(knowledge_base, path=PRECOMPILED_ANSWERS_PATH):
+    """{(normalized question, topic): (answer, score, source topic, is fallback)} from a current
+    artifact; entries whose routing or candidate sections changed are dropped, malformed ones skipped"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            artifact = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring precompiled answers in {path}: {e}")
+        return {}
+    if not isinstance(artifact, dict) or not isinstance(artifact.get('entries'), list):
+        print(f"⚠️ Ignoring precompiled answers in {path}: not a precompiled answers artifact")
+        return {}
+    if (artifact.get('format_version') != PRECOMPILED_FORMAT_VERSION or artifact.get('model') != MODEL_NAME
+            or artifact.get('backend') != QA_BACKEND):
+        print(f"⚠️ Ignoring precompiled answers in {path}: built for another model, backend or format")
+        return {}
+    
+    answers, stale = {}, 0
+    current = artifact.get('knowledge_base_version') == knowledge_base.version
+    for number, entry in enumerate(artifact['entries']):
+        error = precompiled_entry_error(entry)
+        if error:
+            print(f"⚠️ Skipping precompiled answer {number} in {path}: {error}")
+            continue
+        sections = {name: knowledge_base.section(name) for name in entry['section_hashes']}
+        if any(section is None or (not current and entry['section_hashes'][name] != section.content_hash)
+               for name, section in sections.items()):
+            stale += 1
+            continue
+        # New or renamed headings (and alias edits) can route the question to other topics
+        kind, topic, _, candidates = _classify_question(entry['question'], knowledge_base)
+        if kind != 'topic' or topic != entry['topic'] or candidates != tuple(entry['candidates']):
+            stale += 1
+            continue
+        answers[(normalize_question(entry['question']), entry['topic'])] = (
+            entry['answer'], entry['score'], entry['source_topic'], entry['source'] == 'fallback')
+    print(f"✅ Loaded {len(answers)} precompiled answers" + (f" ({stale} stale entries ignored)" if stale else ""))
+    return answers
+
+# --------- Metrics ---------
+# Prometheus text exposition without a client library: a counter increment or a
+# histogram observation is one dict lookup under a per-metric lock
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+METRICS = []
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+class MetricCounter:
+    """Monotonic counter, one series per label combination"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in series]
+        return lines
+
+class MetricHistogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ('le',)
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+ASK_REQUESTS = MetricCounter('ask_requests_total', "Questions answered, by command type and topic", ('kind', 'topic'))
+ASK_ERRORS = MetricCounter('ask_errors_total', "Questions that failed with an exception", ('endpoint',))
+ROUTING_SECONDS = MetricHistogram('ask_routing_seconds', "Time to classify and route a question", ('kind', 'topic'))
+INFERENCE_SECONDS = MetricHistogram('ask_inference_seconds', "Time in extract_answer, by answer source",
+                                    ('topic', 'source'))
+ANSWER_SOURCES = MetricCounter('ask_answers_total',
+                               "Extracted answers by source (precompiled, cascade, model, cache, fallback or none)", ('topic', 'source'))
+CASCADE_DECISIONS = MetricCounter('ask_cascade_total',
+                                  "Cascade outcomes: accepted from the small model or escalated", ('outcome',))
+RENDER_SECONDS = MetricHistogram('ask_render_seconds', "Time to render the response HTML, excluding inference",
+                                 ('kind', 'topic'))
+RESPONSE_BYTES = MetricHistogram('ask_response_bytes', "Size of the response HTML in bytes", ('kind',),
+                                 buckets=SIZE_BUCKETS)
+
+# Inference time of the request being handled on this thread, so rendering can exclude it
+_request_timings = threading.local()
+
+def render_metrics():
+    """All metrics, plus gauges read at scrape time, in Prometheus text format"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    inference = qa_executor.stats() if qa_executor is not None else {}
+    sessions = companion_store.stats()
+    cache = answer_cache.stats()
+    flights = answer_flights.stats()
+    gauges = [
+        ('model_ready', "1 when the QA model is loaded and warm", int(model_ready.is_set())),
+        ('qa_queue_depth', "Questions waiting for a batched forward pass", inference.get('queue_depth', 0)),
+        ('qa_batches_total', "Batched forward passes run", inference.get('batches_run', 0)),
+        ('answer_cache_entries', "Entries in the answer cache", cache['entries']),
+        ('answer_cache_hits_total', "Answer cache hits", cache['hits']),
+        ('answer_cache_misses_total', "Answer cache misses", cache['misses']),
+        ('answer_singleflight_computations_total', "Uncached answers computed", flights['computations']),
+        ('answer_singleflight_coalesced_total', "Uncached answers shared from an identical in-flight question",
+         flights['coalesced']),
+        ('answer_singleflight_coalescing_ratio', "Share of uncached answers served by coalescing",
+         flights['coalescing_ratio']),
+        ('companion_sessions', "Learner sessions held in memory", sessions['active_sessions'])
+    ]
+    for name, help_text, value in gauges:
+        kind = 'counter' if name.endswith('_total') else 'gauge'
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return '\n'.join(lines) + '\n'
 
 # --------- Flask App ---------
 app = Flask(__name__)
 app.secret_key = 'ai_tutor_secret_key'
 
-# Interactive conversation memory
-conversation_history = []
-user_interests = set()
-
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
 <html>
@@ -533,6 +1508,7 @@ HTML_TEMPLATE = '''
                 if (messageCount > 10) userLevel = 'intermediate';
                 if (messageCount > 25) userLevel = 'advanced';
             }
+            return messageContent;
         }
         
         function showTyping() {
@@ -575,6 +1551,11 @@ HTML_TEMPLATE = '''
             
             showTyping();
             
+            if (window.EventSource) {
+                streamAnswer(message);
+                return;
+            }
+            
             fetch('/ask', {
                 method: 'POST',
                 headers: {
@@ -605,6 +1586,42 @@ HTML_TEMPLATE = '''
             });
         }
         
+        // Cards that need no model render right away; the answer and progress fill their slots
+        function streamAnswer(message) {
+            const params = new URLSearchParams({
+                question: message,
+                message_count: messageCount,
+                user_level: userLevel
+            });
+            const source = new EventSource('/ask/stream?' + params.toString());
+            let content = null;
+            
+            source.addEventListener('message', event => {
+                hideTyping();
+                content = addMessage(JSON.parse(event.data).html, false);
+            });
+            
+            const fillSlot = slotName => event => {
+                const slot = content && content.querySelector(`[data-slot="${slotName}"]`);
+                if (slot) {
+                    slot.outerHTML = JSON.parse(event.data).html;
+                    const chatMessages = document.getElementById('chatMessages');
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                }
+            };
+            source.addEventListener('answer', fillSlot('answer'));
+            source.addEventListener('progress', fillSlot('progress'));
+            source.addEventListener('done', () => source.close());
+            
+            source.onerror = () => {
+                source.close();
+                if (!content) {
+                    hideTyping();
+                    addMessage('Sorry, I encountered an error. Please try again.', false);
+                }
+            };
+        }
+        
         function askQuestion(question) {
             document.getElementById('messageInput').value = question;
             sendMessage();
@@ -667,6 +1684,91 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# --------- Page Assets ---------
+# The page is rendered once at startup: the inline CSS and JS move to content-hashed
+# /assets/ files, and every asset keeps precomputed gzip (and brotli, when the
+# optional 'brotli' package is installed) variants with a strong ETag each.
+class StaticAsset:
+    """One response body, its compressed variants and caching headers"""
+    __slots__ = ('body', 'content_type', 'cache_control', 'digest', 'variants')
+
+    def __init__(self, body, content_type, cache_control):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {'identity': body}
+        if len(body) >= ASSET_MIN_COMPRESS_BYTES:
+            compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+            try:
+                import brotli
+                compressed['br'] = brotli.compress(body, quality=11)
+            except ImportError:
+                pass
+            for encoding, data in compressed.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = data
+
+    def etag(self, encoding):
+        """Strong validator; each encoding is a different representation"""
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def negotiate(self, accept_encoding):
+        """Pick the smallest variant the client accepts"""
+        accepted = {'identity'}
+        for item in (accept_encoding or '').split(','):
+            name, _, params = item.strip().partition(';')
+            name = name.strip().lower()
+            quality = params.strip()
+            if quality.startswith('q='):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            if name == '*':
+                accepted.update(self.variants)
+            elif name:
+                accepted.add(name)
+        return min((encoding for encoding in self.variants if encoding in accepted),
+                   key=lambda encoding: len(self.variants[encoding]))
+
+    def respond(self, accept_encoding, if_none_match):
+        """Return (status, body, headers) for a GET of this asset"""
+        encoding = self.negotiate(accept_encoding)
+        etag = self.etag(encoding)
+        headers = [('ETag', etag), ('Cache-Control', self.cache_control), ('Vary', 'Accept-Encoding')]
+        if if_none_match and (if_none_match.strip() == '*' or etag in
+                              [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]):
+            return 304, b'', headers
+        headers.append(('Content-Type', self.content_type))
+        if encoding != 'identity':
+            headers.append(('Content-Encoding', encoding))
+        return 200, self.variants[encoding], headers
+
+def build_page_assets(template):
+    """Render the chat page once and split its CSS and JS into content-hashed assets"""
+    html = app.jinja_env.from_string(template).render()
+    immutable = f'public, max-age={STATIC_ASSET_MAX_AGE}, immutable'
+    assets = {}
+    
+    def extract(tag, extension, content_type, reference):
+        nonlocal html
+        start = html.index(f'<{tag}>')
+        end = html.index(f'</{tag}>') + len(f'</{tag}>')
+        asset = StaticAsset(html[start + len(tag) + 2:end - len(tag) - 3].strip().encode('utf-8'), content_type, immutable)
+        path = f'/assets/app.{asset.digest[:12]}.{extension}'
+        assets[path] = asset
+        html = html[:start] + reference.format(path=path) + html[end:]
+    
+    extract('style', 'css', 'text/css; charset=utf-8', '<link rel="stylesheet" href="{path}">')
+    extract('script', 'js', 'application/javascript; charset=utf-8', '<script src="{path}"></script>')
+    # The page itself must be revalidated so new asset hashes are picked up
+    assets['/'] = StaticAsset(html.encode('utf-8'), 'text/html; charset=utf-8', 'no-cache')
+    return assets
+
+PAGE_ASSETS = build_page_assets(HTML_TEMPLATE)
+
 # --------- Knowledge Base Management ---------
 def create_default_knowledge_base():
     """Create a comprehensive knowledge base about AI/ML"""
@@ -725,49 +1827,609 @@ Explainable AI refers to methods and techniques that make the decisions and acti
         print(f"❌ Error creating knowledge base: {e}")
         return ""
 
-def load_knowledge_base():
-    """Load the knowledge base from file"""
+class KnowledgeSection:
+    """One knowledge base topic with its per-section metadata precomputed"""
+    __slots__ = ('heading', 'category', 'text', 'content_hash', 'body', 'length', 'fallback_answer',
+                 'fallback_score', 'encodings')
+
+    def __init__(self, heading, category, text, content_hash=None):
+        self.heading = heading
+        self.category = category
+        self.text = text
+        self.content_hash = content_hash or section_hash(text)
+        self.encodings = {}  # QA engine name -> ContextEncoding, filled once the tokenizer is loaded
+        lines = text.split('\n')
+        self.body = ' '.join(lines[1:])  # Skip the title line
+        self.length = len(text)
+        
+        # Answer served when the QA model is not confident: first sentence or first 200 characters
+        self.fallback_answer, self.fallback_score = None, 0
+        if len(lines) > 1:
+            first_sentence = re.split(r'[.!?]', self.body)[0]
+            if first_sentence and len(first_sentence.strip()) > 10:
+                self.fallback_answer, self.fallback_score = first_sentence.strip() + '.', 0.3
+            else:
+                self.fallback_answer, self.fallback_score = self.body[:200] + '...', 0.2
+
+class KnowledgeBase:
+    """Knowledge base parsed once into sections indexed by heading.
+
+    Given the previous snapshot, sections whose heading, category and content hash
+    are unchanged are reused as-is, keeping their tokenized contexts.
+    """
+
+    lazy = False  # Sections are all parsed up front
+
+    def __init__(self, content, previous=None):
+        self.version = hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+        self.sections = {}      # heading -> KnowledgeSection, in file order
+        self.categories = {}    # '## CATEGORY' -> [headings]
+        self._short_headings = {}  # heading without '(ABBREVIATION)' -> heading
+        self.topic_matcher = None  # Built by load_knowledge_base once aliases are known
+        self.retriever = None      # BM25Index, built by load_knowledge_base
+        self.fragments = None      # FragmentCache, built by load_knowledge_base
+        self.precompiled = {}      # Precompiled answers, loaded by load_knowledge_base
+        self.aliases = {}          # Topic aliases the matcher was built with
+        self.reused_sections = 0
+        self._parse(content, previous.sections if previous is not None else {})
+
+    @staticmethod
+    def parse_block(block):
+        """(category of a leading '## ' line or None, content lines) of one blank-line separated block"""
+        lines = [line.rstrip() for line in block.strip().split('\n')]
+        category = None
+        if lines and lines[0].startswith('## '):
+            category = lines.pop(0)[3:].strip()
+        # Single '#' lines are file comments
+        return category, [line for line in lines if line and not line.startswith('#')]
+
+    def _parse(self, content, previous_sections):
+        category = None
+        for block in re.split(r'\n\s*\n', content.replace('\r\n', '\n')):
+            block_category, lines = self.parse_block(block)
+            if block_category is not None:
+                category = block_category
+                self.categories.setdefault(category, [])
+            if not lines:
+                continue
+            
+            heading = lines[0].strip()
+            if heading in self.sections:
+                continue
+            text = '\n'.join(lines)
+            content_hash = section_hash(text)
+            section = previous_sections.get(heading)
+            if section is not None and section.content_hash == content_hash and section.category == category:
+                self.reused_sections += 1
+            else:
+                section = KnowledgeSection(heading, category, text, content_hash)
+            self.sections[heading] = section
+            if category:
+                self.categories[category].append(heading)
+            
+            short_heading = self.short_heading(heading)
+            if short_heading != heading:
+                self._short_headings.setdefault(short_heading, heading)
+
+    def section(self, topic):
+        """Look up a topic's section by heading, e.g. 'CONVOLUTIONAL NEURAL NETWORKS' also
+        finds 'CONVOLUTIONAL NEURAL NETWORKS (CNNS)'"""
+        section = self.sections.get(topic)
+        if section is None and topic in self._short_headings:
+            section = self.sections[self._short_headings[topic]]
+        return section
+
+    @property
+    def topics(self):
+        return list(self.sections)
+
+    def section_length(self, heading):
+        return self.sections[heading].length
+
+    def retrieval_documents(self):
+        """(heading, category, paragraphs) per section for the BM25 index"""
+        for section in self.sections.values():
+            yield section.heading, section.category, section.text.split('\n')[1:]
+
+    def same_section(self, heading, other):
+        """True when other (an older snapshot) holds the identical section for heading"""
+        return type(other) is type(self) and self.sections[heading] is other.sections.get(heading)
+
+    def storage_stats(self):
+        return {'mode': 'memory'}
+
+    @staticmethod
+    def short_heading(heading):
+        """Heading without a trailing '(ABBREVIATION)'"""
+        return re.sub(r'\s*\(.*\)$', '', heading)
+
+    def __len__(self):
+        return len(self.sections)
+
+class MappedKnowledgeBase(KnowledgeBase):
+    """Knowledge base over a memory-mapped file, for corpora too large to hold as one string.
+
+    Loading scans the mapping once for block boundaries and builds an array-backed
+    index of byte offsets and lengths per section block and heading line, plus
+    categories, digests and an open-addressing heading hash table; no heading is kept
+    as a Python string. Section text is decoded on first access into a bounded LRU
+    (see LazySections), so resident memory follows the working set, not the corpus.
+    Replace the file atomically (write and rename) rather than editing it in place.
+    """
+
+    lazy = True
+    BLOCK_SEPARATOR = re.compile(rb'\r?\n\s*\n')
+
+    def __init__(self, path, previous=None, max_cached_sections=KNOWLEDGE_BASE_MMAP_CACHED_SECTIONS):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self._offsets = array('Q')          # section index -> byte offset of its block
+        self._lengths = array('Q')          # section index -> byte length of its block
+        self._heading_offsets = array('Q')  # section index -> byte offset of its heading line
+        self._heading_lengths = array('Q')  # section index -> byte length of its heading line
+        self._heading_keys = array('q')     # section index -> _heading_key(heading)
+        self._slots = array('I', bytes(4 * 8))  # heading hash table: section index + 1, 0 when empty
+        self._category_ids = array('i')     # section index -> index in _category_names, -1 for none
+        self._digests = bytearray()         # section index -> 8-byte digest of its block
+        self._category_names = []           # category id -> '## CATEGORY'
+        self._category_index = {}           # '## CATEGORY' -> category id
+        self.sections = LazySections(self, max_cached_sections)
+        self.categories = {}                # '## CATEGORY' -> array of section indexes (see heading())
+        self._short_headings = {}
+        self.topic_matcher = None
+        self.retriever = None
+        self.fragments = None
+        self.precompiled = {}
+        self.aliases = {}
+        self.reused_sections = 0
+        self._scan(previous if isinstance(previous, MappedKnowledgeBase) else None)
+        self.version = hashlib.sha1(self._digests).hexdigest()[:12]
+        self._release()
+
+    def _release(self):
+        """After a pass over the whole file, let the kernel drop its pages until requests need them"""
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            self._map.madvise(mmap.MADV_DONTNEED)
+
+    def _blocks(self):
+        start = 0
+        for separator in self.BLOCK_SEPARATOR.finditer(self._map):
+            yield start, separator.start()
+            start = separator.end()
+        yield start, len(self._map)
+
+    def _block_head(self, start, end, max_lines):
+        """parse_block for the first max_lines content lines of a block, decoding only those;
+        also returns the byte span of the first content line"""
+        category, lines, first, span = None, [], True, None
+        while start < end and len(lines) < max_lines:
+            line_end = self._map.find(b'\n', start, end)
+            if line_end == -1:
+                line_end = end
+            line = self._map[start:line_end].decode('utf-8', 'replace').rstrip()
+            line_start, start = start, line_end + 1
+            if first:
+                line = line.lstrip()
+                if not line:
+                    continue
+                first = False
+                if line.startswith('## '):
+                    category = line[3:].strip()
+                    continue
+            if line and not line.startswith('#'):
+                if not lines:
+                    span = (line_start, line_end)
+                lines.append(line)
+        return category, lines, span
+
+    @staticmethod
+    def _heading_key(heading):
+        return hash(heading)
+
+    def _find(self, heading):
+        """Section index of heading, or -1"""
+        key = self._heading_key(heading)
+        mask = len(self._slots) - 1
+        slot = key & mask
+        while True:
+            entry = self._slots[slot]
+            if not entry:
+                return -1
+            if self._heading_keys[entry - 1] == key and self.heading(entry - 1) == heading:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def _insert(self, index):
+        if (index + 1) * 2 > len(self._slots):
+            # Keep the table at most half full; rehash every section into twice the slots
+            self._slots = array('I', bytes(8 * len(self._slots)))
+            for existing in range(index):
+                self._place(existing)
+        self._place(index)
+
+    def _place(self, index):
+        mask = len(self._slots) - 1
+        slot = self._heading_keys[index] & mask
+        while self._slots[slot]:
+            slot = (slot + 1) & mask
+        self._slots[slot] = index + 1
+
+    def heading(self, index):
+        """Heading of the section at index, decoded from the mapping"""
+        start = self._heading_offsets[index]
+        return self._map[start:start + self._heading_lengths[index]].decode('utf-8', 'replace').strip()
+
+    def headings(self):
+        for index in range(len(self._offsets)):
+            yield self.heading(index)
+        self._release()
+
+    def _category_name(self, index):
+        category_id = self._category_ids[index]
+        return self._category_names[category_id] if category_id >= 0 else None
+
+    def _scan(self, previous):
+        category_id = -1
+        for start, end in self._blocks():
+            block_category, lines, span = self._block_head(start, end, 1)
+            if block_category is not None:
+                category_id = self._category_index.get(block_category)
+                if category_id is None:
+                    category_id = self._category_index[block_category] = len(self._category_names)
+                    self._category_names.append(block_category)
+                    self.categories[block_category] = array('I')
+            if not lines:
+                continue
+            
+            heading = lines[0].strip()
+            if self._find(heading) >= 0:
+                continue
+            index = len(self._offsets)
+            self._offsets.append(start)
+            self._lengths.append(end - start)
+            self._heading_offsets.append(span[0])
+            self._heading_lengths.append(span[1] - span[0])
+            self._heading_keys.append(self._heading_key(heading))
+            self._insert(index)
+            self._category_ids.append(category_id)
+            digest = hashlib.blake2b(memoryview(self._map)[start:end], digest_size=8).digest()
+            self._digests += digest
+            if category_id >= 0:
+                self.categories[self._category_names[category_id]].append(index)
+            
+            if previous is not None and previous.digest(heading) == digest:
+                self.reused_sections += 1
+                # Keep the decoded section, and so its tokenized contexts, if it is still cached
+                section = previous.sections.cached(heading)
+                if section is not None:
+                    self.sections.adopt(heading, section)
+            
+            short_heading = self.short_heading(heading)
+            if short_heading != heading:
+                self._short_headings.setdefault(short_heading, heading)
+
+    def digest(self, heading):
+        index = self._find(heading)
+        return None if index < 0 else bytes(self._digests[index * 8:index * 8 + 8])
+
+    def decode_section(self, heading):
+        """Decode and parse one section from the mapping"""
+        index = self._find(heading)
+        if index < 0:
+            raise KeyError(heading)
+        start = self._offsets[index]
+        block = self._map[start:start + self._lengths[index]].decode('utf-8', 'replace').replace('\r\n', '\n')
+        _, lines = self.parse_block(block)
+        return KnowledgeSection(heading, self._category_name(index), '\n'.join(lines))
+
+    def section_length(self, heading):
+        return self._lengths[self._find(heading)]
+
+    def retrieval_documents(self):
+        """Heading and first paragraph per section: indexing every paragraph of a corpus this
+        size would hold it all in memory"""
+        for index in range(len(self._offsets)):
+            start = self._offsets[index]
+            _, lines, _ = self._block_head(start, start + self._lengths[index], 2)
+            yield lines[0].strip(), self._category_name(index), lines[1:]
+        self._release()
+
+    def same_section(self, heading, other):
+        return isinstance(other, MappedKnowledgeBase) and self.digest(heading) == other.digest(heading)
+
+    def storage_stats(self):
+        arrays = (self._offsets, self._lengths, self._heading_offsets, self._heading_lengths, self._heading_keys,
+                  self._slots, self._category_ids, *self.categories.values())
+        return {
+            'mode': 'mmap',
+            'path': self.path,
+            'bytes': len(self._map),
+            'index_bytes': sum(part.itemsize * len(part) for part in arrays) + len(self._digests),
+            **self.sections.stats()
+        }
+
+class LazySections(Mapping):
+    """heading -> KnowledgeSection for a MappedKnowledgeBase, decoded on access into a bounded LRU"""
+
+    def __init__(self, knowledge_base, max_cached):
+        self._knowledge_base = knowledge_base
+        self.max_cached = max(1, max_cached)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.decoded = 0
+
+    def __getitem__(self, heading):
+        with self._lock:
+            section = self._cache.get(heading)
+            if section is not None:
+                self._cache.move_to_end(heading)
+                return section
+        section = self._knowledge_base.decode_section(heading)  # KeyError for unknown headings
+        self.adopt(heading, section)
+        return section
+
+    def adopt(self, heading, section):
+        with self._lock:
+            self.decoded += 1
+            self._cache[heading] = section
+            self._cache.move_to_end(heading)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def cached(self, heading):
+        with self._lock:
+            return self._cache.get(heading)
+
+    def __contains__(self, heading):
+        return self._knowledge_base._find(heading) >= 0
+
+    def __iter__(self):
+        return self._knowledge_base.headings()
+
+    def __len__(self):
+        return len(self._knowledge_base._offsets)
+
+    def stats(self):
+        with self._lock:
+            return {'decoded_sections': len(self._cache), 'max_decoded_sections': self.max_cached,
+                    'sections_decoded_total': self.decoded}
+
+# --------- Retrieval ---------
+RETRIEVAL_STOPWORDS = frozenset("""
+a about an and are as at be by can could do does explain for from give how i in is it me
+more of on or show tell that the this to what when where which who why with you your
+""".split())
+
+def retrieval_terms(text):
+    """Lowercase word terms without question stopwords"""
+    return [term for term in re.findall(r'[a-z0-9]+', text.lower()) if term not in RETRIEVAL_STOPWORDS]
+
+class BM25Index:
+    """Inverted index over knowledge base paragraphs with precomputed BM25 weights.
+
+    Postings are stored CSR-style in NumPy arrays: term t's documents are
+    posting_docs[term_offsets[t]:term_offsets[t + 1]], so scoring a query is a few
+    array slices and one bincount, independent of vocabulary size.
+    """
+
+    def __init__(self, knowledge_base, k1=BM25_K1, b=BM25_B):
+        self.topics = []            # section index -> topic name
+        self.vocabulary = {}
+        # Postings are collected as flat (term, doc, frequency) arrays while streaming the
+        # documents, so building never holds more than one paragraph's terms as Python objects
+        doc_sections, doc_lengths = array('i'), array('f')
+        posting_terms, posting_docs, posting_tfs = array('i'), array('i'), array('f')
+        for heading, category, paragraphs in knowledge_base.retrieval_documents():
+            if category in RETRIEVAL_EXCLUDED_CATEGORIES:
+                continue
+            topic = KnowledgeBase.short_heading(heading)
+            heading_terms = retrieval_terms(heading)
+            # Each body line is a paragraph; the heading is indexed with every paragraph
+            for paragraph in paragraphs or ['']:
+                terms = heading_terms + retrieval_terms(paragraph)
+                if not terms:
+                    continue
+                doc_id = len(doc_lengths)
+                doc_sections.append(len(self.topics))
+                doc_lengths.append(len(terms))
+                term_counts = {}
+                for term in terms:
+                    term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+                    term_counts[term_id] = term_counts.get(term_id, 0) + 1
+                for term_id, count in term_counts.items():
+                    posting_terms.append(term_id)
+                    posting_docs.append(doc_id)
+                    posting_tfs.append(count)
+            self.topics.append(topic)
+        
+        self.doc_count = len(doc_lengths)
+        self.doc_sections = np.array(doc_sections, dtype=np.int32)
+        doc_lengths = np.array(doc_lengths, dtype=np.float32)
+        average_length = doc_lengths.mean() if self.doc_count else 1.0
+        
+        # Group postings by term; the stable sort keeps each term's documents in order
+        terms = np.array(posting_terms, dtype=np.int32)
+        order = np.argsort(terms, kind='stable')
+        document_frequency = np.bincount(terms, minlength=len(self.vocabulary))
+        self.term_offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=self.term_offsets[1:])
+        self.posting_docs = np.array(posting_docs, dtype=np.int32)[order]
+        tfs = np.array(posting_tfs, dtype=np.float32)[order]
+        df = document_frequency[terms[order]]
+        idf = np.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[self.posting_docs] / average_length)
+        self.posting_weights = (idf * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+    def search(self, query, k=3, min_terms=1):
+        """Top-k (topic, score) pairs, scoring each section by its best paragraph.
+
+        Hits must contain at least min_terms distinct query terms (every query term, for
+        shorter queries); when the best one doesn't, the query is not answered at all.
+        """
+        query_terms = set(retrieval_terms(query))
+        term_ids = [self.vocabulary[term] for term in query_terms if term in self.vocabulary]
+        if not term_ids:
+            return []
+        slices = [slice(self.term_offsets[t], self.term_offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.posting_docs[s] for s in slices])
+        weights = np.concatenate([self.posting_weights[s] for s in slices])
+        
+        # A document has one posting per distinct term, so its posting count is its matched terms
+        candidates, matched_terms = np.unique(docs, return_counts=True)
+        scores = np.bincount(docs, weights=weights, minlength=self.doc_count)
+        candidate_scores = scores[candidates]
+        
+        # Keep each section's best paragraph, then rank sections
+        sections = self.doc_sections[candidates]
+        order = np.lexsort((-candidate_scores, sections))
+        best = order[np.r_[True, sections[order][1:] != sections[order][:-1]]]
+        count = min(len(best), k)
+        top = best[np.argpartition(-candidate_scores[best], count - 1)[:count]]
+        top = top[np.argsort(-candidate_scores[top], kind='stable')]
+        
+        required = min(min_terms, len(query_terms))
+        if matched_terms[top[0]] < required:
+            # The best match rests on too few of the query's words to trust any of them
+            return []
+        return [(self.topics[int(sections[i])], float(candidate_scores[i])) for i in top if matched_terms[i] >= required]
+
+    def stats(self):
+        return {
+            'paragraphs': self.doc_count,
+            'terms': len(self.vocabulary),
+            'postings': int(self.term_offsets[-1])
+        }
+
+def load_topic_aliases():
+    """Load optional extra topic keywords from TOPIC_ALIASES_PATH"""
+    aliases = {}
+    if not os.path.exists(TOPIC_ALIASES_PATH):
+        return aliases
     try:
-        if os.path.exists(KNOWLEDGE_BASE_PATH):
-            with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content:
-                    sections = [s for s in content.split('\n\n') if s.strip()]
-                    print(f"✅ Knowledge base loaded with {len(sections)} topics")
-                    return content
-        # Create default if doesn't exist or is empty
-        return create_default_knowledge_base()
+        with open(TOPIC_ALIASES_PATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or ':' not in line:
+                    continue
+                topic, keywords = line.split(':', 1)
+                aliases.setdefault(topic.strip().upper(), []).extend(
+                    k.strip().lower() for k in keywords.split(',') if k.strip()
+                )
+        print(f"✅ Loaded aliases for {len(aliases)} topics")
+    except Exception as e:
+        print(f"❌ Error loading topic aliases: {e}")
+    return aliases
+
+def read_knowledge_base(previous=None):
+    """Parse KNOWLEDGE_BASE_PATH; None when it has no sections. Raises OSError if it can't be read"""
+    if use_mapped_knowledge_base(KNOWLEDGE_BASE_PATH):
+        knowledge_base = MappedKnowledgeBase(KNOWLEDGE_BASE_PATH, previous)
+        if not len(knowledge_base):
+            return None
+        storage = knowledge_base.storage_stats()
+        print(f"✅ Knowledge base memory-mapped with {len(knowledge_base)} topics "
+              f"({storage['bytes'] / 1e6:.1f} MB, {storage['index_bytes'] / 1e6:.1f} MB index)")
+        return knowledge_base
+    with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if not content:
+        return None
+    knowledge_base = KnowledgeBase(content, previous)
+    print(f"✅ Knowledge base loaded with {len(knowledge_base)} topics")
+    return knowledge_base
+
+def load_knowledge_base(previous=None):
+    """Load and parse the knowledge base from file, reusing unchanged parts of a previous snapshot.
+
+    Only the first load (no previous snapshot) falls back to writing the default knowledge
+    base. On a reload a missing, empty or unreadable file raises instead, so the caller
+    keeps serving the previous snapshot: editors that truncate or save by rename leave the
+    file in exactly those states for a moment.
+    """
+    try:
+        knowledge_base = read_knowledge_base(previous)
     except Exception as e:
+        if previous is not None:
+            raise
         print(f"❌ Error loading knowledge base: {e}")
-        return create_default_knowledge_base()
+        knowledge_base = None
+    if knowledge_base is None:
+        if previous is not None:
+            raise ValueError(f"{KNOWLEDGE_BASE_PATH} has no sections")
+        # Create default if doesn't exist or is empty
+        knowledge_base = KnowledgeBase(create_default_knowledge_base())
+    
+    knowledge_base.aliases = load_topic_aliases()
+    if (previous is not None and list(previous.sections) == list(knowledge_base.sections)
+            and previous.aliases == knowledge_base.aliases):
+        # The matcher only depends on headings and aliases
+        knowledge_base.topic_matcher = previous.topic_matcher
+    else:
+        knowledge_base.topic_matcher = build_topic_matcher(knowledge_base, knowledge_base.aliases)
+    if previous is not None and knowledge_base.reused_sections == len(knowledge_base) == len(previous):
+        knowledge_base.retriever = previous.retriever
+    else:
+        # BM25 weights depend on corpus-wide statistics, so any text change rebuilds the index (milliseconds)
+        knowledge_base.retriever = BM25Index(knowledge_base)
+    # Fragments only depend on topic names, keyed like routing results (short headings);
+    # mapped corpora render them on first use
+    topics = set(TOPIC_KEYWORDS) | set(knowledge_base.aliases)
+    topics.update(KnowledgeBase.short_heading(heading) for heading in knowledge_base.sections)
+    if previous is not None:
+        knowledge_base.fragments = previous.fragments.carry_over(topics)
+    else:
+        knowledge_base.fragments = FragmentCache(TOPIC_KEYWORDS)
+    if not knowledge_base.lazy:
+        for topic in topics:
+            knowledge_base.fragments.get(topic)
+    knowledge_base.precompiled = load_precompiled_answers(knowledge_base)
+    return knowledge_base
+
+def use_mapped_knowledge_base(path):
+    if not os.path.exists(path):
+        return False
+    if KNOWLEDGE_BASE_MMAP == 'auto':
+        return os.path.getsize(path) >= KNOWLEDGE_BASE_MMAP_MIN_BYTES
+    return KNOWLEDGE_BASE_MMAP == 'on' and os.path.getsize(path) > 0
 
 # --------- Interactive Features ---------
+LEARNING_PATH_SUGGESTIONS = {
+    "Beginner": ["What is AI?", "Machine Learning Basics", "Real-world AI Applications"],
+    "Intermediate": ["Deep Learning Fundamentals", "Neural Networks", "AI Model Training"],
+    "Advanced": ["Transformer Architecture", "Generative AI", "AI Ethics and Challenges"],
+    "Continuing": ["Computer Vision", "Natural Language Processing", "Reinforcement Learning"]
+}
+
 class LearningCompanion:
+    """One learner's progress, kept compact so tens of thousands fit in memory"""
+    __slots__ = ('topics_explored', 'quizzes_taken', 'challenges_completed', 'conversation_context', 'last_seen')
+
     def __init__(self):
-        self.user_progress = {
-            'topics_explored': set(),
-            'quizzes_taken': 0,
-            'challenges_completed': 0,
-            'learning_path': []
-        }
-        self.conversation_context = []
+        self.topics_explored = set()
+        self.quizzes_taken = 0
+        self.challenges_completed = 0
+        # Last 10 interactions as (topic, question_type, timestamp)
+        self.conversation_context = deque(maxlen=10)
+        self.last_seen = time.monotonic()
         
     def track_interaction(self, topic, question_type):
         """Track user interactions for personalized experience"""
-        self.user_progress['topics_explored'].add(topic)
-        self.conversation_context.append({
-            'topic': topic,
-            'type': question_type,
-            'timestamp': datetime.now()
-        })
-        
-        # Keep only last 10 interactions
-        if len(self.conversation_context) > 10:
-            self.conversation_context.pop(0)
+        self.topics_explored.add(topic)
+        self.conversation_context.append((topic, question_type, time.time()))
+    
+    @property
+    def user_progress(self):
+        """Progress summary in JSON-friendly form"""
+        return {
+            'topics_explored': sorted(self.topics_explored),
+            'quizzes_taken': self.quizzes_taken,
+            'challenges_completed': self.challenges_completed
+        }
     
     def get_personalized_greeting(self):
         """Generate personalized greeting based on user progress"""
-        topics_count = len(self.user_progress['topics_explored'])
+        topics_count = len(self.topics_explored)
         
         if topics_count == 0:
             return "🎉 Welcome! I'm excited to be your AI learning companion!"
@@ -778,33 +2440,193 @@ class LearningCompanion:
     
     def generate_learning_path_suggestion(self):
         """Suggest next learning steps based on user interests"""
-        explored = self.user_progress['topics_explored']
+        explored = self.topics_explored
         
         if not explored:
-            return "Beginner", ["What is AI?", "Machine Learning Basics", "Real-world AI Applications"]
-        
-        if 'MACHINE LEARNING' in explored and 'DEEP LEARNING' not in explored:
-            return "Intermediate", ["Deep Learning Fundamentals", "Neural Networks", "AI Model Training"]
-        
-        if 'DEEP LEARNING' in explored:
-            return "Advanced", ["Transformer Architecture", "Generative AI", "AI Ethics and Challenges"]
-        
-        return "Continuing", ["Computer Vision", "Natural Language Processing", "Reinforcement Learning"]
+            level = "Beginner"
+        elif 'MACHINE LEARNING' in explored and 'DEEP LEARNING' not in explored:
+            level = "Intermediate"
+        elif 'DEEP LEARNING' in explored:
+            level = "Advanced"
+        else:
+            level = "Continuing"
+        return level, LEARNING_PATH_SUGGESTIONS[level]
 
-# --------- Interactive Quizzes and Challenges ---------
-AI_QUIZZES = {
-    'beginner': [
-        {
-            'question': "What is the main goal of Machine Learning?",
-            'options': [
-                "To program computers with explicit rules",
-                "To enable computers to learn from data", 
-                "To replace human intelligence completely",
-                "To create robot assistants"
-            ],
-            'correct': 1,
-            'explanation': "Machine Learning focuses on enabling computers to learn patterns from data rather than being explicitly programmed with rules."
-        }
+class CompanionStore:
+    """Session-keyed LearningCompanion records with LRU and idle-timeout eviction"""
+
+    def __init__(self, max_sessions=50000, idle_timeout_seconds=7200):
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._companions = OrderedDict()  # session id -> LearningCompanion, least recently seen first
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    @staticmethod
+    def new_session_id():
+        return secrets.token_urlsafe(16)
+
+    def get(self, session_id):
+        """Return the learner's companion, creating a fresh one for unknown or evicted sessions"""
+        now = time.monotonic()
+        with self._lock:
+            companion = self._companions.get(session_id)
+            if companion is None:
+                companion = self._companions[session_id] = LearningCompanion()
+                self.created += 1
+            else:
+                self._companions.move_to_end(session_id)
+            companion.last_seen = now
+            self._evict(now)
+            return companion
+
+    def peek(self, session_id):
+        """Return the learner's companion without creating or touching it"""
+        with self._lock:
+            return self._companions.get(session_id)
+
+    def save(self, session_id, companion):
+        """Companions are live objects here; SharedCompanionStore writes them back"""
+
+    def _evict(self, now):
+        # Entries are ordered by last access, so idle and over-cap entries are at the front
+        while self._companions:
+            oldest_id, oldest = next(iter(self._companions.items()))
+            if now - oldest.last_seen > self.idle_timeout_seconds:
+                self.evicted_idle += 1
+            elif len(self._companions) > self.max_sessions:
+                self.evicted_lru += 1
+            else:
+                break
+            del self._companions[oldest_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_sessions': len(self._companions),
+                'max_sessions': self.max_sessions,
+                'idle_timeout_seconds': self.idle_timeout_seconds,
+                'created': self.created,
+                'evicted_lru': self.evicted_lru,
+                'evicted_idle': self.evicted_idle
+            }
+
+class SharedCompanionStore(CompanionStore):
+    """CompanionStore kept in a SQLite file, for pre-fork workers behind one shared socket.
+
+    The kernel hands a learner's requests to any worker, so no worker can own their
+    progress. Each request loads the companion and save() writes it back; concurrent
+    requests of one learner on different workers keep the last write.
+    """
+
+    EVICT_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, path, max_sessions=50000, idle_timeout_seconds=7200):
+        super().__init__(max_sessions, idle_timeout_seconds)
+        self.path = path
+        self._db = None
+        self._parent_db = None
+        self._evict_at = 0.0
+        _fork_sensitive.add(self)
+        with self._lock, self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS companions '
+                       '(session_id TEXT PRIMARY KEY, last_seen REAL NOT NULL, data BLOB NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS companions_last_seen ON companions (last_seen)')
+
+    def _connection(self):
+        """This process's connection, opened on first use; call with self._lock held"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+        return self._db
+
+    def _after_fork(self):
+        # SQLite connections must not be used across fork. The parent's stays referenced
+        # (closing it here could disturb the parent's locks) but unused.
+        self._parent_db, self._db = self._db, None
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT data FROM companions WHERE session_id = ? AND last_seen >= ?',
+                (session_id, time.time() - self.idle_timeout_seconds)).fetchone()
+            if row is None:
+                self.created += 1
+                companion = LearningCompanion()
+            else:
+                companion = pickle.loads(row[0])
+        companion.last_seen = time.monotonic()
+        return companion
+
+    def peek(self, session_id):
+        with self._lock:
+            row = self._connection().execute('SELECT data FROM companions WHERE session_id = ?',
+                                             (session_id,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def save(self, session_id, companion):
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            db.execute('INSERT OR REPLACE INTO companions (session_id, last_seen, data) VALUES (?, ?, ?)',
+                       (session_id, now, pickle.dumps(companion, pickle.HIGHEST_PROTOCOL)))
+            if now >= self._evict_at:
+                self._evict_at = now + self.EVICT_INTERVAL_SECONDS
+                self.evicted_idle += db.execute('DELETE FROM companions WHERE last_seen < ?',
+                                                (now - self.idle_timeout_seconds,)).rowcount
+                self.evicted_lru += db.execute(
+                    'DELETE FROM companions WHERE session_id IN '
+                    '(SELECT session_id FROM companions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)',
+                    (self.max_sessions,)).rowcount
+
+    def stats(self):
+        with self._lock:
+            active = self._connection().execute('SELECT COUNT(*) FROM companions').fetchone()[0]
+            # Counters are this process's share; the session count is shared
+            return {
+                'active_sessions': active,
+                'max_sessions': self.max_sessions,
+                'idle_timeout_seconds': self.idle_timeout_seconds,
+                'created': self.created,
+                'evicted_lru': self.evicted_lru,
+                'evicted_idle': self.evicted_idle,
+                'shared': True
+            }
+
+companion_store = CompanionStore(
+    max_sessions=COMPANION_MAX_SESSIONS,
+    idle_timeout_seconds=COMPANION_IDLE_TIMEOUT_SECONDS
+)
+
+def current_companion():
+    """The requesting learner's companion, keyed by an id in the signed session cookie"""
+    session_id = session.get('companion_id')
+    if not session_id:
+        session_id = session['companion_id'] = companion_store.new_session_id()
+    return companion_store.get(session_id)
+
+def save_current_companion(companion):
+    """Write the requesting learner's companion back to the store once the request changed it"""
+    companion_store.save(session['companion_id'], companion)
+
+# --------- Interactive Quizzes and Challenges ---------
+AI_QUIZZES = {
+    'beginner': [
+        {
+            'question': "What is the main goal of Machine Learning?",
+            'options': [
+                "To program computers with explicit rules",
+                "To enable computers to learn from data", 
+                "To replace human intelligence completely",
+                "To create robot assistants"
+            ],
+            'correct': 1,
+            'explanation': "Machine Learning focuses on enabling computers to learn patterns from data rather than being explicitly programmed with rules."
+        }
     ],
     'intermediate': [
         {
@@ -893,177 +2715,449 @@ def create_interactive_challenge(topic):
     '''
     return challenge_html
 
-# --------- Core AI Functions (Enhanced) ---------
-companion = LearningCompanion()
+# Topic responses are a join of these per-topic fragments around the answer card,
+# a motivational fact and the progress tracker
+TOPIC_BUTTONS_HTML = '''
+        <div class="interactive-buttons">
+            <button class="interactive-btn" onclick="askQuestion('quiz')">Test My Knowledge 🎯</button>
+            <button class="interactive-btn" onclick="askQuestion('What is next?')">Continue Learning 📚</button>
+            <button class="interactive-btn" onclick="askQuestion('More about {topic}')">Dive Deeper 🔍</button>
+        </div>'''
 
-def find_relevant_topic(question, knowledge_content):
-    """Find the most relevant topic for the question"""
-    question_lower = question.lower().strip()
+class TopicFragments:
+    """Pre-rendered static HTML of one topic's response"""
+    __slots__ = ('head', 'cards', 'tail')
+
+    def __init__(self, topic):
+        self.head = f'''
+    <div class="answer-box">
+        <div class="topic-badge">{topic}</div>
+        '''
+        self.cards = f'''
+        <div class="info-card">
+            <h3>💡 Making It Simple:</h3>
+            <p>{get_engaging_analogy(topic)}</p>
+        </div>
+        
+        <div class="key-points-card">
+            <h3>🎯 Key Insights:</h3>
+            {"".join([f'• {point}<br>' for point in get_interactive_key_points(topic)])}
+        </div>
+        
+        <div class="example-card">
+            <h3>🌍 Real-World Impact:</h3>
+            <p>{get_exciting_examples(topic)}</p>
+        </div>
+        '''
+        self.tail = TOPIC_BUTTONS_HTML.format(topic=topic) + '''
+    </div>
+    '''
+
+class FragmentCache:
+    """Topic fragments, rendered for every knowledge base topic at load time"""
+
+    def __init__(self, topics=()):
+        self._fragments = {}
+        self.fact_cards = [f'''
+        <div class="fun-fact-card">
+            <h3>🌟 Motivational Moment:</h3>
+            <p>{fact}</p>
+        </div>
+        ''' for fact in MOTIVATIONAL_FACTS]
+        for topic in topics:
+            self.get(topic)
+
+    def get(self, topic):
+        fragments = self._fragments.get(topic)
+        if fragments is None:
+            # Topics outside the knowledge base (keyword-only topics) render on first use
+            fragments = self._fragments[topic] = TopicFragments(topic)
+        return fragments
+
+    def carry_over(self, topics):
+        """A new cache seeded with this one's fragments of topics (dropping topics a reload
+        removed); this cache is left untouched for the snapshot still serving from it"""
+        cache = FragmentCache()
+        # dict() copies in one step, so a concurrent get() on the live cache can't break the iteration
+        cache._fragments = {topic: fragments for topic, fragments in dict(self._fragments).items() if topic in topics}
+        return cache
+
+    def __contains__(self, topic):
+        return topic in self._fragments
+
+    def __len__(self):
+        return len(self._fragments)
+
+# --------- Topic Routing ---------
+# Hand-written keywords; every knowledge base heading is added to these automatically
+TOPIC_KEYWORDS = {
+    'ARTIFICIAL INTELLIGENCE': ['ai', 'artificial intelligence', 'what is ai', 'explain ai', 'define ai', 'intelligence'],
+    'MACHINE LEARNING': ['machine learning', 'ml', 'what is ml', 'what is machine learning', 'explain ml', 'supervised', 'unsupervised'],
+    'DEEP LEARNING': ['deep learning', 'deep neural', 'what is deep learning', 'multiple layers'],
+    'NEURAL NETWORKS': ['neural network', 'neural networks', 'what is neural', 'explain neural', 'neurons'],
+    'CONVOLUTIONAL NEURAL NETWORKS': ['cnn', 'convolutional', 'convolutional neural', 'what is cnn', 'image recognition'],
+    'NATURAL LANGUAGE PROCESSING': ['nlp', 'natural language', 'language processing', 'what is nlp', 'text processing'],
+    'COMPUTER VISION': ['computer vision', 'vision', 'image recognition', 'what is computer vision', 'visual recognition'],
+    'REINFORCEMENT LEARNING': ['reinforcement learning', 'reinforcement', 'q-learning', 'reward learning'],
+    'AI ETHICS': ['ai ethics', 'ethics', 'bias', 'fairness', 'ethical ai', 'ai bias', 'responsible ai'],
+    'GENERATIVE AI': ['generative ai', 'gpt', 'chatgpt', 'dall-e', 'generative', 'create ai'],
+    'TRANSFORMER ARCHITECTURE': ['transformer', 'attention', 'bert', 'gpt architecture', 'self-attention'],
+    'BIAS IN AI': ['bias in ai', 'ai bias', 'algorithmic bias', 'unfair ai'],
+    'EXPLAINABLE AI': ['explainable ai', 'interpretable ai', 'ai transparency', 'understandable ai']
+}
+
+class TopicMatcher:
+    """Aho-Corasick automaton over topic keywords, scoring every topic in one pass.
+
+    Keywords that only ever count as whole words (headings, abbreviations) skip the
+    automaton and are looked up between word boundaries, so a knowledge base with
+    hundreds of thousands of headings doesn't grow a trie node per heading character.
+    """
+
+    def __init__(self):
+        self.topics = []          # Topic names in tie-break priority order
+        self._topic_ids = {}
+        self._keywords = []       # keyword id -> (keyword length, [(topic id, whole_word_only)])
+        self._keyword_ids = {}
+        self._goto = [{}]         # state -> {char: next state}
+        self._fail = [0]
+        self._output = [[]]       # state -> keyword ids ending here
+        self._phrases = {}        # whole-word-only keyword -> [topic ids]
+        self._phrase_lengths = set()
+
+    def add(self, topic, keyword, whole_word_only=False):
+        """Register a keyword for a topic; call build() once all keywords are added"""
+        keyword = keyword.lower().strip()
+        if not keyword:
+            return
+        if topic not in self._topic_ids:
+            self._topic_ids[topic] = len(self.topics)
+            self.topics.append(topic)
+        topic_id = self._topic_ids[topic]
+        
+        if whole_word_only and keyword not in self._keyword_ids:
+            targets = self._phrases.setdefault(keyword, [])
+            if topic_id not in targets:
+                targets.append(topic_id)
+            self._phrase_lengths.add(len(keyword))
+            return
+        
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = self._keyword_ids[keyword] = len(self._keywords)
+            self._keywords.append((len(keyword), []))
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword_id)
+            # A substring keyword that was registered whole-word-only moves into the automaton
+            for phrase_topic_id in self._phrases.pop(keyword, []):
+                self._keywords[keyword_id][1].append((phrase_topic_id, True))
+        
+        targets = self._keywords[keyword_id][1]
+        if all(existing_id != topic_id for existing_id, _ in targets):
+            targets.append((topic_id, whole_word_only))
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        return self
+
+    def match(self, text):
+        """Score topics for lowercase text: 3 per keyword found as a whole word, 1 per
+        keyword only found inside a longer word; returns {topic: score} in priority order"""
+        keyword_scores = {}
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                if keyword_scores.get(keyword_id) == 3:
+                    continue
+                start = end - self._keywords[keyword_id][0] + 1
+                whole_word = ((start == 0 or not _is_word_char(text[start - 1]))
+                              and (end + 1 == len(text) or not _is_word_char(text[end + 1])))
+                keyword_scores[keyword_id] = 3 if whole_word else max(keyword_scores.get(keyword_id, 0), 1)
+        
+        topic_scores = {}
+        for keyword_id, score in keyword_scores.items():
+            for topic_id, whole_word_only in self._keywords[keyword_id][1]:
+                if whole_word_only and score < 3:
+                    continue
+                topic_scores[topic_id] = topic_scores.get(topic_id, 0) + score
+        for phrase in self._whole_word_phrases(text):
+            for topic_id in self._phrases[phrase]:
+                topic_scores[topic_id] = topic_scores.get(topic_id, 0) + 3
+        return {self.topics[topic_id]: topic_scores[topic_id] for topic_id in sorted(topic_scores)}
+
+    def _whole_word_phrases(self, text):
+        """Distinct whole-word-only keywords in text, bounded by word boundaries on both sides"""
+        if not self._phrases:
+            return set()
+        longest = max(self._phrase_lengths)
+        starts = [i for i in range(len(text)) if i == 0 or not _is_word_char(text[i - 1])]
+        ends = [i for i in range(1, len(text) + 1) if i == len(text) or not _is_word_char(text[i])]
+        found = set()
+        first_end = 0
+        for start in starts:
+            while first_end < len(ends) and ends[first_end] <= start:
+                first_end += 1
+            for end in ends[first_end:]:
+                if end - start > longest:
+                    break
+                if end - start in self._phrase_lengths and text[start:end] in self._phrases:
+                    found.add(text[start:end])
+        return found
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def build_topic_matcher(knowledge_base, aliases=None):
+    """Compile hand-written keywords, alias file entries and every heading into one matcher"""
+    matcher = TopicMatcher()
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        for keyword in keywords:
+            matcher.add(topic, keyword)
+    for topic, keywords in (aliases or {}).items():
+        for keyword in keywords:
+            matcher.add(topic, keyword)
     
-    # Enhanced topic mapping with more keywords
-    topic_keywords = {
-        'ARTIFICIAL INTELLIGENCE': ['ai', 'artificial intelligence', 'what is ai', 'explain ai', 'define ai', 'intelligence'],
-        'MACHINE LEARNING': ['machine learning', 'ml', 'what is ml', 'what is machine learning', 'explain ml', 'supervised', 'unsupervised'],
-        'DEEP LEARNING': ['deep learning', 'deep neural', 'what is deep learning', 'multiple layers'],
-        'NEURAL NETWORKS': ['neural network', 'neural networks', 'what is neural', 'explain neural', 'neurons'],
-        'CONVOLUTIONAL NEURAL NETWORKS': ['cnn', 'convolutional', 'convolutional neural', 'what is cnn', 'image recognition'],
-        'NATURAL LANGUAGE PROCESSING': ['nlp', 'natural language', 'language processing', 'what is nlp', 'text processing'],
-        'COMPUTER VISION': ['computer vision', 'vision', 'image recognition', 'what is computer vision', 'visual recognition'],
-        'REINFORCEMENT LEARNING': ['reinforcement learning', 'reinforcement', 'q-learning', 'reward learning'],
-        'AI ETHICS': ['ai ethics', 'ethics', 'bias', 'fairness', 'ethical ai', 'ai bias', 'responsible ai'],
-        'GENERATIVE AI': ['generative ai', 'gpt', 'chatgpt', 'dall-e', 'generative', 'create ai'],
-        'TRANSFORMER ARCHITECTURE': ['transformer', 'attention', 'bert', 'gpt architecture', 'self-attention'],
-        'BIAS IN AI': ['bias in ai', 'ai bias', 'algorithmic bias', 'unfair ai'],
-        'EXPLAINABLE AI': ['explainable ai', 'interpretable ai', 'ai transparency', 'understandable ai']
-    }
+    # Headings are matched as whole words only, so abbreviations like 'NER' don't fire inside 'general'
+    for heading in knowledge_base.sections:
+        topic = KnowledgeBase.short_heading(heading)
+        matcher.add(topic, topic, whole_word_only=True)
+        abbreviation = re.search(r'\(([^)]+)\)$', heading)
+        if abbreviation:
+            matcher.add(topic, abbreviation.group(1), whole_word_only=True)
+    return matcher.build()
+
+# --------- Core AI Functions (Enhanced) ---------
+def find_relevant_topics(question, knowledge_base, k=QA_TOP_K_TOPICS):
+    """Rank the topics relevant to the question: up to k (topic, score) pairs, best first,
+    keeping runners-up that score at least QA_TOP_K_MIN_RATIO of the best"""
+    question_lower = question.lower().strip()
+    k = max(1, k)
     
     # Special interactive commands
     if any(cmd in question_lower for cmd in ['quiz', 'test', 'challenge']):
-        return 'QUIZ', 10
+        return [('QUIZ', 10)]
     if any(cmd in question_lower for cmd in ['learning path', 'progress', 'what next']):
-        return 'LEARNING_PATH', 10
+        return [('LEARNING_PATH', 10)]
     if any(cmd in question_lower for cmd in ['help', 'what can you do']):
-        return 'HELP', 10
-    
-    # Calculate scores for each topic
-    topic_scores = {}
-    for topic, keywords in topic_keywords.items():
-        score = 0
-        for keyword in keywords:
-            if keyword in question_lower:
-                # Exact matches get higher scores
-                if question_lower == keyword or f" {keyword} " in f" {question_lower} ":
-                    score += 3
-                else:
-                    score += 1
-        if score > 0:
-            topic_scores[topic] = score
+        return [('HELP', 10)]
     
+    # Score every topic in a single pass over the question; keywords of topics with no
+    # section (e.g. an alias for a heading that was removed) must not take a candidate slot
+    topic_scores = {topic: score for topic, score in knowledge_base.topic_matcher.match(question_lower).items()
+                    if knowledge_base.section(topic) is not None}
     if topic_scores:
-        # Return the topic with highest score
-        best_topic = max(topic_scores.items(), key=lambda x: x[1])
-        return best_topic[0], best_topic[1]
+        # Highest score first; ties keep the matcher's priority order
+        ranked = sorted(topic_scores.items(), key=lambda x: -x[1])[:k]
+    else:
+        # No keyword matched: retrieve the best sections by BM25 over their paragraphs
+        ranked = knowledge_base.retriever.search(question_lower, k=k, min_terms=BM25_MIN_MATCHED_TERMS)
+        if not ranked or ranked[0][1] < BM25_MIN_SCORE:
+            return []
     
-    return None, 0
+    best_score = ranked[0][1]
+    return [(topic, score) for topic, score in ranked if score >= best_score * QA_TOP_K_MIN_RATIO]
+
+def find_relevant_topic(question, knowledge_base):
+    """Find the most relevant topic for the question"""
+    topics = find_relevant_topics(question, knowledge_base, k=1)
+    return topics[0] if topics else (None, 0)
+
+def candidate_sections(topics, knowledge_base):
+    """(topic, section) pairs for the candidate topics that have a knowledge base section"""
+    sections = [(topic, knowledge_base.section(topic)) for topic in topics]
+    return [(topic, section) for topic, section in sections if section is not None]
+
+def best_section_answer(sections, results):
+    """Highest scoring non-empty span across candidate sections as (answer, score, topic), or None"""
+    best = None
+    for (topic, _), result in zip(sections, results):
+        if result['answer'] and (best is None or result['score'] > best[1]):
+            best = (result['answer'], float(result['score']), topic)
+    return best
+
+def extract_answer(question, topic, knowledge_base, candidates=None):
+    """Extract the best answer across the candidate topics (default: topic alone), serving
+    repeated questions from the cache; returns (answer, score, source topic)"""
+    return extract_answer_details(question, topic, knowledge_base, candidates)[:3]
+
+def extract_answer_details(question, topic, knowledge_base, candidates=None):
+    """extract_answer, also returning where the answer was served from and whether it is the
+    section's fallback text: (answer, score, source topic, source, is fallback)"""
+    started = time.perf_counter()
+    normalized = normalize_question(question)
+    precompiled = knowledge_base.precompiled.get((normalized, topic))
+    if precompiled is not None:
+        _record_inference(topic, 'precompiled', started)
+        return precompiled[:3] + ('precompiled', precompiled[3])
+    
+    # Keyed on the sections' content, so a reload keeps answers of unchanged sections
+    candidates = tuple(candidates or (topic,))
+    sections = candidate_sections(candidates, knowledge_base)
+    cache_key = (normalized, candidates, tuple(section.content_hash for _, section in sections))
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        _record_inference(topic, 'cache', started)
+        return cached[:3] + ('cache', cached[3])
+    
+    # Answers served while the model is still loading are fallbacks and must not be cached
+    model_was_ready = model_ready.is_set()
+    (answer, score, source, source_topic), shared = answer_flights.do(
+        cache_key, lambda: _extract_answer_uncached(question, sections))
+    if answer and model_was_ready and not shared:
+        answer_cache.put(cache_key, (answer, score, source_topic, source == 'fallback'))
+    _record_inference(topic, source, started)
+    return answer, score, source_topic, source, source == 'fallback'
+
+def _record_inference(topic, source, started):
+    elapsed = time.perf_counter() - started
+    _request_timings.inference = getattr(_request_timings, 'inference', 0.0) + elapsed
+    INFERENCE_SECONDS.observe(elapsed, topic, source)
+    ANSWER_SOURCES.inc(topic, source)
 
-def extract_answer(question, topic, knowledge_content):
-    """Extract answer from knowledge base using QA model"""
+def _extract_answer_uncached(question, sections):
+    """Extract the best answer across (topic, section) candidates using the QA model;
+    returns (answer, score, source, source topic)"""
     try:
-        # Find the section for the topic
-        sections = knowledge_content.split('\n\n')
-        topic_section = None
+        if not sections:
+            return None, 0, 'none', None
+        primary_topic, primary = sections[0]
         
-        for section in sections:
-            if section.startswith(topic):
-                topic_section = section
-                break
+        executor = qa_executor
+        if executor is None:
+            # Model not loaded (yet): serve the top section's opening sentence
+            return primary.fallback_answer, primary.fallback_score, 'fallback', primary_topic
         
-        if not topic_section:
-            return None, 0
+        # All candidate sections are queued together, so they share one batched forward pass
+        candidates = [section for _, section in sections]
         
-        # Use QA model to extract answer
-        result = qa_pipeline(
-            question=question,
-            context=topic_section,
-            max_answer_len=200,
-            handle_impossible_answer=True
-        )
+        # Cascade: keep the small model's answer when it is confident enough
+        cascade = cascade_executor
+        if cascade is not None:
+            best = best_section_answer(sections, cascade.answer_many(question, candidates))
+            if best and best[1] >= QA_CASCADE_THRESHOLD:
+                CASCADE_DECISIONS.inc('accepted')
+                return best[0], best[1], 'cascade', best[2]
+            CASCADE_DECISIONS.inc('escalated')
         
-        if result['score'] > 0.1 and result['answer']:
-            return result['answer'], result['score']
+        # Use QA model to extract answer (batched with concurrent requests)
+        best = best_section_answer(sections, executor.answer_many(question, candidates))
+        if best and best[1] > 0.1:
+            return best[0], best[1], 'model', best[2]
         
-        # Fallback: return the first meaningful part of the section
-        lines = topic_section.split('\n')
-        if len(lines) > 1:
-            content = ' '.join(lines[1:])  # Skip the title line
-            # Get first sentence or first 200 characters
-            first_sentence = re.split(r'[.!?]', content)[0]
-            if first_sentence and len(first_sentence.strip()) > 10:
-                return first_sentence.strip() + '.', 0.3
-            else:
-                return content[:200] + '...', 0.2
+        # Fallback: the first meaningful part of the top section, precomputed at load time
+        return primary.fallback_answer, primary.fallback_score, 'fallback', primary_topic
                 
     except Exception as e:
         print(f"Error extracting answer: {e}")
     
-    return None, 0
+    return None, 0, 'none', None
+
+TOPIC_ANALOGIES = {
+    'ARTIFICIAL INTELLIGENCE': "🤖 Imagine AI as building a robot brain that can learn and think like humans, but potentially faster and for very specific tasks!",
+    'MACHINE LEARNING': "🍎 Think of ML like teaching a child to recognize fruits - you show many examples, and soon they can identify new fruits they've never seen!",
+    'DEEP LEARNING': "🧠 Deep Learning is like having a team of experts where each expert looks for specific patterns, and they combine their knowledge to understand complex things!",
+    'CONVOLUTIONAL NEURAL NETWORKS': "👁️ CNNs are like giving computers super-powered eyes that can automatically detect edges, shapes, and objects in images!",
+    'AI ETHICS': "⚖️ AI Ethics is like having traffic rules for self-driving cars - without proper guidelines, AI could cause harm instead of helping society!",
+    'GENERATIVE AI': "🎨 Generative AI is like having a creative partner that can help you write stories, create art, or compose music based on patterns it has learned!"
+}
+DEFAULT_ANALOGY = "🚀 Think of this as technology that helps computers learn and make smart decisions, making our lives easier and more efficient!"
+
+TOPIC_EXAMPLES = {
+    'ARTIFICIAL INTELLIGENCE': "🌟 AI powers amazing technologies like: Self-driving cars navigating complex roads, Virtual assistants understanding your voice, Medical AI detecting diseases early, and Netflix recommending your next favorite show!",
+    'MACHINE LEARNING': "💫 ML is everywhere: Gmail filtering spam automatically, Banks detecting fraudulent transactions, Weather apps predicting storms days in advance, and Amazon suggesting products you'll love!",
+    'DEEP LEARNING': "🔥 Deep Learning enables: Facebook recognizing your friends in photos, Voice assistants understanding natural speech, Medical systems analyzing X-rays with expert accuracy, and Self-driving cars seeing and understanding their environment!",
+    'CONVOLUTIONAL NEURAL NETWORKS': "📸 CNNs power: Your phone's face unlock feature, Instagram filters that transform images, Security systems detecting intruders, and Medical imaging finding tiny abnormalities!",
+    'AI ETHICS': "🛡️ Ethical AI ensures: Hiring algorithms are fair to all candidates, Facial recognition works equally well for all skin tones, AI systems protect your privacy, and Technology benefits everyone in society!"
+}
+DEFAULT_EXAMPLES = "💡 This technology is used in countless applications that make our world smarter, safer, and more efficient every day!"
+
+TOPIC_KEY_POINTS = {
+    'ARTIFICIAL INTELLIGENCE': [
+        "🤖 Creates intelligent systems that can learn and adapt",
+        "💡 Powers technologies from voice assistants to self-driving cars", 
+        "🌍 Transforming industries and creating new possibilities",
+        "🚀 One of the most exciting fields in technology today!"
+    ],
+    'MACHINE LEARNING': [
+        "📊 Learns patterns from data automatically",
+        "🎯 Gets smarter with more examples and experience",
+        "⚡ Can process information faster than humans",
+        "💼 Used in finance, healthcare, entertainment, and more!"
+    ],
+    'DEEP LEARNING': [
+        "🧠 Uses multi-layer neural networks for complex tasks",
+        "👁️ Excellent for images, speech, and language understanding",
+        "📈 Performance improves dramatically with more data",
+        "🎨 Powers creative AI like image generation and music composition"
+    ]
+}
+DEFAULT_KEY_POINTS = [
+    "🚀 Helps solve complex problems automatically",
+    "💡 Makes technology more intelligent and responsive", 
+    "🌍 Used in applications that impact millions of people",
+    "🎯 Continuously learning and improving over time"
+]
+
+MOTIVATIONAL_FACTS = [
+    "💫 The AI market is growing exponentially - learning AI skills today could open amazing career opportunities tomorrow!",
+    "🚀 Many of the world's most valuable companies are AI-first companies - your AI knowledge could be your superpower!",
+    "🌍 AI is solving some of humanity's biggest challenges, from climate change to disease diagnosis!",
+    "🎯 The AI you're learning about today will shape the technology of tomorrow - you're learning the future!",
+    "💡 Many groundbreaking AI discoveries were made by people who started just like you - curious and eager to learn!",
+    "🌟 The field of AI is less than 70 years old, yet it's already transforming our world - imagine what's next!",
+    "🎨 AI is not just about technology - it's combining with art, music, and creativity in amazing ways!",
+    "🔄 The AI revolution is compared to the industrial revolution in its potential impact - and you're part of it!"
+]
 
 def get_engaging_analogy(topic):
     """Get engaging analogies for topics"""
-    analogies = {
-        'ARTIFICIAL INTELLIGENCE': "🤖 Imagine AI as building a robot brain that can learn and think like humans, but potentially faster and for very specific tasks!",
-        'MACHINE LEARNING': "🍎 Think of ML like teaching a child to recognize fruits - you show many examples, and soon they can identify new fruits they've never seen!",
-        'DEEP LEARNING': "🧠 Deep Learning is like having a team of experts where each expert looks for specific patterns, and they combine their knowledge to understand complex things!",
-        'CONVOLUTIONAL NEURAL NETWORKS': "👁️ CNNs are like giving computers super-powered eyes that can automatically detect edges, shapes, and objects in images!",
-        'AI ETHICS': "⚖️ AI Ethics is like having traffic rules for self-driving cars - without proper guidelines, AI could cause harm instead of helping society!",
-        'GENERATIVE AI': "🎨 Generative AI is like having a creative partner that can help you write stories, create art, or compose music based on patterns it has learned!"
-    }
-    return analogies.get(topic, "🚀 Think of this as technology that helps computers learn and make smart decisions, making our lives easier and more efficient!")
+    return TOPIC_ANALOGIES.get(topic, DEFAULT_ANALOGY)
 
 def get_exciting_examples(topic):
     """Get exciting real-world examples"""
-    examples = {
-        'ARTIFICIAL INTELLIGENCE': "🌟 AI powers amazing technologies like: Self-driving cars navigating complex roads, Virtual assistants understanding your voice, Medical AI detecting diseases early, and Netflix recommending your next favorite show!",
-        'MACHINE LEARNING': "💫 ML is everywhere: Gmail filtering spam automatically, Banks detecting fraudulent transactions, Weather apps predicting storms days in advance, and Amazon suggesting products you'll love!",
-        'DEEP LEARNING': "🔥 Deep Learning enables: Facebook recognizing your friends in photos, Voice assistants understanding natural speech, Medical systems analyzing X-rays with expert accuracy, and Self-driving cars seeing and understanding their environment!",
-        'CONVOLUTIONAL NEURAL NETWORKS': "📸 CNNs power: Your phone's face unlock feature, Instagram filters that transform images, Security systems detecting intruders, and Medical imaging finding tiny abnormalities!",
-        'AI ETHICS': "🛡️ Ethical AI ensures: Hiring algorithms are fair to all candidates, Facial recognition works equally well for all skin tones, AI systems protect your privacy, and Technology benefits everyone in society!"
-    }
-    return examples.get(topic, "💡 This technology is used in countless applications that make our world smarter, safer, and more efficient every day!")
+    return TOPIC_EXAMPLES.get(topic, DEFAULT_EXAMPLES)
 
 def get_interactive_key_points(topic):
     """Get interactive key points"""
-    points = {
-        'ARTIFICIAL INTELLIGENCE': [
-            "🤖 Creates intelligent systems that can learn and adapt",
-            "💡 Powers technologies from voice assistants to self-driving cars", 
-            "🌍 Transforming industries and creating new possibilities",
-            "🚀 One of the most exciting fields in technology today!"
-        ],
-        'MACHINE LEARNING': [
-            "📊 Learns patterns from data automatically",
-            "🎯 Gets smarter with more examples and experience",
-            "⚡ Can process information faster than humans",
-            "💼 Used in finance, healthcare, entertainment, and more!"
-        ],
-        'DEEP LEARNING': [
-            "🧠 Uses multi-layer neural networks for complex tasks",
-            "👁️ Excellent for images, speech, and language understanding",
-            "📈 Performance improves dramatically with more data",
-            "🎨 Powers creative AI like image generation and music composition"
-        ]
-    }
-    return points.get(topic, [
-        "🚀 Helps solve complex problems automatically",
-        "💡 Makes technology more intelligent and responsive", 
-        "🌍 Used in applications that impact millions of people",
-        "🎯 Continuously learning and improving over time"
-    ])
+    return TOPIC_KEY_POINTS.get(topic, DEFAULT_KEY_POINTS)
 
 def get_motivational_fact():
     """Get motivational facts about AI"""
-    facts = [
-        "💫 The AI market is growing exponentially - learning AI skills today could open amazing career opportunities tomorrow!",
-        "🚀 Many of the world's most valuable companies are AI-first companies - your AI knowledge could be your superpower!",
-        "🌍 AI is solving some of humanity's biggest challenges, from climate change to disease diagnosis!",
-        "🎯 The AI you're learning about today will shape the technology of tomorrow - you're learning the future!",
-        "💡 Many groundbreaking AI discoveries were made by people who started just like you - curious and eager to learn!",
-        "🌟 The field of AI is less than 70 years old, yet it's already transforming our world - imagine what's next!",
-        "🎨 AI is not just about technology - it's combining with art, music, and creativity in amazing ways!",
-        "🔄 The AI revolution is compared to the industrial revolution in its potential impact - and you're part of it!"
-    ]
-    return random.choice(facts)
+    return random.choice(MOTIVATIONAL_FACTS)
 
 def create_progress_tracker(companion):
     """Create a progress tracker"""
-    topics_explored = len(companion.user_progress['topics_explored'])
+    topics_explored = len(companion.topics_explored)
     
     progress_html = f'''
     <div class="progress-tracker">
         <h3>📊 Your Learning Progress</h3>
         <p><strong>Topics Explored:</strong> {topics_explored}</p>
-        <p><strong>Quizzes Taken:</strong> {companion.user_progress['quizzes_taken']}</p>
-        <p><strong>Challenges Completed:</strong> {companion.user_progress['challenges_completed']}</p>
+        <p><strong>Quizzes Taken:</strong> {companion.quizzes_taken}</p>
+        <p><strong>Challenges Completed:</strong> {companion.challenges_completed}</p>
         <div style="background: linear-gradient(90deg, #3498db {min(topics_explored*10, 100)}%, #ecf0f1 {min(topics_explored*10, 100)}%); 
                     height: 20px; border-radius: 10px; margin: 10px 0;"></div>
         <p>Keep going! Every topic you explore brings you closer to AI mastery! 🚀</p>
@@ -1072,35 +3166,92 @@ def create_progress_tracker(companion):
     return progress_html
 
 # --------- Enhanced Question Processing ---------
-def generate_impressive_response(question, knowledge_content, user_level='beginner', message_count=0):
-    """Generate impressive, interactive responses"""
-    
-    # Handle special interactive commands first
+def classify_question(question, knowledge_base):
+    """Decide how a question is answered: returns (kind, topic, topic_score, candidates) where
+    kind is greeting, quiz, learning_path, help, topic or unrelated; only topic needs the QA
+    model, which searches the candidate topics (best first, topic among them)"""
+    started = time.perf_counter()
+    kind, topic, topic_score, candidates = _classify_question(question, knowledge_base)
+    ROUTING_SECONDS.observe(time.perf_counter() - started, kind, topic or '')
+    return kind, topic, topic_score, candidates
+
+# Whole words only: 'hi' is inside 'machine' and 'architecture'
+GREETING_PATTERN = re.compile(r'\b(?:hi|hello|hey|greetings)\b')
+
+def _classify_question(question, knowledge_base):
     question_lower = question.lower().strip()
     
-    if any(cmd in question_lower for cmd in ['hi', 'hello', 'hey', 'greetings']):
-        greeting = companion.get_personalized_greeting()
-        return f'''
-        <div class="info-card">
-            <h3>{greeting}</h3>
-            <p>I'm your AI Learning Companion, here to make your journey into artificial intelligence exciting and engaging!</p>
-            {create_progress_tracker(companion)}
+    # Special interactive commands first
+    if GREETING_PATTERN.search(question_lower):
+        return 'greeting', None, 0, ()
+    if any(cmd in question_lower for cmd in ['quiz', 'test', 'challenge']):
+        return 'quiz', None, 0, ()
+    if any(cmd in question_lower for cmd in ['learning path', 'progress', 'what should i learn']):
+        return 'learning_path', None, 0, ()
+    if any(cmd in question_lower for cmd in ['help', 'what can you do']):
+        return 'help', None, 0, ()
+    
+    topics = find_relevant_topics(question, knowledge_base)
+    if not topics or topics[0][1] == 0:
+        return 'unrelated', None, 0, ()
+    topic, topic_score = topics[0]
+    return 'topic', topic, topic_score, tuple(name for name, _ in topics)
+
+def generate_impressive_response(question, knowledge_base, companion, user_level='beginner', message_count=0,
+                                 classification=None):
+    """Generate impressive, interactive responses"""
+    kind, topic, topic_score, candidates = classification or classify_question(question, knowledge_base)
+    _request_timings.inference = 0.0
+    started = time.perf_counter()
+    response = _render_response(question, knowledge_base, companion, user_level, kind, topic, candidates)
+    record_response(kind, topic, time.perf_counter() - started - _request_timings.inference, response)
+    return response
+
+def record_response(kind, topic, render_seconds, html):
+    ASK_REQUESTS.inc(kind, topic or '')
+    RENDER_SECONDS.observe(render_seconds, kind, topic or '')
+    RESPONSE_BYTES.observe(len(html.encode('utf-8')), kind)
+
+GREETING_BUTTONS_HTML = '''
             <div class="interactive-buttons">
                 <button class="interactive-btn" onclick="askQuestion('What is AI?')">Start Learning</button>
                 <button class="interactive-btn" onclick="askQuestion('Show me cool AI applications')">See Amazing AI</button>
                 <button class="interactive-btn" onclick="askQuestion('Take a quiz')">Test My Knowledge</button>
+            </div>'''
+
+UNRELATED_HTML = '''
+        <div class="unrelated-warning">
+            <h3>🎯 Let's Explore AI Together!</h3>
+            <p>I specialize in making Artificial Intelligence and Machine Learning concepts fun and easy to understand!</p>
+            <div class="interactive-buttons">
+                <button class="interactive-btn" onclick="askQuestion('What is AI?')">AI Basics</button>
+                <button class="interactive-btn" onclick="askQuestion('Machine Learning examples')">ML Examples</button>
+                <button class="interactive-btn" onclick="askQuestion('Take a quiz')">Quick Quiz</button>
+                <button class="interactive-btn" onclick="askQuestion('Learning path')">My Path</button>
             </div>
         </div>
         '''
+
+def _render_response(question, knowledge_base, companion, user_level, kind, topic, candidates):
     
-    if any(cmd in question_lower for cmd in ['quiz', 'test', 'challenge']):
-        companion.user_progress['quizzes_taken'] += 1
+    if kind == 'greeting':
+        greeting = companion.get_personalized_greeting()
+        return f'''
+        <div class="info-card">
+            <h3>{greeting}</h3>
+            <p>I'm your AI Learning Companion, here to make your journey into artificial intelligence exciting and engaging!</p>
+            {create_progress_tracker(companion)}{GREETING_BUTTONS_HTML}
+        </div>
+        '''
+    
+    if kind == 'quiz':
+        companion.quizzes_taken += 1
         return create_interactive_quiz(user_level)
     
-    if any(cmd in question_lower for cmd in ['learning path', 'progress', 'what should i learn']):
+    if kind == 'learning_path':
         return create_learning_path(companion)
     
-    if any(cmd in question_lower for cmd in ['help', 'what can you do']):
+    if kind == 'help':
         return '''
         <div class="info-card">
             <h3>🎯 How I Can Help You Learn AI</h3>
@@ -1117,81 +3268,263 @@ def generate_impressive_response(question, knowledge_content, user_level='beginn
         </div>
         '''
     
-    # Find relevant topic
-    topic, topic_score = find_relevant_topic(question, knowledge_content)
-    
-    if not topic or topic_score == 0:
-        return '''
-        <div class="unrelated-warning">
-            <h3>🎯 Let's Explore AI Together!</h3>
-            <p>I specialize in making Artificial Intelligence and Machine Learning concepts fun and easy to understand!</p>
-            <div class="interactive-buttons">
-                <button class="interactive-btn" onclick="askQuestion('What is AI?')">AI Basics</button>
-                <button class="interactive-btn" onclick="askQuestion('Machine Learning examples')">ML Examples</button>
-                <button class="interactive-btn" onclick="askQuestion('Take a quiz')">Quick Quiz</button>
-                <button class="interactive-btn" onclick="askQuestion('Learning path')">My Path</button>
-            </div>
-        </div>
-        '''
+    if kind == 'unrelated':
+        return UNRELATED_HTML
     
     # Track user interaction
     companion.track_interaction(topic, 'question')
     
-    # Extract answer from knowledge base
-    answer, confidence = extract_answer(question, topic, knowledge_content)
+    # Extract answer from knowledge base; a runner-up section may hold the best span
+    answer, confidence, source_topic = extract_answer(question, topic, knowledge_base, candidates)
+    topic = source_topic or topic
     
+    return render_topic_response(topic, knowledge_base, render_answer_card(topic, answer),
+                                 create_progress_tracker(companion))
+
+def render_answer_card(topic, answer):
+    """The extracted answer card: the only part of a topic response that needs the QA model"""
     if not answer:
         answer = f"{topic} represents one of the most exciting areas in technology today, helping computers solve complex problems and learn from experience!"
-    
-    # Generate impressive response
-    response = f'''
-    <div class="answer-box">
-        <div class="topic-badge">{topic}</div>
-        
+    return f'''
         <div class="info-card">
             <h3>📚 Here's What You Asked About:</h3>
             <p>{answer}</p>
         </div>
-        
-        <div class="info-card">
-            <h3>💡 Making It Simple:</h3>
-            <p>{get_engaging_analogy(topic)}</p>
-        </div>
-        
-        <div class="key-points-card">
-            <h3>🎯 Key Insights:</h3>
-            {"".join([f'• {point}<br>' for point in get_interactive_key_points(topic)])}
-        </div>
-        
-        <div class="example-card">
-            <h3>🌍 Real-World Impact:</h3>
-            <p>{get_exciting_examples(topic)}</p>
-        </div>
-        
-        <div class="fun-fact-card">
-            <h3>🌟 Motivational Moment:</h3>
-            <p>{get_motivational_fact()}</p>
+        '''
+
+def render_topic_response(topic, knowledge_base, answer_html, progress_html):
+    """Assemble a topic answer from its pre-rendered fragments and the dynamic slots"""
+    fragments = knowledge_base.fragments.get(topic)
+    return ''.join((fragments.head, answer_html, fragments.cards,
+                    random.choice(knowledge_base.fragments.fact_cards), progress_html, fragments.tail))
+
+# Slots the streaming client fills in as their parts arrive
+STREAM_ANSWER_PLACEHOLDER = '''
+        <div class="info-card" data-slot="answer">
+            <h3>📚 Here's What You Asked About:</h3>
+            <div class="typing-indicator">
+                <div class="typing-dot"></div>
+                <div class="typing-dot"></div>
+                <div class="typing-dot"></div>
+            </div>
         </div>
+        '''
+STREAM_PROGRESS_PLACEHOLDER = '<div data-slot="progress"></div>'
+
+def stream_impressive_response(question, knowledge_base, companion, user_level='beginner', message_count=0,
+                               classification=None):
+    """Yield (event, payload) pairs for /ask/stream: everything that needs no model first,
+    then the extracted answer once inference completes, then the progress tracker"""
+    classification = classification or classify_question(question, knowledge_base)
+    kind, topic, topic_score, candidates = classification
+    if kind != 'topic':
+        yield 'message', {'html': generate_impressive_response(
+            question, knowledge_base, companion, user_level, message_count, classification)}
+        yield 'done', {}
+        return
+    
+    companion.track_interaction(topic, 'question')
+    started = time.perf_counter()
+    skeleton = render_topic_response(topic, knowledge_base, STREAM_ANSWER_PLACEHOLDER, STREAM_PROGRESS_PLACEHOLDER)
+    render_seconds = time.perf_counter() - started
+    yield 'message', {'html': skeleton}
+    
+    answer, confidence, source_topic = extract_answer(question, topic, knowledge_base, candidates)
+    started = time.perf_counter()
+    answer_card = render_answer_card(source_topic or topic, answer)
+    progress = create_progress_tracker(companion)
+    record_response(kind, topic, render_seconds + time.perf_counter() - started, skeleton + answer_card + progress)
+    yield 'answer', {'html': answer_card}
+    yield 'progress', {'html': progress}
+    yield 'done', {}
+
+def format_sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+# --------- Batch Answering ---------
+# /ask/batch answers a whole list of questions (e.g. a lesson plan) in one request.
+# Every question is routed up front; greetings, quizzes and the like render inline,
+# topic questions go to the inference pool sorted by their candidate sections, so the
+# batching executor runs same-section questions together in full batches.
+def parse_batch_request(data):
+    """Validate an /ask/batch body; returns (items, user_level, error, status)"""
+    if not isinstance(data, dict) or not isinstance(data.get('questions'), list):
+        return None, None, "Expected a JSON object with a 'questions' list", 400
+    if not data['questions']:
+        return None, None, "No questions given", 400
+    if len(data['questions']) > ASK_BATCH_MAX_QUESTIONS:
+        return None, None, f"At most {ASK_BATCH_MAX_QUESTIONS} questions per batch", 413
+    return data['questions'], data.get('user_level', 'beginner'), None, 200
+
+def wants_ndjson(data, accept):
+    return data.get('format') == 'ndjson' or 'application/x-ndjson' in (accept or '')
+
+def _batch_result(index, item, **fields):
+    result = {'index': index}
+    if isinstance(item, dict) and 'id' in item:
+        result['id'] = item['id']
+    result.update(fields)
+    return result
+
+def _answer_batch_item(question, knowledge_base, user_level, classification):
+    # A fresh companion per item: bulk answers don't count towards any learner's progress
+    return generate_impressive_response(question, knowledge_base, LearningCompanion(), user_level, 0, classification)
+
+def answer_batch_questions(items, knowledge_base, user_level='beginner'):
+    """Yield one result per item as it completes. Items are question strings or objects with
+    'question' and optional 'user_level' and 'id'; failed items yield success False and an error"""
+    pending = []
+    for index, item in enumerate(items):
+        question = item.get('question') if isinstance(item, dict) else item
+        if not isinstance(question, str) or not question.strip():
+            yield _batch_result(index, item, success=False, error='Please ask a question.')
+            continue
+        question = question.strip()
+        level = item.get('user_level', user_level) if isinstance(item, dict) else user_level
+        try:
+            classification = classify_question(question, knowledge_base)
+            if classification[0] == 'topic':
+                pending.append((classification[3], index, item, question, level, classification))
+                continue
+            answer = _answer_batch_item(question, knowledge_base, level, classification)
+            yield _batch_result(index, item, success=True, question=question, kind=classification[0],
+                                topic=None, answer=answer)
+        except Exception as e:
+            print(f"Error processing question: {e}")
+            ASK_ERRORS.inc('/ask/batch')
+            yield _batch_result(index, item, success=False, question=question, error='Could not answer this question.')
+    
+    # Questions over the same sections are queued next to each other so they share batches
+    pending.sort(key=lambda entry: (entry[0], entry[1]))
+    pool = _get_inference_pool()
+    futures = {pool.submit(_answer_batch_item, question, knowledge_base, level, classification):
+               (index, item, question, classification)
+               for _, index, item, question, level, classification in pending}
+    for future in as_completed(futures):
+        index, item, question, classification = futures[future]
+        try:
+            yield _batch_result(index, item, success=True, question=question, kind='topic',
+                                topic=classification[1], answer=future.result())
+        except Exception as e:
+            print(f"Error processing question: {e}")
+            ASK_ERRORS.inc('/ask/batch')
+            yield _batch_result(index, item, success=False, question=question, error='Could not answer this question.')
+
+# --------- Load Knowledge Base ---------
+_kb_load_started = time.monotonic()
+KNOWLEDGE_BASE = load_knowledge_base()
+_record_phase('knowledge_base', _kb_load_started)
+start_model_loading(KNOWLEDGE_BASE)
+
+# --------- Knowledge Base Hot Reload ---------
+# A reload builds a complete new snapshot next to the live one, reusing unchanged
+# sections (and their tokenized contexts), the topic matcher, BM25 index and
+# fragments where they are unaffected, then swaps the KNOWLEDGE_BASE reference.
+# Requests hold on to the snapshot they started with, so none sees a partial update.
+_reload_lock = threading.Lock()
+_watcher_pid = None
+reload_status = {'reloads': 0, 'last': None, 'error': None}
+
+def reload_knowledge_base():
+    """Reload knowledge_base.txt if its content changed; returns a summary of the diff"""
+    global KNOWLEDGE_BASE
+    with _reload_lock:
+        started = time.monotonic()
+        previous = KNOWLEDGE_BASE
+        try:
+            knowledge_base = load_knowledge_base(previous)
+        except Exception as e:
+            # Keep serving the previous snapshot until the file is readable again
+            reload_status['error'] = str(e)
+            raise
+        reload_status['error'] = None
+        if knowledge_base.version == previous.version:
+            return {'changed': False, 'version': previous.version}
         
-        {create_progress_tracker(companion)}
+        executor = qa_executor
+        if executor is not None:
+            # Tokenize only the new and edited sections before they can be asked about
+            model_status['contexts'] = executor.engine.encode_knowledge_base(knowledge_base)
+        if cascade_executor is not None:
+            cascade_executor.engine.encode_knowledge_base(knowledge_base)
         
-        <div class="interactive-buttons">
-            <button class="interactive-btn" onclick="askQuestion('quiz')">Test My Knowledge 🎯</button>
-            <button class="interactive-btn" onclick="askQuestion('What is next?')">Continue Learning 📚</button>
-            <button class="interactive-btn" onclick="askQuestion('More about {topic}')">Dive Deeper 🔍</button>
-        </div>
-    </div>
-    '''
+        headings, previous_headings = set(knowledge_base.sections), set(previous.sections)
+        summary = {
+            'changed': True,
+            'version': knowledge_base.version,
+            'previous_version': previous.version,
+            'added': sorted(headings - previous_headings),
+            'removed': sorted(previous_headings - headings),
+            'edited': sorted(heading for heading in headings & previous_headings
+                             if not knowledge_base.same_section(heading, previous)),
+            'reused_sections': knowledge_base.reused_sections,
+            'reload_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+        KNOWLEDGE_BASE = knowledge_base
+        reload_status['reloads'] += 1
+        reload_status['last'] = summary
+        print(f"🔄 Knowledge base reloaded ({previous.version} → {knowledge_base.version}): "
+              f"{len(summary['added'])} added, {len(summary['edited'])} edited, "
+              f"{len(summary['removed'])} removed in {summary['reload_ms']} ms")
+        return summary
+
+def reload_knowledge_base_logged():
+    try:
+        reload_knowledge_base()
+    except Exception as e:
+        print(f"❌ Error reloading knowledge base: {e}")
+
+def broadcast_reload():
+    """In a pre-fork worker, have the master reload and fan the reload out to every worker"""
+    if worker_index is not None:
+        os.kill(os.getppid(), signal.SIGHUP)
+
+def _watch_knowledge_base(interval):
+    def signature():
+        try:
+            stat = os.stat(KNOWLEDGE_BASE_PATH)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
     
-    return response
+    last = signature()
+    while True:
+        time.sleep(interval)
+        current = signature()
+        if current == last:
+            continue
+        last = current
+        reload_knowledge_base_logged()
 
-# --------- Load Knowledge Base ---------
-KNOWLEDGE_CONTENT = load_knowledge_base()
+def start_knowledge_base_watcher():
+    """Start polling knowledge_base.txt in this process (once per process, also after fork)"""
+    global _watcher_pid
+    if KB_WATCH_INTERVAL_SECONDS <= 0 or _watcher_pid == os.getpid():
+        return
+    _watcher_pid = os.getpid()
+    threading.Thread(target=_watch_knowledge_base, args=(KB_WATCH_INTERVAL_SECONDS,),
+                     name='kb-watcher', daemon=True).start()
+
+def admin_authorized(headers):
+    if not ADMIN_TOKEN:
+        return False
+    return secrets.compare_digest(headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
 
 # --------- Flask Routes ---------
 @app.route('/')
 def home():
-    return render_template_string(HTML_TEMPLATE)
+    return asset_response(PAGE_ASSETS['/'])
+
+@app.route('/assets/<name>')
+def static_asset(name):
+    asset = PAGE_ASSETS.get(f'/assets/{name}')
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    return asset_response(asset)
+
+def asset_response(asset):
+    status, body, headers = asset.respond(request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match'))
+    return Response(body, status=status, headers=headers)
 
 @app.route('/ask', methods=['POST'])
 def ask_question():
@@ -1207,7 +3540,9 @@ def ask_question():
         print(f"💭 Question: {question}")
         
         # Generate impressive answer
-        answer = generate_impressive_response(question, KNOWLEDGE_CONTENT, user_level, message_count)
+        companion = current_companion()
+        answer = generate_impressive_response(question, KNOWLEDGE_BASE, companion, user_level, message_count)
+        save_current_companion(companion)
         
         return jsonify({
             'success': True,
@@ -1216,9 +3551,94 @@ def ask_question():
         
     except Exception as e:
         print(f"Error processing question: {e}")
+        ASK_ERRORS.inc('/ask')
         return jsonify({
             'success': False,
-            'answer': '''
+            'answer': ASK_ERROR_HTML
+        })
+
+@app.route('/ask/stream')
+def ask_stream():
+    """Server-Sent Events variant of /ask: cards render as soon as their parts are ready"""
+    question = request.args.get('question', '').strip()
+    message_count = request.args.get('message_count', 0, type=int)
+    user_level = request.args.get('user_level', 'beginner')
+    companion = current_companion()
+    
+    def events():
+        if not question:
+            yield format_sse('message', {'html': 'Please ask a question.'})
+            yield format_sse('done', {})
+            return
+        print(f"💭 Question: {question}")
+        try:
+            for event, payload in stream_impressive_response(question, KNOWLEDGE_BASE, companion, user_level, message_count):
+                yield format_sse(event, payload)
+        except Exception as e:
+            print(f"Error processing question: {e}")
+            ASK_ERRORS.inc('/ask/stream')
+            yield format_sse('message', {'html': ASK_ERROR_HTML})
+            yield format_sse('done', {})
+        save_current_companion(companion)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    """Answer a list of questions: JSON results in input order, or NDJSON lines as each completes"""
+    # Bound the read itself too: chunked requests carry no Content-Length
+    body = b''
+    if (request.content_length or 0) <= ASK_BATCH_MAX_BODY_BYTES:
+        body = request.stream.read(ASK_BATCH_MAX_BODY_BYTES + 1)
+    if (request.content_length or 0) > ASK_BATCH_MAX_BODY_BYTES or len(body) > ASK_BATCH_MAX_BODY_BYTES:
+        return jsonify({'success': False, 'error': 'Request body too large'}), 413
+    try:
+        data = json.loads(body) if request.is_json else None
+    except ValueError:
+        data = None
+    items, user_level, error, status = parse_batch_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), status
+    
+    print(f"💭 Batch of {len(items)} questions")
+    results = answer_batch_questions(items, KNOWLEDGE_BASE, user_level)
+    if wants_ndjson(data, request.headers.get('Accept')):
+        return Response((json.dumps(result) + '\n' for result in results), mimetype='application/x-ndjson')
+    return jsonify({'success': True, 'results': sorted(results, key=lambda result: result['index'])})
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Reload the knowledge base now (in every worker) instead of waiting for the watcher"""
+    if not admin_authorized(request.headers):
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        summary = reload_knowledge_base()
+        broadcast_reload()
+        return jsonify(summary)
+    except Exception as e:
+        print(f"❌ Error reloading knowledge base: {e}")
+        return jsonify({'changed': False, 'error': str(e)}), 500
+
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health')
+def health():
+    return jsonify(health_payload(companion_store.peek(session.get('companion_id'))))
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: the model is loaded and warm; 503 until then"""
+    return jsonify(readiness_payload()), 200 if model_ready.is_set() else 503
+
+ASK_ERROR_HTML = '''
             <div class="unrelated-warning">
                 <h3>😅 Oops! Let's try that again</h3>
                 <p>I encountered a small issue. How about we explore something amazing about AI instead?</p>
@@ -1228,27 +3648,649 @@ def ask_question():
                 </div>
             </div>
             '''
-        })
 
-@app.route('/health')
-def health():
-    sections = [s for s in KNOWLEDGE_CONTENT.split('\n\n') if s.strip()]
-    topics = [s.split('\n')[0] for s in sections if s.split('\n')[0]]
-    
-    return jsonify({
+def health_payload(companion):
+    return {
         'status': 'healthy',
-        'topics_loaded': len(topics),
-        'user_progress': companion.user_progress,
-        'model': MODEL_NAME
+        'topics_loaded': len(KNOWLEDGE_BASE),
+        'categories_loaded': len(KNOWLEDGE_BASE.categories),
+        'knowledge_version': KNOWLEDGE_BASE.version,
+        'knowledge_storage': KNOWLEDGE_BASE.storage_stats(),
+        'precompiled_answers': len(KNOWLEDGE_BASE.precompiled),
+        'retrieval': KNOWLEDGE_BASE.retriever.stats(),
+        'reload': reload_status,
+        'user_progress': companion.user_progress if companion else LearningCompanion().user_progress,
+        'sessions': companion_store.stats(),
+        'model': MODEL_NAME,
+        'backend': QA_BACKEND,
+        'model_status': model_status,
+        'inference': qa_executor.stats() if qa_executor else None,
+        'cascade': {
+            'model': QA_CASCADE_MODEL,
+            'threshold': QA_CASCADE_THRESHOLD,
+            'inference': cascade_executor.stats()
+        } if cascade_executor else None,
+        'answer_cache': answer_cache.stats(),
+        'single_flight': answer_flights.stats(),
+        'process': {'pid': os.getpid(), 'worker': worker_index, 'memory': process_memory()}
+    }
+
+def process_memory(pid='self'):
+    """Rss, Pss, shared and private memory of a process in MB, from /proc/<pid>/smaps_rollup (Linux)"""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return None
+    
+    def mb(*names):
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+    return {
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+        'private_mb': mb('Private_Clean', 'Private_Dirty')
+    }
+
+def readiness_payload():
+    return {
+        'status': 'ready' if model_ready.is_set() else 'not_ready',
+        'phase': model_status['phase'],
+        'error': model_status['error'],
+        'timings_ms': model_status['timings_ms']
+    }
+
+# --------- ASGI Serving ---------
+# Same '/', '/ask' and '/health' contract as the Flask app, on an event loop: cheap
+# answers (greetings, quizzes, help, learning paths) never wait behind QA inference,
+# which runs on a bounded thread pool. Serve with `python new.py --asgi` or any ASGI
+# server, e.g. `uvicorn new:asgi_app`.
+_inference_pool = None
+_inference_pool_pid = None
+
+def _get_inference_pool():
+    global _inference_pool, _inference_pool_pid
+    if _inference_pool is None or _inference_pool_pid != os.getpid():
+        # Same as the offline pool: pre-fork workers must not reuse the parent's threadless pool
+        _inference_pool = ThreadPoolExecutor(max_workers=ASGI_INFERENCE_THREADS, thread_name_prefix='asgi-inference')
+        _inference_pool_pid = os.getpid()
+    return _inference_pool
+
+class BodyTooLarge(ValueError):
+    pass
+
+async def _read_body(receive, max_bytes=ASGI_MAX_BODY_BYTES):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > max_bytes:
+            raise BodyTooLarge('Request body too large')
+        if not message.get('more_body'):
+            return body
+
+async def _send_response(send, status, body, content_type='application/json', headers=()):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode('utf-8')
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode('latin-1')),
+                    (b'content-length', str(len(body)).encode('latin-1'))] + list(headers)
     })
+    await send({'type': 'http.response.body', 'body': body})
+
+def _asgi_session(scope):
+    """Read the Flask-compatible signed session cookie; returns (session dict, cookie header or None)"""
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie_name = app.config['SESSION_COOKIE_NAME']
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    data = {}
+    if cookie_name in cookies:
+        try:
+            data = serializer.loads(cookies[cookie_name].value,
+                                    max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except Exception:
+            data = {}
+    if data.get('companion_id'):
+        return data, None
+    data['companion_id'] = companion_store.new_session_id()
+    cookie = f"{cookie_name}={serializer.dumps(data)}; HttpOnly; Path=/; SameSite=Lax"
+    return data, (b'set-cookie', cookie.encode('latin-1'))
+
+async def _asgi_ask(scope, receive, send):
+    session_data, cookie_header = _asgi_session(scope)
+    headers = [cookie_header] if cookie_header else []
+    try:
+        data = json.loads(await _read_body(receive) or b'{}')
+        question = data.get('question', '').strip()
+        message_count = data.get('message_count', 0)
+        user_level = data.get('user_level', 'beginner')
+        
+        if not question:
+            return await _send_response(send, 200, {'success': False, 'answer': 'Please ask a question.'}, headers=headers)
+        
+        print(f"💭 Question: {question}")
+        
+        # The shared store reads and writes SQLite; keep that off the event loop too
+        loop = asyncio.get_running_loop()
+        companion = await loop.run_in_executor(None, companion_store.get, session_data['companion_id'])
+        classification = classify_question(question, KNOWLEDGE_BASE)
+        args = (question, KNOWLEDGE_BASE, companion, user_level, message_count, classification)
+        if classification[0] == 'topic':
+            # Only topic questions reach the QA model; keep them off the event loop
+            answer = await loop.run_in_executor(_get_inference_pool(), generate_impressive_response, *args)
+        else:
+            answer = generate_impressive_response(*args)
+        await loop.run_in_executor(None, companion_store.save, session_data['companion_id'], companion)
+        await _send_response(send, 200, {'success': True, 'answer': answer}, headers=headers)
+    except BodyTooLarge as e:
+        await _send_response(send, 413, {'success': False, 'answer': str(e)}, headers=headers)
+    except Exception as e:
+        print(f"Error processing question: {e}")
+        ASK_ERRORS.inc('/ask')
+        await _send_response(send, 200, {'success': False, 'answer': ASK_ERROR_HTML}, headers=headers)
+
+async def _asgi_ask_stream(scope, send):
+    session_data, cookie_header = _asgi_session(scope)
+    headers = [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+    if cookie_header:
+        headers.append(cookie_header)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    
+    async def send_event(event, payload):
+        await send({'type': 'http.response.body', 'body': format_sse(event, payload).encode('utf-8'), 'more_body': True})
+    
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    question = params.get('question', [''])[0].strip()
+    user_level = params.get('user_level', ['beginner'])[0]
+    try:
+        message_count = int(params.get('message_count', ['0'])[0])
+    except ValueError:
+        message_count = 0
+    
+    if not question:
+        await send_event('message', {'html': 'Please ask a question.'})
+        await send_event('done', {})
+    else:
+        print(f"💭 Question: {question}")
+        try:
+            loop = asyncio.get_running_loop()
+            companion = await loop.run_in_executor(None, companion_store.get, session_data['companion_id'])
+            events = stream_impressive_response(question, KNOWLEDGE_BASE, companion, user_level, message_count)
+            while True:
+                # The step that extracts the answer blocks on inference; run every step off the loop
+                item = await loop.run_in_executor(_get_inference_pool(), next, events, None)
+                if item is None:
+                    break
+                await send_event(*item)
+            await loop.run_in_executor(None, companion_store.save, session_data['companion_id'], companion)
+        except Exception as e:
+            print(f"Error processing question: {e}")
+            ASK_ERRORS.inc('/ask/stream')
+            await send_event('message', {'html': ASK_ERROR_HTML})
+            await send_event('done', {})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _asgi_ask_batch(scope, receive, send):
+    try:
+        data = json.loads(await _read_body(receive, ASK_BATCH_MAX_BODY_BYTES) or b'{}')
+    except BodyTooLarge as e:
+        return await _send_response(send, 413, {'success': False, 'error': str(e)})
+    except ValueError as e:
+        return await _send_response(send, 400, {'success': False, 'error': str(e)})
+    items, user_level, error, status = parse_batch_request(data)
+    if error:
+        return await _send_response(send, status, {'success': False, 'error': error})
+    
+    print(f"💭 Batch of {len(items)} questions")
+    accept = dict(scope.get('headers', [])).get(b'accept', b'').decode('latin-1')
+    results = answer_batch_questions(items, KNOWLEDGE_BASE, user_level)
+    loop = asyncio.get_running_loop()
+    # Each step waits on inference pool futures, so step from the loop's default executor
+    # rather than the inference pool itself
+    if not wants_ndjson(data, accept):
+        collected = await loop.run_in_executor(None, list, results)
+        return await _send_response(send, 200, {'success': True,
+                                                'results': sorted(collected, key=lambda result: result['index'])})
+    
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/x-ndjson')]})
+    while True:
+        result = await loop.run_in_executor(None, next, results, None)
+        if result is None:
+            break
+        await send({'type': 'http.response.body', 'body': (json.dumps(result) + '\n').encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _send_asset(scope, send, asset):
+    request_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    status, body, headers = asset.respond(request_headers.get('accept-encoding'), request_headers.get('if-none-match'))
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+async def _asgi_admin_reload(scope, send):
+    headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    if not admin_authorized(headers):
+        return await _send_response(send, 403, {'error': 'Forbidden'})
+    try:
+        summary = await asyncio.get_running_loop().run_in_executor(_get_inference_pool(), reload_knowledge_base)
+        broadcast_reload()
+        await _send_response(send, 200, summary)
+    except Exception as e:
+        print(f"❌ Error reloading knowledge base: {e}")
+        await _send_response(send, 500, {'changed': False, 'error': str(e)})
+
+async def asgi_app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                start_knowledge_base_watcher()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if _inference_pool is not None:
+                    _inference_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    
+    path, method = scope['path'], scope['method']
+    if path in PAGE_ASSETS and method in ('GET', 'HEAD'):
+        await _send_asset(scope, send, PAGE_ASSETS[path])
+    elif path == '/ask' and method == 'POST':
+        await _asgi_ask(scope, receive, send)
+    elif path == '/ask/stream' and method == 'GET':
+        await _asgi_ask_stream(scope, send)
+    elif path == '/ask/batch' and method == 'POST':
+        await _asgi_ask_batch(scope, receive, send)
+    elif path == '/admin/reload' and method == 'POST':
+        await _asgi_admin_reload(scope, send)
+    elif path == '/metrics' and method == 'GET':
+        await _send_response(send, 200, render_metrics(), 'text/plain; version=0.0.4; charset=utf-8')
+    elif path == '/health' and method == 'GET':
+        session_data, _ = _asgi_session(scope)
+        payload = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: health_payload(companion_store.peek(session_data['companion_id'])))
+        await _send_response(send, 200, payload)
+    elif path == '/health/live' and method == 'GET':
+        await _send_response(send, 200, {'status': 'alive'})
+    elif path == '/health/ready' and method == 'GET':
+        await _send_response(send, 200 if model_ready.is_set() else 503, readiness_payload())
+    else:
+        await _send_response(send, 404, {'error': 'Not found'})
+
+def run_asgi(host, port):
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ ASGI mode requires uvicorn: pip install uvicorn")
+        sys.exit(1)
+    uvicorn.run(asgi_app, host=host, port=port, log_level='warning', backlog=4096)
+
+# --------- Offline Batch Answering ---------
+# `python new.py --answer-jsonl questions.jsonl` answers a JSONL file (or stdin) without
+# serving HTTP, through the same classify_question and extract_answer path as /ask. The
+# model is loaded once in the parent and shared with forked worker processes. Input is
+# read in chunks with a bounded number in flight, so memory stays flat however long the
+# file is, and answers are written in input order.
+OFFLINE_CHUNK_SIZE = 256
+_offline_pool = None  # Per process: threads that keep the batching executor's batches full
+_offline_pool_pid = None
+
+def answer_offline(line_number, line, knowledge_base):
+    """Answer one JSONL input line ('question', 'title' or 'body' field); returns the output record"""
+    started = time.perf_counter()
+    result = {'line': line_number}
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError('Expected a JSON object')
+        for key in ('id', 'request_id'):
+            if key in record:
+                result[key] = record[key]
+        question = record.get('question') or record.get('title') or record.get('body')
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError('No question')
+        
+        question = question.strip()
+        kind, topic, topic_score, candidates = classify_question(question, knowledge_base)
+        result.update(question=question, kind=kind, topic=topic)
+        if kind == 'topic':
+            answer, score, source_topic, source, fallback = extract_answer_details(question, topic, knowledge_base,
+                                                                                  candidates)
+            result.update(source_topic=source_topic, answer=answer, score=round(float(score), 4),
+                          source=source, fallback=fallback)
+    except Exception as e:
+        result['error'] = str(e)
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+def answer_offline_chunk(chunk):
+    """Answer a chunk of (line number, line) pairs, keeping input order"""
+    global _offline_pool, _offline_pool_pid
+    if _offline_pool is None or _offline_pool_pid != os.getpid():
+        # A pool inherited across fork has no live threads; its tasks would wait forever
+        _offline_pool = ThreadPoolExecutor(max_workers=QA_MAX_BATCH_SIZE * 2, thread_name_prefix='offline')
+        _offline_pool_pid = os.getpid()
+    knowledge_base = KNOWLEDGE_BASE
+    return list(_offline_pool.map(lambda item: answer_offline(item[0], item[1], knowledge_base), chunk))
+
+def read_chunks(stream, size):
+    """(line number, line) chunks of at most size non-blank lines"""
+    chunk = []
+    for line_number, line in enumerate(stream, 1):
+        if line.strip():
+            chunk.append((line_number, line))
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _offline_worker_init(processes):
+    if 'torch' in sys.modules:
+        # Split the cores between worker processes instead of every one using all of them
+        sys.modules['torch'].set_num_threads(max(1, (os.cpu_count() or 1) // processes))
+
+def run_offline_answers(input_path, output_path, processes=1, chunk_size=OFFLINE_CHUNK_SIZE):
+    """Answer a JSONL file ('-' for stdin) into a JSONL file; returns counts"""
+    counts = {'lines': 0, 'answered': 0, 'fallbacks': 0, 'errors': 0}
+    source = sys.stdin if input_path == '-' else open(input_path, 'r', encoding='utf-8')
+    output = open(output_path, 'w', encoding='utf-8')
+    
+    def write(results):
+        for result in results:
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            counts['lines'] += 1
+            counts['errors' if 'error' in result else 'answered'] += 1
+            counts['fallbacks'] += bool(result.get('fallback'))
+        output.flush()
+    
+    try:
+        chunks = read_chunks(source, max(1, chunk_size))
+        if processes <= 1:
+            for chunk in chunks:
+                write(answer_offline_chunk(chunk))
+        else:
+            import multiprocessing
+            # Workers fork from the loaded parent, sharing its model and tokenized sections
+            gc.collect()
+            gc.freeze()
+            with multiprocessing.get_context('fork').Pool(processes, _offline_worker_init, (processes,)) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.apply_async(answer_offline_chunk, (chunk,)))
+                    if len(in_flight) >= processes * 2:
+                        write(in_flight.popleft().get())
+                while in_flight:
+                    write(in_flight.popleft().get())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        output.close()
+    return counts
+
+# --------- Pre-fork Server ---------
+# The master loads the knowledge base, tokenizer and model once, then forks workers
+# that accept on one shared listening socket. Untouched weight pages stay shared
+# copy-on-write, so a worker only costs its private pages (see the memory report,
+# also sent on SIGUSR1). Any worker may serve any learner, so learner progress moves
+# to a SharedCompanionStore all workers use; the answer cache stays per worker.
+# /admin/reload in one worker sends SIGHUP to the master, which reloads its own
+# snapshot (respawned workers fork from it) and forwards SIGHUP to every worker.
+worker_index = None  # set in pre-fork workers
+
+class PreforkServer:
+    """Supervise N forked workers serving the Flask (or ASGI) app on a shared socket"""
+
+    def __init__(self, host, port, workers, asgi=False):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.asgi = asgi
+        self.sock = None
+        self._pids = {}           # pid -> worker index
+        self._started_at = {}     # worker index -> monotonic start time
+        self._respawn_at = {}     # worker index -> monotonic time to respawn
+        self._stopping = False
+        self._reload_requested = False
+        # One wall-clock heartbeat slot per worker, shared across fork
+        import multiprocessing
+        self._heartbeats = multiprocessing.RawArray('d', self.workers)
+
+    def _bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(1024)
+        self.sock.set_inheritable(True)
+
+    def _spawn(self, index):
+        self._heartbeats[index] = time.time()
+        pid = os.fork()
+        if pid == 0:
+            # Exit without unwinding into the master's code; a crash exits 1 so it reads as one
+            status = 1
+            try:
+                self._worker_main(index)
+                status = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        self._pids[pid] = index
+        self._started_at[index] = time.monotonic()
+        print(f"👷 Worker {index} started (pid {pid})")
+
+    def _beat(self, index):
+        self._heartbeats[index] = time.time()
+
+    def _worker_main(self, index):
+        global worker_index
+        worker_index = index
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_DFL)
+        # Reload off the serving thread: it tokenizes new and edited sections
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+            target=reload_knowledge_base_logged, name='kb-reload', daemon=True).start())
+        if 'torch' in sys.modules:
+            # Split the cores between workers instead of every worker using all of them
+            sys.modules['torch'].set_num_threads(max(1, (os.cpu_count() or 1) // self.workers))
+        start_knowledge_base_watcher()
+        
+        # Heartbeats come from the serving loop itself, so a worker whose loop is wedged stops beating
+        if self.asgi:
+            import uvicorn
+            beat = self._beat
+            
+            class HeartbeatServer(uvicorn.Server):
+                async def on_tick(self, counter):
+                    beat(index)  # Every 0.1s of a responsive event loop
+                    return await super().on_tick(counter)
+            
+            HeartbeatServer(uvicorn.Config(asgi_app, fd=self.sock.fileno(), log_level='warning')).run()
+        else:
+            from werkzeug.serving import make_server
+            server = make_server(self.host, self.port, app, threaded=True, fd=self.sock.fileno())
+            # Runs on every pass of the accept loop: after each accepted connection or 0.5s idle poll
+            server.service_actions = lambda: self._beat(index)
+            server.serve_forever()
+
+    def memory_report(self):
+        """Print master and per-worker memory so nodes can be sized"""
+        rows = [('master', os.getpid(), process_memory())]
+        rows += [(f'worker {index}', pid, process_memory(pid)) for pid, index in sorted(self._pids.items(), key=lambda item: item[1])]
+        print(f"🧠 {'process':<10} {'pid':>7} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10} {'private MB':>11}")
+        private = []
+        for name, pid, memory in rows:
+            if memory is None:
+                print(f"   {name:<10} {pid:>7}  (memory not available)")
+                continue
+            print(f"   {name:<10} {pid:>7} {memory['rss_mb']:>8} {memory['pss_mb']:>8} {memory['shared_mb']:>10} {memory['private_mb']:>11}")
+            if name != 'master':
+                private.append(memory['private_mb'])
+        if private and rows[0][2]:
+            per_worker = round(sum(private) / len(private), 1)
+            print(f"   Per-worker overhead ≈ {per_worker} MB private; "
+                  f"estimated total ≈ {round(rows[0][2]['rss_mb'] + per_worker * self.workers, 1)} MB for {self.workers} workers")
+
+    def _check_workers(self):
+        """Reap exited workers, schedule their restart and kill workers whose heartbeat stopped"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            index = self._pids.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            uptime = time.monotonic() - self._started_at[index]
+            print(f"⚠️ Worker {index} (pid {pid}) exited with status {status} after {uptime:.1f}s; restarting")
+            delay = 0 if uptime >= WORKER_MIN_UPTIME_SECONDS else WORKER_MIN_UPTIME_SECONDS
+            self._respawn_at[index] = time.monotonic() + delay
+        
+        now = time.time()
+        for pid, index in list(self._pids.items()):
+            if now - self._heartbeats[index] > WORKER_HEARTBEAT_TIMEOUT_SECONDS:
+                print(f"⚠️ Worker {index} (pid {pid}) missed heartbeats; killing it")
+                os.kill(pid, signal.SIGKILL)
+        
+        for index, respawn_at in list(self._respawn_at.items()):
+            if respawn_at <= time.monotonic():
+                del self._respawn_at[index]
+                self._spawn(index)
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+
+    def _request_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _reload_workers(self):
+        """Reload the master's snapshot, then every worker's"""
+        self._reload_requested = False
+        reload_knowledge_base_logged()
+        for pid in self._pids:
+            os.kill(pid, signal.SIGHUP)
+
+    def run(self):
+        global companion_store
+        # Workers fork from a fully loaded master
+        wait_for_model(KNOWLEDGE_BASE)
+        
+        store_path = COMPANION_STORE_PATH
+        if not store_path:
+            descriptor, store_path = tempfile.mkstemp(prefix='companions-', suffix='.sqlite3')
+            os.close(descriptor)
+        companion_store = SharedCompanionStore(store_path, COMPANION_MAX_SESSIONS, COMPANION_IDLE_TIMEOUT_SECONDS)
+        
+        self._bind()
+        # Keep the collector from writing to (and so un-sharing) pages of long-lived objects
+        gc.collect()
+        gc.freeze()
+        # Before forking, so a worker signalled before it installs its own handler isn't killed
+        signal.signal(signal.SIGHUP, self._request_reload)
+        for index in range(self.workers):
+            self._spawn(index)
+        
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.memory_report())
+        report_at = time.monotonic() + 10
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_workers()
+            self._check_workers()
+            if report_at and time.monotonic() >= report_at:
+                self.memory_report()
+                report_at = None
+            time.sleep(0.5)
+        
+        print("🛑 Stopping workers...")
+        for pid in self._pids:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        while self._pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._pids.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in self._pids:
+            os.kill(pid, signal.SIGKILL)
+        self.sock.close()
+        if not COMPANION_STORE_PATH:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(store_path + suffix):
+                    os.remove(store_path + suffix)
 
 # --------- Startup ---------
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="AI Learning Companion server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--asgi', action='store_true', help="serve on an asyncio event loop via uvicorn")
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS,
+                        help="pre-fork this many workers sharing the loaded model")
+    parser.add_argument('--precompile', nargs='?', const=PRECOMPILED_ANSWERS_PATH, metavar='PATH',
+                        help="answer the canonical questions offline, write the artifact and exit")
+    parser.add_argument('--answer-jsonl', metavar='INPUT',
+                        help="answer the questions in a JSONL file ('-' for stdin) offline and exit")
+    parser.add_argument('--answers-output', default='answers.jsonl', metavar='PATH',
+                        help="JSONL file --answer-jsonl writes its answers to")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for --answer-jsonl")
+    parser.add_argument('--chunk-size', type=int, default=OFFLINE_CHUNK_SIZE,
+                        help="input lines per --answer-jsonl work item")
+    args = parser.parse_args()
+    
+    if args.answer_jsonl:
+        if not wait_for_model(KNOWLEDGE_BASE):
+            print(f"⚠️ QA model unavailable ({model_status['error']}); answering with knowledge base fallbacks")
+        started = time.monotonic()
+        counts = run_offline_answers(args.answer_jsonl, args.answers_output, args.processes, args.chunk_size)
+        print(f"📝 Answered {counts['answered']} of {counts['lines']} lines ({counts['fallbacks']} fallbacks, "
+              f"{counts['errors']} errors) to {args.answers_output} in {time.monotonic() - started:.1f}s "
+              f"with {args.processes} processes")
+        sys.exit(0)
+    
+    if args.precompile:
+        if not wait_for_model(KNOWLEDGE_BASE):
+            print(f"❌ Cannot precompile answers without the QA model: {model_status['error']}")
+            sys.exit(1)
+        started = time.monotonic()
+        artifact = precompile_answers(KNOWLEDGE_BASE, qa_executor.engine, args.precompile)
+        print(f"📝 Wrote {len(artifact['entries'])} precompiled answers to {args.precompile} "
+              f"in {time.monotonic() - started:.1f}s (knowledge base {artifact['knowledge_base_version']}, {MODEL_NAME})")
+        sys.exit(0)
+    
     print("\n" + "="*70)
     print("🤖 AI Learning Companion - Interactive Education Platform")
     print("="*70)
-    print(f"📚 Knowledge Base: {len([s for s in KNOWLEDGE_CONTENT.split('\\n\\n') if s.strip()])} topics")
-    print(f"🧠 AI Model: {MODEL_NAME}")
+    print(f"📚 Knowledge Base: {len(KNOWLEDGE_BASE)} topics")
+    print(f"🧠 AI Model: {MODEL_NAME} ({QA_BACKEND} backend)")
     print("✨ Enhanced Features:")
     print("• 🎯 Interactive quizzes and challenges")
     print("• 📊 Personalized learning progress tracking") 
@@ -1257,7 +4299,13 @@ if __name__ == '__main__':
     print("• 🌟 Real-world examples and applications")
     print("• 🎨 Beautiful gradient designs and interactive elements")
     print("="*70)
-    print("🌐 Starting server at http://localhost:5000")
+    print(f"🌐 Starting {'ASGI ' if args.asgi else ''}server at http://localhost:{args.port}")
     print("="*70)
     
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    if args.workers > 1:
+        PreforkServer(args.host, args.port, args.workers, asgi=args.asgi).run()
+    elif args.asgi:
+        run_asgi(args.host, args.port)
+    else:
+        start_knowledge_base_watcher()
+        app.run(host=args.host, port=args.port, debug=False)
\ No newline at end of file
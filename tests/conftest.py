@@ -0,0 +1,44 @@
+import asyncio
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Run against the repository's knowledge_base.txt, without loading a model or watching the file
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_LOAD_MODE', 'off')
+os.environ.setdefault('KB_WATCH_INTERVAL_SECONDS', '0')
+
+import new  # noqa: E402  (after the environment above)
+
+
+@pytest.fixture
+def knowledge_file(tmp_path, monkeypatch):
+    """A copy of the knowledge base, loaded as the live snapshot"""
+    path = tmp_path / 'knowledge_base.txt'
+    shutil.copy(new.KNOWLEDGE_BASE_PATH, path)
+    monkeypatch.setattr(new, 'KNOWLEDGE_BASE_PATH', str(path))
+    monkeypatch.setattr(new, 'KNOWLEDGE_BASE', new.load_knowledge_base())
+    monkeypatch.setitem(new.reload_status, 'error', None)
+
+    def no_default():
+        raise AssertionError("reload must not write the default knowledge base")
+    monkeypatch.setattr(new, 'create_default_knowledge_base', no_default)
+    return path
+
+
+@pytest.fixture
+def asgi():
+    """asgi(requests) awaits requests(client) with an httpx client for new.asgi_app; skips without httpx"""
+    httpx = pytest.importorskip('httpx')
+
+    def run(requests):
+        async def main():
+            transport = httpx.ASGITransport(app=new.asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://localhost') as client:
+                return await requests(client)
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,25 @@
+import pytest
+
+import new
+
+
+def test_reload_is_disabled_without_a_token(monkeypatch):
+    monkeypatch.setattr(new, 'ADMIN_TOKEN', None)
+    client = new.app.test_client()
+    for remote_addr in ('127.0.0.1', '::1'):
+        response = client.post('/admin/reload', environ_base={'REMOTE_ADDR': remote_addr})
+        assert response.status_code == 403
+
+
+@pytest.mark.parametrize('token, status', [(None, 403), ('wrong', 403), ('secret', 200)])
+def test_reload_requires_the_token(monkeypatch, token, status):
+    monkeypatch.setattr(new, 'ADMIN_TOKEN', 'secret')
+    headers = {'X-Admin-Token': token} if token else {}
+    response = new.app.test_client().post('/admin/reload', headers=headers,
+                                          environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.status_code == status
+
+
+def test_asgi_reload_is_disabled_without_a_token(monkeypatch, asgi):
+    monkeypatch.setattr(new, 'ADMIN_TOKEN', None)
+    assert asgi(lambda client: client.post('/admin/reload')).status_code == 403
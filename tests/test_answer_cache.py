@@ -0,0 +1,86 @@
+import threading
+import types
+
+import new
+
+
+def fake_clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(new, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = new.AnswerCache(max_entries=2)
+    cache.put(('a',), ('answer a',))
+    cache.put(('b',), ('answer b',))
+    assert cache.get(('a',)) == ('answer a',)  # Now 'b' is least recently used
+    cache.put(('c',), ('answer c',))
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) and cache.get(('c',))
+    assert cache.stats()['evictions'] == 1 and cache.stats()['entries'] == 2
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = new.AnswerCache(ttl_seconds=60)
+    cache.put(('a',), ('answer a',))
+    clock[0] += 59
+    assert cache.get(('a',)) == ('answer a',)
+    clock[0] += 2
+    assert cache.get(('a',)) is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['entries'] == 0 and stats['bytes'] == 0
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_byte_cap_evicts_oldest_entries_and_skips_oversized_values():
+    value = ('x' * 1000,)
+    size = new.AnswerCache._estimate_size(('q0',), value)
+    cache = new.AnswerCache(max_bytes=3 * size + size // 2)
+    for number in range(5):
+        cache.put((f'q{number}',), value)
+    stats = cache.stats()
+    assert stats['entries'] == 3 and stats['evictions'] == 2 and stats['bytes'] <= cache.max_bytes
+    assert cache.get(('q0',)) is None and cache.get(('q1',)) is None and cache.get(('q4',)) == value
+
+    cache.put(('huge',), ('x' * cache.max_bytes,))
+    assert cache.get(('huge',)) is None and cache.get(('q4',)) == value
+
+
+class CountingExecutor:
+    def __init__(self):
+        self.calls = 0
+        self.engine = types.SimpleNamespace(encode_knowledge_base=lambda knowledge_base: {})
+
+    def answer_many(self, question, sections):
+        self.calls += 1
+        return [{'answer': f'answer {self.calls}', 'score': 0.9} for _ in sections]
+
+
+def test_edited_sections_invalidate_cached_answers(knowledge_file, monkeypatch):
+    executor = CountingExecutor()
+    monkeypatch.setattr(new, 'qa_executor', executor)
+    monkeypatch.setattr(new, 'cascade_executor', None)
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(new, 'model_ready', ready)
+    monkeypatch.setattr(new, 'answer_cache', new.AnswerCache())
+    monkeypatch.setitem(new.model_status, 'contexts', None)
+
+    def ask(topic):
+        return new.extract_answer_details(f'What is {topic.lower()}?', topic, new.KNOWLEDGE_BASE)
+
+    assert ask('MACHINE LEARNING')[3] == 'model' and ask('MACHINE LEARNING')[3] == 'cache'
+    assert ask('DEEP LEARNING')[3] == 'model'
+
+    # Edit one section: the knowledge base version changes, and so does that section's key
+    content = knowledge_file.read_text(encoding='utf-8')
+    knowledge_file.write_text(content.replace('DEEP LEARNING\n', 'DEEP LEARNING\nEdited.\n', 1), encoding='utf-8')
+    assert new.reload_knowledge_base()['edited'] == ['DEEP LEARNING']
+
+    answer, _, _, source, _ = ask('DEEP LEARNING')
+    assert source == 'model' and answer == f'answer {executor.calls}'
+    # Answers of sections the reload left untouched stay cached
+    assert ask('MACHINE LEARNING')[3] == 'cache'
+    assert executor.calls == 3
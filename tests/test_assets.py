@@ -0,0 +1,104 @@
+import gzip
+import re
+
+import pytest
+
+import new
+
+ASSET_PATHS = sorted(path for path in new.PAGE_ASSETS if path.startswith('/assets/'))
+
+
+def lower_case(headers):
+    return {name.lower(): value for name, value in headers.items()}
+
+
+def flask_fetch(path, headers):
+    response = new.app.test_client().get(path, headers=headers)
+    return response.status_code, lower_case(response.headers), response.get_data()
+
+
+def asgi_fetch(asgi, path, headers):
+    async def requests(client):
+        async with client.stream('GET', path, headers=headers) as response:
+            body = b''.join([chunk async for chunk in response.aiter_raw()])
+            return response.status_code, lower_case(response.headers), body
+    return asgi(requests)
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def fetch(request):
+    """fetch(path, headers) -> (status, lower-cased headers, raw body) from either app"""
+    if request.param == 'flask':
+        return flask_fetch
+    asgi = request.getfixturevalue('asgi')
+    return lambda path, headers: asgi_fetch(asgi, path, headers)
+
+
+def test_page_links_its_content_hashed_assets(fetch):
+    status, headers, body = fetch('/', {'Accept-Encoding': 'identity'})
+    assert status == 200 and headers['cache-control'] == 'no-cache'
+    linked = re.findall(r'(?:href|src)="(/assets/app\.[0-9a-f]{12}\.(?:css|js))"', body.decode('utf-8'))
+    assert sorted(linked) == ASSET_PATHS and len(linked) == 2
+    for path in linked:
+        assert new.PAGE_ASSETS[path].digest.startswith(path.split('.')[1])
+
+
+@pytest.mark.parametrize('path', ASSET_PATHS)
+def test_assets_are_immutable_and_served_uncompressed_on_request(fetch, path):
+    asset = new.PAGE_ASSETS[path]
+    status, headers, body = fetch(path, {'Accept-Encoding': 'identity'})
+    assert status == 200 and body == asset.body
+    assert headers['etag'] == f'"{asset.digest}"'
+    assert headers['cache-control'] == f'public, max-age={new.STATIC_ASSET_MAX_AGE}, immutable'
+    assert headers['content-type'] == asset.content_type and headers['vary'] == 'Accept-Encoding'
+    assert 'content-encoding' not in headers
+
+
+@pytest.mark.parametrize('path', ASSET_PATHS)
+def test_gzip_variant_has_its_own_etag(fetch, path):
+    asset = new.PAGE_ASSETS[path]
+    status, headers, body = fetch(path, {'Accept-Encoding': 'gzip'})
+    assert status == 200 and headers['content-encoding'] == 'gzip'
+    assert headers['etag'] == f'"{asset.digest}-gzip"' and gzip.decompress(body) == asset.body
+
+    # A client that refuses gzip gets the identity body
+    _, headers, body = fetch(path, {'Accept-Encoding': 'gzip;q=0'})
+    assert body == asset.body and headers['etag'] == f'"{asset.digest}"'
+
+
+def test_smallest_accepted_variant_wins(fetch):
+    asset = new.PAGE_ASSETS[ASSET_PATHS[0]]
+    if 'br' not in asset.variants:
+        pytest.skip("brotli is not installed")
+    _, headers, body = fetch(ASSET_PATHS[0], {'Accept-Encoding': 'gzip, br'})
+    assert headers['content-encoding'] == 'br' and headers['etag'] == f'"{asset.digest}-br"'
+    assert body == asset.variants['br']
+
+
+@pytest.mark.parametrize('path', ASSET_PATHS + ['/'])
+def test_matching_if_none_match_is_not_modified(fetch, path):
+    asset = new.PAGE_ASSETS[path]
+    for if_none_match in (f'"{asset.digest}-gzip"', f'W/"{asset.digest}-gzip"', f'"stale", "{asset.digest}-gzip"', '*'):
+        status, headers, body = fetch(path, {'Accept-Encoding': 'gzip', 'If-None-Match': if_none_match})
+        assert status == 304 and body == b''
+        assert headers['etag'] == f'"{asset.digest}-gzip"' and headers['cache-control'] == asset.cache_control
+
+    # The identity representation's tag doesn't validate the gzip one
+    status, _, _ = fetch(path, {'Accept-Encoding': 'gzip', 'If-None-Match': f'"{asset.digest}"'})
+    assert status == 200
+
+
+def test_unknown_asset_is_not_found(fetch):
+    status, _, _ = fetch('/assets/app.000000000000.css', {'Accept-Encoding': 'identity'})
+    assert status == 404
+
+
+@pytest.mark.parametrize('headers', [{'Accept-Encoding': 'identity'}, {'Accept-Encoding': 'gzip, deflate, br'},
+                                     {'Accept-Encoding': '*'}, {'Accept-Encoding': 'gzip', 'If-None-Match': '*'}])
+def test_flask_and_asgi_send_the_same_asset_responses(asgi, headers):
+    compared = ('etag', 'cache-control', 'vary', 'content-type', 'content-encoding')
+    for path in ASSET_PATHS + ['/']:
+        flask_status, flask_headers, flask_body = flask_fetch(path, headers)
+        asgi_status, asgi_headers, asgi_body = asgi_fetch(asgi, path, headers)
+        assert (flask_status, flask_body) == (asgi_status, asgi_body)
+        assert {name: flask_headers.get(name) for name in compared} == {name: asgi_headers.get(name) for name in compared}
@@ -0,0 +1,25 @@
+import json
+
+import new
+
+
+def oversized_body():
+    padding = 'x' * (new.ASK_BATCH_MAX_BODY_BYTES + 1)
+    return json.dumps({'questions': ['quiz'], 'padding': padding})
+
+
+def test_flask_batch_rejects_oversized_body():
+    response = new.app.test_client().post('/ask/batch', data=oversized_body(), content_type='application/json')
+    assert response.status_code == 413
+
+
+def test_flask_batch_accepts_body_under_the_cap():
+    response = new.app.test_client().post('/ask/batch', json={'questions': ['quiz']})
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['kind'] == 'quiz'
+
+
+def test_asgi_batch_rejects_oversized_body(asgi):
+    response = asgi(lambda client: client.post('/ask/batch', content=oversized_body(),
+                                               headers={'Content-Type': 'application/json'}))
+    assert response.status_code == 413
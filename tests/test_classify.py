@@ -0,0 +1,26 @@
+import pytest
+
+import new
+
+
+@pytest.mark.parametrize('question', ['hi', 'Hello there!', 'hey, how are you?', 'Greetings'])
+def test_greetings(question):
+    assert new.classify_question(question, new.KNOWLEDGE_BASE)[0] == 'greeting'
+
+
+@pytest.mark.parametrize('question', ['What is machine learning?', 'What is AI ethics?', 'Transformer Architecture',
+                                      'What is history of AI?'])
+def test_greeting_words_inside_other_words_are_not_greetings(question):
+    assert new.classify_question(question, new.KNOWLEDGE_BASE)[0] == 'topic'
+
+
+def test_canonical_questions_match_what_the_ui_sends():
+    questions = new.canonical_questions(new.KNOWLEDGE_BASE)
+    # Page buttons, response card buttons and the topic card's 'Dive Deeper' button
+    assert 'What is CNN?' in questions
+    assert 'Show me cool AI applications' in questions
+    assert 'More about CONVOLUTIONAL NEURAL NETWORKS' in questions
+    assert len(questions) == len(set(questions))
+
+    greetings = [q for q in questions if new.classify_question(q, new.KNOWLEDGE_BASE)[0] == 'greeting']
+    assert greetings == ['What is greetings?', 'More about GREETINGS']
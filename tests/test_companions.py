@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+import time
+
+import new
+
+
+def explore(store, session_id, topic):
+    companion = store.get(session_id)
+    companion.track_interaction(topic, 'question')
+    companion.quizzes_taken += 1
+    store.save(session_id, companion)
+
+
+def test_shared_store_keeps_progress_across_worker_processes(tmp_path):
+    store = new.SharedCompanionStore(str(tmp_path / 'companions.sqlite3'))
+    session_id = store.new_session_id()
+
+    # Each request of the same learner lands on a different forked worker
+    context = multiprocessing.get_context('fork')
+    for topic in ('MACHINE LEARNING', 'DEEP LEARNING', 'AI ETHICS'):
+        worker = context.Process(target=explore, args=(store, session_id, topic))
+        worker.start()
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    companion = store.get(session_id)
+    assert companion.topics_explored == {'MACHINE LEARNING', 'DEEP LEARNING', 'AI ETHICS'}
+    assert companion.quizzes_taken == 3
+    assert store.stats()['active_sessions'] == 1
+
+
+def test_shared_store_evicts_idle_and_over_cap_sessions(tmp_path, monkeypatch):
+    store = new.SharedCompanionStore(str(tmp_path / 'companions.sqlite3'), max_sessions=2, idle_timeout_seconds=60)
+    monkeypatch.setattr(store, 'EVICT_INTERVAL_SECONDS', 0)
+    clock = [1000.0]
+    monkeypatch.setattr(new.time, 'time', lambda: clock[0])
+
+    for session_id in ('a', 'b', 'c'):
+        clock[0] += 1
+        store.save(session_id, new.LearningCompanion())
+    assert store.peek('a') is None and store.peek('c') is not None
+    assert store.stats()['evicted_lru'] == 1
+
+    clock[0] += 120
+    store.save('d', new.LearningCompanion())
+    assert store.stats()['active_sessions'] == 1
+    assert store.stats()['evicted_idle'] == 2
+
+
+class SlowStore(new.CompanionStore):
+    """A store whose reads and writes block, like SQLite under write contention"""
+
+    def get(self, session_id):
+        time.sleep(0.5)
+        return super().get(session_id)
+
+    def save(self, session_id, companion):
+        time.sleep(0.5)
+
+
+def test_asgi_store_calls_do_not_block_the_event_loop(monkeypatch, asgi):
+    monkeypatch.setattr(new, 'companion_store', SlowStore())
+
+    async def requests(client):
+        started = time.monotonic()
+        ask = asyncio.create_task(client.post('/ask', json={'question': 'Take a quiz'}))
+        stream = asyncio.create_task(client.get('/ask/stream', params={'question': 'Take a quiz'}))
+        await asyncio.sleep(0.05)
+        live = await client.get('/health/live')
+        live_seconds = time.monotonic() - started
+        return live, live_seconds, await ask, await stream, time.monotonic() - started
+
+    live, live_seconds, ask, stream, total_seconds = asgi(requests)
+    assert live.status_code == 200 and ask.json()['success'] and 'event: done' in stream.text
+    # Both requests spend a second in the store, but the loop answers in the meantime
+    assert total_seconds >= 1.0 and live_seconds < 0.3
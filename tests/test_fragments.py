@@ -0,0 +1,31 @@
+import new
+
+
+def test_routed_topics_are_prerendered():
+    knowledge_base = new.KNOWLEDGE_BASE
+    for question in ('What is LSTM?', 'What is named entity recognition?', 'What is a CNN?'):
+        topic, _ = new.find_relevant_topic(question, knowledge_base)
+        assert topic in knowledge_base.fragments, topic
+
+    rendered = len(knowledge_base.fragments)
+    new.render_topic_response('LONG SHORT-TERM MEMORY', knowledge_base, '<p>answer</p>', '')
+    assert len(knowledge_base.fragments) == rendered
+
+
+def test_reload_drops_fragments_of_removed_topics(knowledge_file):
+    content = knowledge_file.read_text(encoding='utf-8')
+    previous = new.KNOWLEDGE_BASE
+    previous_fragments = dict(previous.fragments._fragments)
+    assert 'LONG SHORT-TERM MEMORY' in previous.fragments
+
+    section_start = content.index('LONG SHORT-TERM MEMORY (LSTM)')
+    section_end = content.index('\n\n', section_start)
+    knowledge_file.write_text(content[:section_start] + content[section_end + 2:], encoding='utf-8')
+    summary = new.reload_knowledge_base()
+
+    assert summary['removed'] == ['LONG SHORT-TERM MEMORY (LSTM)']
+    assert 'LONG SHORT-TERM MEMORY' not in new.KNOWLEDGE_BASE.fragments
+    assert new.KNOWLEDGE_BASE.fragments.get('MACHINE LEARNING') is previous_fragments['MACHINE LEARNING']
+    # Requests still on the previous snapshot keep its fragments
+    assert new.KNOWLEDGE_BASE.fragments is not previous.fragments
+    assert previous.fragments._fragments == previous_fragments
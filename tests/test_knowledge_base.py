@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import new
+
+
+@pytest.fixture
+def mapped_file(tmp_path):
+    path = tmp_path / 'knowledge_base.txt'
+    path.write_bytes(open(new.KNOWLEDGE_BASE_PATH, 'rb').read())
+    return path
+
+
+def replace_file(path, content):
+    """Write and rename, as MappedKnowledgeBase expects"""
+    staged = path.with_suffix('.new')
+    staged.write_bytes(content)
+    os.replace(staged, path)
+
+
+def test_mapped_sections_match_the_parsed_knowledge_base(mapped_file):
+    parsed = new.KnowledgeBase(mapped_file.read_text(encoding='utf-8'))
+    mapped = new.MappedKnowledgeBase(str(mapped_file))
+
+    assert list(mapped.sections) == list(parsed.sections) and len(mapped) == len(parsed)
+    for heading, section in parsed.sections.items():
+        assert heading in mapped.sections
+        assert mapped.sections[heading].text == section.text
+        assert mapped.sections[heading].category == section.category
+    assert {category: [mapped.heading(index) for index in indexes] for category, indexes in mapped.categories.items()} \
+        == parsed.categories
+    assert mapped.section('CONVOLUTIONAL NEURAL NETWORKS').heading == parsed.section('CONVOLUTIONAL NEURAL NETWORKS').heading
+    assert 'NOT A TOPIC' not in mapped.sections and mapped.section('NOT A TOPIC') is None
+    assert mapped.digest('NOT A TOPIC') is None
+
+
+def test_heading_lookup_survives_hash_collisions(mapped_file, monkeypatch):
+    monkeypatch.setattr(new.MappedKnowledgeBase, '_heading_key', staticmethod(lambda heading: 7))
+    mapped = new.MappedKnowledgeBase(str(mapped_file))
+    headings = list(new.KnowledgeBase(mapped_file.read_text(encoding='utf-8')).sections)
+
+    assert [mapped._find(heading) for heading in headings] == list(range(len(headings)))
+    assert mapped._find('NOT A TOPIC') == -1
+
+
+def test_lazy_sections_decode_into_a_bounded_lru(mapped_file):
+    mapped = new.MappedKnowledgeBase(str(mapped_file), max_cached_sections=2)
+    first, second, third = list(mapped.sections)[:3]
+
+    section = mapped.sections[first]
+    assert mapped.sections[first] is section
+    mapped.sections[second]
+    mapped.sections[third]  # Evicts the least recently used, first
+    assert mapped.sections.cached(first) is None and mapped.sections[first] is not section
+    assert mapped.storage_stats()['decoded_sections'] == 2
+    assert mapped.storage_stats()['sections_decoded_total'] == 4
+    with pytest.raises(KeyError):
+        mapped.sections['NOT A TOPIC']
+
+
+def test_reopening_after_a_file_change_reuses_unchanged_sections(mapped_file):
+    content = mapped_file.read_bytes()
+    previous = new.MappedKnowledgeBase(str(mapped_file))
+    kept = previous.sections['MACHINE LEARNING']
+    old_text = previous.sections['DEEP LEARNING'].text
+
+    replace_file(mapped_file, content.replace(b'DEEP LEARNING\r\n', b'DEEP LEARNING\r\nEdited first line.\r\n', 1)
+                 + b'\r\n\r\nNEW TOPIC\r\nAdded by the test.\r\n')
+    reopened = new.MappedKnowledgeBase(str(mapped_file), previous=previous)
+
+    assert reopened.version != previous.version
+    assert reopened.reused_sections == len(previous) - 1
+    assert reopened.sections['MACHINE LEARNING'] is kept
+    assert reopened.same_section('MACHINE LEARNING', previous)
+    assert not reopened.same_section('DEEP LEARNING', previous)
+    assert reopened.sections['DEEP LEARNING'].text.startswith('DEEP LEARNING\nEdited first line.')
+    assert reopened.sections['NEW TOPIC'].text == 'NEW TOPIC\nAdded by the test.'
+    # The previous snapshot keeps reading its own mapping of the replaced file
+    previous.sections._cache.clear()
+    assert previous.sections['DEEP LEARNING'].text == old_text
+    assert 'NEW TOPIC' not in previous.sections
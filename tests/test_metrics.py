@@ -0,0 +1,94 @@
+import re
+
+import pytest
+
+import new
+
+# One sample line of the text exposition format: name, optional labels, value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\\n]|\\[\\"n])*",?)*\})? \S+$')
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """A copy of the registry, so metrics made by a test are scraped but not kept"""
+    monkeypatch.setattr(new, 'METRICS', list(new.METRICS))
+
+
+def test_label_values_are_escaped(metrics):
+    counter = new.MetricCounter('test_escaped_total', "Escaping", ('value',))
+    counter.inc('back\\slash "quoted"\nnext line')
+    counter.inc('plain', amount=2)
+    assert counter.render() == [
+        '# HELP test_escaped_total Escaping',
+        '# TYPE test_escaped_total counter',
+        'test_escaped_total{value="back\\\\slash \\"quoted\\"\\nnext line"} 1',
+        'test_escaped_total{value="plain"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    histogram = new.MetricHistogram('test_seconds', "Buckets", ('kind',), buckets=(1, 5))
+    for value in (0.5, 1, 3, 7):  # A value on a bound counts in that bucket (le)
+        histogram.observe(value, 'a')
+    histogram.observe(2, 'b')
+    assert histogram.render() == [
+        '# HELP test_seconds Buckets',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{kind="a",le="1"} 2',
+        'test_seconds_bucket{kind="a",le="5"} 3',
+        'test_seconds_bucket{kind="a",le="+Inf"} 4',
+        'test_seconds_sum{kind="a"} 11.5',
+        'test_seconds_count{kind="a"} 4',
+        'test_seconds_bucket{kind="b",le="1"} 0',
+        'test_seconds_bucket{kind="b",le="5"} 1',
+        'test_seconds_bucket{kind="b",le="+Inf"} 1',
+        'test_seconds_sum{kind="b"} 2.0',
+        'test_seconds_count{kind="b"} 1',
+    ]
+
+
+def scrape():
+    client = new.app.test_client()
+    client.post('/ask', json={'question': 'What is machine learning?'})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return response.get_data(as_text=True)
+
+
+def test_metrics_endpoint_is_well_formed(metrics):
+    new.MetricCounter('test_escaped_total', "Escaping", ('value',)).inc('say "hi"\n')
+    text = scrape()
+    assert text.endswith('\n')
+    described = set()
+    for line in text.splitlines():
+        if line.startswith('# '):
+            described.add(line.split()[2])
+        else:
+            assert SAMPLE.match(line), line
+            assert re.sub(r'_(bucket|sum|count)$', '', line.split('{')[0].split()[0]) in described, line
+    assert 'ask_routing_seconds_count{kind="topic",topic="MACHINE LEARNING"}' in text
+    assert 'test_escaped_total{value="say \\"hi\\"\\n"} 1' in text
+
+
+def test_metrics_parse_with_prometheus_client(metrics):
+    parser = pytest.importorskip('prometheus_client.parser')
+    new.MetricCounter('test_escaped_total', "Escaping", ('value',)).inc('say "hi"\n')
+    families = {family.name: family for family in parser.text_string_to_metric_families(scrape())}
+
+    assert [sample.labels for sample in families['test_escaped'].samples] == [{'value': 'say "hi"\n'}]
+    routing = families['ask_routing_seconds']
+    assert routing.type == 'histogram'
+    labels = {'kind': 'topic', 'topic': 'MACHINE LEARNING'}
+    series = [sample for sample in routing.samples
+              if {name: sample.labels.get(name) for name in labels} == labels]
+    buckets = [sample.value for sample in series if sample.name.endswith('_bucket')]
+    count, = [sample.value for sample in series if sample.name.endswith('_count')]
+    assert buckets == sorted(buckets) and buckets[-1] == count >= 1
+
+
+def test_asgi_metrics_match_the_flask_format(metrics, asgi):
+    response = asgi(lambda client: client.get('/metrics'))
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE ask_routing_seconds histogram' in response.text
@@ -0,0 +1,28 @@
+import json
+import threading
+
+import new
+
+
+def run_with_timeout(target, timeout=120):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(counts=target()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "offline run hung"
+    return result['counts']
+
+
+def test_forked_run_after_in_process_run(tmp_path):
+    questions = tmp_path / 'questions.jsonl'
+    questions.write_text(''.join(json.dumps({'id': i, 'question': f'What is deep learning {i}?'}) + '\n'
+                                 for i in range(6)))
+    output = tmp_path / 'answers.jsonl'
+
+    # The in-process run creates the thread pool that forked workers used to inherit
+    single = run_with_timeout(lambda: new.run_offline_answers(str(questions), str(output), processes=1))
+    forked = run_with_timeout(lambda: new.run_offline_answers(str(questions), str(output), processes=2,
+                                                              chunk_size=2))
+    assert single == forked
+    assert forked['lines'] == 6 and forked['errors'] == 0
+    assert [json.loads(line)['id'] for line in output.read_text().splitlines()] == list(range(6))
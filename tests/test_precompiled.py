@@ -0,0 +1,81 @@
+import json
+
+import new
+
+
+class FakeEngine:
+    """Answers every row with its section's first body line"""
+
+    def answer_batch(self, questions, sections):
+        return [{'answer': section.body[:40], 'score': 0.9} for section in sections]
+
+
+def keys(entries):
+    return {(new.normalize_question(entry['question']), entry['topic']) for entry in entries}
+
+
+def precompile(knowledge_base, tmp_path):
+    path = str(tmp_path / 'precompiled_answers.json')
+    artifact = new.precompile_answers(knowledge_base, FakeEngine(), path)
+    return path, artifact
+
+
+def rewrite(path, change):
+    with open(path, encoding='utf-8') as f:
+        artifact = json.load(f)
+    change(artifact)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f)
+
+
+def test_round_trip_serves_every_entry(knowledge_file, tmp_path):
+    path, artifact = precompile(new.KNOWLEDGE_BASE, tmp_path)
+    answers = new.load_precompiled_answers(new.KNOWLEDGE_BASE, path)
+    assert set(answers) == keys(artifact['entries']) and len(answers) > 100
+    entry = artifact['entries'][0]
+    assert entry['candidates'][0] == entry['topic']
+    assert answers[(new.normalize_question(entry['question']), entry['topic'])][0] == entry['answer']
+
+
+def test_artifact_for_another_backend_is_ignored(knowledge_file, tmp_path, monkeypatch):
+    path, _ = precompile(new.KNOWLEDGE_BASE, tmp_path)
+    monkeypatch.setattr(new, 'QA_BACKEND', 'onnx')
+    assert new.load_precompiled_answers(new.KNOWLEDGE_BASE, path) == {}
+
+
+def test_malformed_entries_are_skipped(knowledge_file, tmp_path, capsys):
+    path, artifact = precompile(new.KNOWLEDGE_BASE, tmp_path)
+
+    def corrupt(artifact):
+        del artifact['entries'][0]['section_hashes']
+        artifact['entries'][1] = 'not an entry'
+        artifact['entries'][2]['candidates'] = 'MACHINE LEARNING'
+        artifact['entries'][3]['score'] = None
+    rewrite(path, corrupt)
+
+    answers = new.load_precompiled_answers(new.KNOWLEDGE_BASE, path)
+    assert set(answers) == keys(artifact['entries'][4:])
+    output = capsys.readouterr().out
+    assert "Skipping precompiled answer 0" in output and "'section_hashes'" in output
+    assert "Skipping precompiled answer 1" in output and "not an object" in output
+
+
+def test_artifact_that_is_not_an_object_is_ignored(tmp_path):
+    path = tmp_path / 'precompiled_answers.json'
+    path.write_text('[1, 2, 3]')
+    assert new.load_precompiled_answers(new.KNOWLEDGE_BASE, str(path)) == {}
+
+
+def test_entries_whose_routing_changed_go_stale(knowledge_file, tmp_path):
+    path, artifact = precompile(new.KNOWLEDGE_BASE, tmp_path)
+
+    # A new heading adds a candidate topic to questions that mention it; no stored section changed
+    knowledge_file.write_text(knowledge_file.read_text(encoding='utf-8') + '\n\nLEARNING\nA new, broader section.\n',
+                              encoding='utf-8')
+    knowledge_base = new.load_knowledge_base(new.KNOWLEDGE_BASE)
+    rerouted = [entry for entry in artifact['entries']
+                if new.classify_question(entry['question'], knowledge_base)[3] != tuple(entry['candidates'])]
+    assert rerouted
+
+    answers = new.load_precompiled_answers(knowledge_base, path)
+    assert set(answers) == keys(entry for entry in artifact['entries'] if entry not in rerouted)
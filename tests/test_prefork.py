@@ -0,0 +1,100 @@
+import os
+import threading
+import traceback
+
+import new
+
+
+def spawn_worker(monkeypatch, worker_main):
+    server = new.PreforkServer('127.0.0.1', 0, 1)
+    monkeypatch.setattr(server, '_worker_main', worker_main)
+    server._spawn(0)
+    (pid,) = server._pids
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def test_worker_that_returns_exits_zero(monkeypatch):
+    assert spawn_worker(monkeypatch, lambda index: None) == 0
+
+
+def test_worker_crash_exits_nonzero_with_its_traceback(monkeypatch, capfd):
+    def crash(index):
+        print(f"worker {index} serving")
+        raise RuntimeError("worker crashed")
+    assert spawn_worker(monkeypatch, crash) == 1
+    output = capfd.readouterr()
+    assert "worker 0 serving" in output.out
+    assert "Traceback" in output.err and "RuntimeError: worker crashed" in output.err
+
+
+class EchoEngine:
+    def answer_batch(self, questions, sections):
+        return [{'answer': question, 'score': 1.0} for question in questions]
+
+
+def in_child(check):
+    """Run check in a forked child; True when it passed"""
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            check()
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+
+def concurrently(function, count=16):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(number):
+        barrier.wait()
+        try:
+            function(number)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not errors
+
+
+def test_forked_executor_resets_before_its_first_request():
+    executor = new.BatchedQAExecutor(EchoEngine(), max_batch_size=4, max_wait_ms=5)
+    assert executor.answer('parent', None)['answer'] == 'parent'
+
+    def ask(number):
+        assert executor.answer(f'question {number}', None, timeout=10)['answer'] == f'question {number}'
+
+    def check():
+        assert executor._worker is None and not executor._pending
+        concurrently(ask)
+        assert [thread.name for thread in threading.enumerate()].count('qa-batcher') == 1
+
+    # Fork while the parent's batching thread would hold the lock mid-batch
+    with executor._condition:
+        assert in_child(check)
+    assert executor.answer('parent again', None)['answer'] == 'parent again'
+
+
+def test_forked_shared_store_opens_its_own_connection(tmp_path):
+    store = new.SharedCompanionStore(str(tmp_path / 'companions.sqlite3'))
+    store.save('parent', new.LearningCompanion())
+    parent_db = store._db
+
+    def check():
+        assert store._db is None and store._parent_db is parent_db
+        concurrently(lambda number: store.save(f'child {number}', store.get(f'child {number}')))
+        assert store._db is not parent_db
+        assert store.stats()['active_sessions'] == 17
+
+    assert in_child(check)
+    assert store.peek('child 3') is not None
@@ -0,0 +1,181 @@
+import re
+
+import numpy as np
+import pytest
+
+import new
+
+
+class WordEncoding(dict):
+    """The parts of a fast tokenizer's encoding QAEngine.encode_context reads"""
+
+    def __init__(self, tokens):
+        super().__init__(input_ids=[token_id for token_id, _, _, _ in tokens],
+                         offset_mapping=[(start, end) for _, _, start, end in tokens])
+        self._word_ids = [word for _, word, _, _ in tokens]
+        self._words = {}
+        for _, word, start, end in tokens:
+            self._words[word] = (self._words.get(word, (start,))[0], end)
+
+    def word_ids(self):
+        return self._word_ids
+
+    def word_to_chars(self, word):
+        return self._words[word]
+
+
+class WordTokenizer:
+    """BERT-style stand-in: [CLS] question [SEP] context [SEP], one token per word and
+    two for words over 10 characters, so spans have to be aligned to whole words"""
+    model_max_length = 512
+    model_input_names = ['input_ids', 'attention_mask']
+    cls_token_id, sep_token_id, pad_token_id = 0, 1, 2
+
+    def __init__(self):
+        self.vocab = {}
+
+    def tokens(self, text):
+        """(token id, word index, char start, char end) per token"""
+        tokens = []
+        for word, match in enumerate(re.finditer(r'\S+', text)):
+            pieces = [(match.start(), match.end())]
+            if match.end() - match.start() > 10:
+                pieces = [(match.start(), match.start() + 4), (match.start() + 4, match.end())]
+            for start, end in pieces:
+                token_id = self.vocab.setdefault(text[start:end].lower(), len(self.vocab) + 3)
+                tokens.append((token_id, word, start, end))
+        return tokens
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        if isinstance(text, list):
+            return {'input_ids': [[token_id for token_id, _, _, _ in self.tokens(item)] for item in text]}
+        return WordEncoding(self.tokens(text))
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def build_inputs_with_special_tokens(self, first, second):
+        return [self.cls_token_id] + first + [self.sep_token_id] + second + [self.sep_token_id]
+
+
+def softmax(values):
+    values = np.exp(np.asarray(values, dtype=float) - max(values))
+    return values / values.sum()
+
+
+class PeakedModel:
+    """Stands in for _forward: flat logits with peaks on chosen context tokens"""
+
+    def __init__(self, tokenizer, starts, ends, cls=0.0):
+        self.tokenizer = tokenizer
+        self.starts, self.ends, self.cls = starts, ends, cls
+        self.rows = []
+
+    def logits(self, ids, peaks):
+        logits = np.zeros(len(ids))
+        logits[0] = self.cls
+        for position in range(ids.index(self.tokenizer.sep_token_id) + 1, len(ids) - 1):
+            logits[position] = peaks.get(ids[position], 0.0)
+        return logits
+
+    def __call__(self, rows):
+        self.rows += rows
+        width = max(len(ids) for ids, _ in rows)
+        starts, ends = np.zeros((len(rows), width)), np.zeros((len(rows), width))
+        for row, (ids, _) in enumerate(rows):
+            starts[row, :len(ids)] = self.logits(ids, self.peaks(self.starts))
+            ends[row, :len(ids)] = self.logits(ids, self.peaks(self.ends))
+        return starts, ends
+
+    def peaks(self, words):
+        return {self.tokenizer.vocab[word]: logit for word, logit in words.items()}
+
+    def expected_score(self, ids, start, end):
+        """Pipeline score of the span whose start and end tokens are at these row positions"""
+        context = ids.index(self.tokenizer.sep_token_id) + 1
+        allowed = [0] + list(range(context, len(ids) - 1))
+        start_probs = softmax(self.logits(ids, self.peaks(self.starts))[allowed])
+        end_probs = softmax(self.logits(ids, self.peaks(self.ends))[allowed])
+        return start_probs[allowed.index(start)] * end_probs[allowed.index(end)]
+
+
+TEXT = 'TOPIC\nMachine learning lets computers learn representations from labelled examples.'
+
+
+def answer(text, question, starts, ends, cls=0.0, **options):
+    tokenizer = WordTokenizer()
+    engine = new.QAEngine(tokenizer, None, 'words', **options)
+    section = new.KnowledgeSection('TOPIC', None, text)
+    engine.encode_context(text)  # Fill the vocabulary, so peaks can name context words
+    tokenizer(question)
+    model = PeakedModel(tokenizer, starts, ends, cls)
+    engine._forward = model
+    return engine.answer_batch([question], [section])[0], model
+
+
+def test_span_maps_back_to_character_offsets():
+    result, model = answer(TEXT, 'What do computers learn?', {'computers': 10.0}, {'learn': 10.0})
+    assert result['answer'] == 'computers learn'
+    assert (result['start'], result['end']) == (TEXT.index('computers'), TEXT.index('learn ') + len('learn'))
+    ids = model.rows[0][0]
+    expected = model.expected_score(ids, ids.index(model.tokenizer.vocab['computers'], 5),
+                                    ids.index(model.tokenizer.vocab['learn'], 5))
+    assert result['score'] == pytest.approx(expected)
+
+
+def test_spans_ending_inside_a_word_extend_to_the_whole_word():
+    # 'representations' is two tokens; the end peak is on its first one
+    result, _ = answer(TEXT, 'What is learned?', {'learn': 10.0}, {'repr': 10.0})
+    assert result['answer'] == 'learn representations'
+    assert TEXT[result['start']:result['end']] == result['answer']
+
+
+def test_null_answer_wins_when_cls_scores_highest():
+    result, model = answer(TEXT, 'Who won the match?', {'computers': 2.0}, {'learn': 2.0}, cls=12.0)
+    assert result['answer'] == '' and (result['start'], result['end']) == (0, 0)
+    ids = model.rows[0][0]
+    assert result['score'] == pytest.approx(model.expected_score(ids, 0, 0))
+
+    result, _ = answer(TEXT, 'Who won the match?', {'computers': 2.0}, {'learn': 2.0}, cls=12.0,
+                       handle_impossible_answer=False)
+    assert result['answer'] == 'computers learn'
+
+
+def test_answers_are_capped_at_max_answer_len_tokens():
+    starts, ends = {'machine': 10.0}, {'examples.': 10.0, 'lets': 5.0}
+    result, _ = answer(TEXT, 'What is it?', starts, ends)
+    assert result['answer'] == 'Machine learning lets computers learn representations from labelled examples.'
+    result, _ = answer(TEXT, 'What is it?', starts, ends, max_answer_len=3)
+    assert result['answer'] == 'Machine learning lets'
+
+
+def test_duplicate_answers_merge_their_scores():
+    text = 'TOPIC\nneural networks learn features; deep neural networks scale.'
+    result, model = answer(text, 'What scales?', {'neural': 10.0}, {'networks': 10.0})
+    assert result['answer'] == 'neural networks' and result['start'] == text.index('neural')
+    ids = model.rows[0][0]
+    first = ids.index(model.tokenizer.vocab['neural'], 4)
+    second = ids.index(model.tokenizer.vocab['neural'], first + 1)
+    single = model.expected_score(ids, first, first + 1)
+    assert model.expected_score(ids, second, second + 1) == pytest.approx(single)
+    assert result['score'] == pytest.approx(2 * single)
+
+
+def test_questions_over_the_token_budget_are_truncated():
+    question = ' '.join(f'word{number}' for number in range(100))
+    result, model = answer(TEXT, question, {'computers': 10.0}, {'learn': 10.0})
+    ids = model.rows[0][0]
+    assert ids.index(model.tokenizer.sep_token_id) == 1 + new.QA_MAX_QUESTION_TOKENS
+    assert ids[1:1 + new.QA_MAX_QUESTION_TOKENS] == [model.tokenizer.vocab[f'word{number}']
+                                                     for number in range(new.QA_MAX_QUESTION_TOKENS)]
+    assert result['answer'] == 'computers learn'
+    assert TEXT[result['start']:result['end']] == 'computers learn'
+
+
+def test_answers_in_later_windows_map_to_their_offsets():
+    text = 'TOPIC\n' + ' '.join(f'filler{number}' for number in range(30)) + ' gradient descent converges.'
+    options = {'max_seq_len': new.QA_MAX_QUESTION_TOKENS + 3 + 8, 'doc_stride': 4, 'early_exit_score': 0}
+    result, model = answer(text, 'What converges?', {'gradient': 10.0}, {'descent': 10.0}, **options)
+    assert len(model.rows) > 1
+    assert result['answer'] == 'gradient descent'
+    assert text[result['start']:result['end']] == 'gradient descent'
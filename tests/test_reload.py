@@ -0,0 +1,115 @@
+import pytest
+
+import new
+
+
+def assert_previous_kept(previous):
+    assert new.KNOWLEDGE_BASE is previous
+    assert len(new.KNOWLEDGE_BASE) > 15
+    assert new.reload_status['error']
+
+
+def test_reload_keeps_snapshot_when_file_is_empty(knowledge_file):
+    previous = new.KNOWLEDGE_BASE
+    knowledge_file.write_text('')
+    with pytest.raises(ValueError):
+        new.reload_knowledge_base()
+    assert_previous_kept(previous)
+    assert knowledge_file.read_text() == ''
+
+
+def test_reload_keeps_snapshot_when_file_is_missing(knowledge_file):
+    previous = new.KNOWLEDGE_BASE
+    knowledge_file.unlink()
+    with pytest.raises(FileNotFoundError):
+        new.reload_knowledge_base()
+    assert_previous_kept(previous)
+    assert not knowledge_file.exists()
+
+
+def test_reload_keeps_snapshot_when_file_fails_to_read(knowledge_file):
+    previous = new.KNOWLEDGE_BASE
+    knowledge_file.write_bytes(b'HALF WRITTEN\n\xff\xfe')
+    with pytest.raises(UnicodeDecodeError):
+        new.reload_knowledge_base()
+    assert_previous_kept(previous)
+
+    # Once the file is readable again the next reload picks it up and clears the error
+    knowledge_file.write_text('ONLY TOPIC\nA single section.\n', encoding='utf-8')
+    summary = new.reload_knowledge_base()
+    assert summary['changed'] and list(new.KNOWLEDGE_BASE.sections) == ['ONLY TOPIC']
+    assert new.reload_status['error'] is None
+
+
+def test_admin_reload_reports_error_and_keeps_serving(knowledge_file, monkeypatch):
+    monkeypatch.setattr(new, 'ADMIN_TOKEN', 'secret')
+    previous = new.KNOWLEDGE_BASE
+    knowledge_file.write_text('')
+    response = new.app.test_client().post('/admin/reload', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 500
+    assert response.get_json()['changed'] is False
+    assert_previous_kept(previous)
+
+
+def health(port):
+    import json
+    import urllib.request
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=5) as response:
+        payload = json.load(response)
+    return payload['process']['worker'], payload['knowledge_version']
+
+
+def wait_for(port, condition, timeout=30):
+    """Poll /health over fresh connections until condition(versions by worker) holds"""
+    import time
+    versions = {}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            worker, version = health(port)
+        except OSError:
+            time.sleep(0.1)
+            continue
+        versions[worker] = version
+        if condition(versions):
+            return versions
+    raise AssertionError(f"workers never converged: {versions}")
+
+
+def test_admin_reload_reaches_every_prefork_worker(knowledge_file, monkeypatch):
+    import json
+    import os
+    import signal
+    import socket
+    import urllib.request
+
+    monkeypatch.setattr(new, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(new, 'wait_for_model', lambda knowledge_base: False)
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            new.PreforkServer('127.0.0.1', port, 2).run()
+        finally:
+            os._exit(0)
+    try:
+        old_version = new.KNOWLEDGE_BASE.version
+        wait_for(port, lambda versions: len(versions) == 2)
+
+        knowledge_file.write_text(knowledge_file.read_text() + '\n\nNEW TOPIC\nAdded after the workers started.\n')
+        request = urllib.request.Request(f'http://127.0.0.1:{port}/admin/reload', method='POST',
+                                         headers={'X-Admin-Token': 'secret'})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            summary = json.load(response)
+        assert summary['changed'] and summary['added'] == ['NEW TOPIC']
+
+        # Only one worker served the reload; the other must pick it up without the watcher
+        versions = wait_for(port, lambda versions: len(versions) == 2 and
+                            set(versions.values()) == {summary['version']})
+        assert old_version not in versions.values()
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
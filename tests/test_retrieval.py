@@ -0,0 +1,63 @@
+import pytest
+
+import new
+
+
+@pytest.mark.parametrize('question', [
+    'recommend a good movie',
+    'best stock to buy',
+    'who won the football game yesterday',
+    'general question about weather',
+])
+def test_off_topic_questions_are_not_routed(question):
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE) == []
+
+
+@pytest.mark.parametrize('question, topic', [
+    ('who was alan turing', 'TURING TEST'),
+    ('how are words reduced to their root form', 'STEMMING'),
+    ('splitting data into folds', 'CROSS-VALIDATION'),
+])
+def test_on_topic_questions_still_use_retrieval(question, topic):
+    assert not new.KNOWLEDGE_BASE.topic_matcher.match(question)
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE)[0][0] == topic
+
+
+def test_search_returns_k_distinct_sections():
+    # One section whose many paragraphs all outscore the other sections' single hit
+    dominant = '\n'.join(['ALPHA SECTION'] + [f'alpha alpha alpha beta note {i}' for i in range(40)])
+    others = '\n\n'.join(f'OTHER {name}\nalpha appears once among many other words here' for name in 'XYZ')
+    index = new.BM25Index(new.KnowledgeBase(dominant + '\n\n' + others))
+
+    hits = index.search('alpha beta', k=3)
+    assert [topic for topic, _ in hits][0] == 'ALPHA SECTION'
+    assert len(hits) == len({topic for topic, _ in hits}) == 3
+
+
+def test_question_about_two_topics_keeps_both_candidates():
+    question = 'how do cnns and rnns differ?'
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE) == [
+        ('CONVOLUTIONAL NEURAL NETWORKS', 4), ('RECURRENT NEURAL NETWORKS', 3)]
+    assert new.classify_question(question, new.KNOWLEDGE_BASE) == (
+        'topic', 'CONVOLUTIONAL NEURAL NETWORKS', 4, ('CONVOLUTIONAL NEURAL NETWORKS', 'RECURRENT NEURAL NETWORKS'))
+
+
+def test_ratio_cutoff_drops_weak_candidates(monkeypatch):
+    question = 'explain supervised learning with neural nets'
+    # 'ai' inside 'explain' scores 1, under half of the winners' 3
+    assert new.KNOWLEDGE_BASE.topic_matcher.match(question)['ARTIFICIAL INTELLIGENCE'] == 1
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE) == [
+        ('MACHINE LEARNING', 3), ('SUPERVISED LEARNING', 3)]
+    monkeypatch.setattr(new, 'QA_TOP_K_MIN_RATIO', 0.3)
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE) == [
+        ('MACHINE LEARNING', 3), ('SUPERVISED LEARNING', 3), ('ARTIFICIAL INTELLIGENCE', 1)]
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE, k=1) == [('MACHINE LEARNING', 3)]
+
+
+def test_keywords_of_topics_without_a_section_are_dropped():
+    assert new.KNOWLEDGE_BASE.section('BIAS IN AI') is None
+    question = 'is algorithmic bias unfair ai?'
+    assert new.KNOWLEDGE_BASE.topic_matcher.match(question)['BIAS IN AI'] == 6
+    # Neither routed to nor holding a slot (or the cutoff) the topics with sections need
+    assert new.find_relevant_topics(question, new.KNOWLEDGE_BASE) == [('ARTIFICIAL INTELLIGENCE', 3), ('AI ETHICS', 3)]
+    assert new.classify_question('tell me about unfair ai', new.KNOWLEDGE_BASE)[3] == ('ARTIFICIAL INTELLIGENCE',)
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import new
+
+
+class SlowExecutor:
+    """Stands in for the batched QA executor: one slow forward pass per call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def answer_many(self, question, sections):
+        self.calls += 1
+        time.sleep(0.5)
+        return [{'answer': 'learning from data', 'score': 0.9, 'start': 0, 'end': 1} for _ in sections]
+
+
+def test_concurrent_ask_requests_share_one_inference(monkeypatch):
+    executor = SlowExecutor()
+    monkeypatch.setattr(new, 'qa_executor', executor)
+    monkeypatch.setattr(new, 'cascade_executor', None)
+    monkeypatch.setattr(new, 'answer_flights', new.SingleFlight())
+    new.answer_cache.clear()
+
+    question = 'What is machine learning?'
+    assert new.classify_question(question, new.KNOWLEDGE_BASE)[0] == 'topic'
+
+    statuses = []
+
+    def ask():
+        response = new.app.test_client().post('/ask', json={'question': question})
+        statuses.append(response.status_code if response.get_json()['success'] else None)
+
+    threads = [threading.Thread(target=ask) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert statuses == [200] * 20
+    assert executor.calls == 1
+    stats = new.answer_flights.stats()
+    assert stats['computations'] == 1 and stats['coalesced'] == 19
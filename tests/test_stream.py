@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import new
+
+
+def parse_sse(text):
+    """[(event, payload)] of a Server-Sent Events body"""
+    events = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def flask_stream(question):
+    response = new.app.test_client().get('/ask/stream', query_string={'question': question})
+    assert response.headers['Content-Type'].startswith('text/event-stream')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    return parse_sse(response.get_data(as_text=True))
+
+
+def asgi_stream(asgi, question):
+    response = asgi(lambda client: client.get('/ask/stream', params={'question': question}))
+    assert response.headers['content-type'] == 'text/event-stream'
+    assert response.headers['cache-control'] == 'no-cache'
+    return parse_sse(response.text)
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def stream(request):
+    """stream(question) -> [(event, payload)] from either app's /ask/stream"""
+    if request.param == 'flask':
+        return flask_stream
+    asgi = request.getfixturevalue('asgi')
+    return lambda question: asgi_stream(asgi, question)
+
+
+def tracked_companion(topic):
+    companion = new.LearningCompanion()
+    companion.track_interaction(topic, 'question')
+    return companion
+
+
+def test_topic_question_streams_skeleton_answer_progress_done(stream):
+    events = stream('What is machine learning?')
+    assert [event for event, _ in events] == ['message', 'answer', 'progress', 'done']
+    (_, skeleton), (_, answer), (_, progress), (_, done) = events
+    assert 'data-slot="answer"' in skeleton['html'] and 'MACHINE LEARNING' in skeleton['html']
+    fallback = new.KNOWLEDGE_BASE.section('MACHINE LEARNING').fallback_answer
+    assert fallback in answer['html']
+    assert progress['html'] == new.create_progress_tracker(tracked_companion('MACHINE LEARNING'))
+    assert done == {}
+
+
+@pytest.mark.parametrize('question', ['hello there', 'Take a quiz'])
+def test_non_topic_questions_stream_one_message_then_done(stream, question):
+    events = stream(question)
+    assert [event for event, _ in events] == ['message', 'done']
+    assert events[0][1]['html'].strip()
+
+
+def test_empty_question_asks_for_one(stream):
+    assert stream('') == [('message', {'html': 'Please ask a question.'}), ('done', {})]
+
+
+def test_failed_answer_streams_the_error_card(stream, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("inference failed")
+    monkeypatch.setattr(new, 'extract_answer', fail)
+    events = stream('What is machine learning?')
+    assert [event for event, _ in events] == ['message', 'message', 'done']
+    assert events[1][1]['html'] == new.ASK_ERROR_HTML
+
+
+def test_flask_and_asgi_stream_the_same_events(asgi):
+    for question in ('What is machine learning?', 'hello there', 'What is a CNN?'):
+        flask_events, asgi_events = flask_stream(question), asgi_stream(asgi, question)
+        assert [event for event, _ in flask_events] == [event for event, _ in asgi_events]
+        # The skeleton's motivational fact is picked at random; everything after it must match
+        assert flask_events[1:] == asgi_events[1:]
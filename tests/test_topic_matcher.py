@@ -0,0 +1,80 @@
+import re
+
+import new
+
+
+def substring_scan(text, keywords):
+    """The matcher's reference: every keyword of every topic searched in the text, 3 points
+    when it occurs as a whole word and 1 when only inside a longer word"""
+    scores = {}
+    for topic, topic_keywords in keywords.items():
+        score = 0
+        for keyword in topic_keywords:
+            if keyword in text:
+                score += 3 if re.search(rf'(?<!\w){re.escape(keyword)}(?!\w)', text) else 1
+        if score:
+            scores[topic] = score
+    return scores
+
+
+def keyword_matcher(keywords):
+    matcher = new.TopicMatcher()
+    for topic, topic_keywords in keywords.items():
+        for keyword in topic_keywords:
+            matcher.add(topic, keyword)
+    return matcher.build()
+
+
+def test_matches_the_substring_scan_on_topic_keywords():
+    matcher = keyword_matcher(new.TOPIC_KEYWORDS)
+    questions = [question.lower() for question in new.canonical_questions(new.KNOWLEDGE_BASE)]
+    for keyword in {keyword for keywords in new.TOPIC_KEYWORDS.values() for keyword in keywords}:
+        questions += [f'what is {keyword}?', f'tell me about {keyword}s', f'x{keyword}', f'{keyword}-based systems',
+                      f'{keyword} and {keyword} again', keyword]
+    questions += ['how do gpt models use self-attention in a transformer?', 'is chatgpt biased?',
+                  'convolutional neural networks for image recognition', 'explainable ai vs interpretable ai',
+                  'unsupervised and supervised learning', 'the weather today', '']
+    for question in questions:
+        # Same scores, in the same (tie-break) order
+        assert list(matcher.match(question).items()) == list(substring_scan(question, new.TOPIC_KEYWORDS).items()), \
+            question
+
+
+def test_overlapping_keywords_each_count():
+    matcher = keyword_matcher(new.TOPIC_KEYWORDS)
+    # 'neural network' ends inside 'networks' (1), 'neural networks' is whole (3);
+    # 'convolutional' and 'convolutional neural' overlap and are both whole (3 + 3)
+    assert matcher.match('convolutional neural networks') == {'NEURAL NETWORKS': 4, 'CONVOLUTIONAL NEURAL NETWORKS': 6}
+    # 'ai', 'ai bias' and 'bias' all end inside 'ai bias'
+    assert matcher.match('ai bias') == {'ARTIFICIAL INTELLIGENCE': 3, 'AI ETHICS': 6, 'BIAS IN AI': 3}
+
+
+def test_whole_word_only_keywords_need_word_boundaries():
+    matcher = new.TopicMatcher()
+    matcher.add('CONVOLUTIONAL NEURAL NETWORKS', 'cnn', whole_word_only=True)
+    matcher.add('LONG SHORT-TERM MEMORY', 'long short-term memory', whole_word_only=True)
+    matcher.build()
+
+    assert matcher.match('what is a cnn?') == {'CONVOLUTIONAL NEURAL NETWORKS': 3}
+    assert matcher.match('cnn-based models') == {'CONVOLUTIONAL NEURAL NETWORKS': 3}
+    for text in ('what are cnns?', 'rcnn detectors', 'cnn_layers'):
+        assert matcher.match(text) == {}, text
+    assert matcher.match('explain long short-term memory networks') == {'LONG SHORT-TERM MEMORY': 3}
+    assert matcher.match('long short-term memorys') == {}
+
+
+def test_whole_word_keyword_shared_with_a_substring_keyword():
+    matcher = new.TopicMatcher()
+    matcher.add('VISION HEADING', 'vision', whole_word_only=True)
+    matcher.add('COMPUTER VISION', 'vision')  # Moves 'vision' into the automaton
+    matcher.build()
+    assert matcher.match('supervision') == {'COMPUTER VISION': 1}
+    assert matcher.match('vision') == {'VISION HEADING': 3, 'COMPUTER VISION': 3}
+
+
+def test_headings_and_abbreviations_route_as_whole_words():
+    knowledge_base = new.KNOWLEDGE_BASE
+    assert new.find_relevant_topic('What is a CNN?', knowledge_base)[0] == 'CONVOLUTIONAL NEURAL NETWORKS'
+    assert new.find_relevant_topic('What is LSTM?', knowledge_base)[0] == 'LONG SHORT-TERM MEMORY'
+    assert 'NAMED ENTITY RECOGNITION' not in knowledge_base.topic_matcher.match('in general')
+    assert 'NAMED ENTITY RECOGNITION' in knowledge_base.topic_matcher.match('what is ner?')